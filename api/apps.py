@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api.dashboard.profile import signals as profile_signals  # noqa: F401
+        from api.integrations import signals as integrations_signals  # noqa: F401
+        from api.leaderboard import signals as leaderboard_signals  # noqa: F401
@@ -48,6 +48,7 @@ class LcReportAPI(APIView):
                 user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
                 created_at=date,
             ).values(
+                'id',
                 first_name=F('user__first_name'),
                 last_name=F('user__last_name'),
                 muid=F('user__muid'),
@@ -69,6 +70,7 @@ class LcReportAPI(APIView):
                 accepted=True,
                 user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value
             ).values(
+                'id',
                 first_name=F('user__first_name'),
                 last_name=F('user__last_name'),
                 muid=F('user__muid'),
@@ -89,7 +91,8 @@ class LcReportAPI(APIView):
         paginated_queryset = CommonUtils.get_paginated_queryset(student_info, request,
                                                                 search_fields=['first_name', 'last_name', 'muid'],
                                                                 sort_fields={'first_name': 'first_name',
-                                                                             'muid': 'muid'})
+                                                                             'muid': 'muid'},
+                                                                allow_cursor=True)
 
         student_info_data = StudentInfoSerializer(paginated_queryset.get('queryset'), many=True).data
 
@@ -119,9 +122,17 @@ class LcReportDownloadAPI(APIView):
         ).annotate(karma_earned=Sum('user__karma_activity_log_user__task__karma',
                                     filter=Q(user__karma_activity_log_user__task__ig=F('circle__ig'))))
 
-        student_info_data = StudentInfoSerializer(student_info, many=True).data
-
-        return CommonUtils.generate_csv(student_info_data, "Learning Circle Report")
+        # Rows are grouped by the values above, so they are paged by user
+        return CommonUtils.generate_csv_stream(student_info, {
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+            'muid': 'muid',
+            'circle_name': 'circle_name',
+            'circle_ig': 'circle_ig',
+            'organisation': 'organisation',
+            'dwms_id': 'dwms_id',
+            'karma_earned': 'karma_earned',
+        }, "Learning Circle Report", key='muid')
 
 
 class CollegeWiseLcReport(APIView):
@@ -201,10 +201,22 @@ class CampusStudentDetailsCSVAPI(APIView):
                 )
             ))
 
-        serializer = serializers.CampusStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        return CommonUtils.generate_csv_stream(
+            user_org_links,
+            {
+                "user_id": "user_id",
+                "fullname": lambda row: CommonUtils.get_fullname(
+                    row["first_name"], row["last_name"]
+                ),
+                "karma": "karma",
+                "muid": "muid",
+                "rank": lambda row: ranks.get(row["user_id"]),
+                "level": "level",
+                "join_date": lambda row: str(row["join_date"]),
+            },
+            "Campus Student Details",
+            fields=["first_name", "last_name", "join_date"],
         )
-        return CommonUtils.generate_csv(serializer.data, "Campus Student Details")
 
 
 class WeeklyKarmaAPI(APIView):
@@ -3,9 +3,10 @@ from datetime import timedelta
 from django.db.models import Sum
 from rest_framework import serializers
 
+from api.leaderboard.karma_aggregate_helper import KarmaAggregates
 from db.organization import UserOrganizationLink
 from db.task import KarmaActivityLog
-from utils.types import OrganizationType
+from utils.types import KarmaAggregateLevel, OrganizationType
 from utils.utils import DateTimeUtils
 
 
@@ -32,8 +33,15 @@ class CampusDetailsSerializer(serializers.ModelSerializer):
             "rank",
         ]
 
+    def _get_aggregate(self, obj):
+        if not hasattr(self, "_aggregate"):
+            self._aggregate = KarmaAggregates.get(
+                KarmaAggregateLevel.ORGANIZATION.value, obj.org.id
+            )
+        return self._aggregate
+
     def get_total_members(self, obj):
-        return obj.org.user_organization_link_org.count()
+        return aggregate.members if (aggregate := self._get_aggregate(obj)) else 0
 
     def get_active_members(self, obj):
         last_month = DateTimeUtils.get_current_utc_time() - timedelta(days=30)
@@ -55,25 +63,7 @@ class CampusDetailsSerializer(serializers.ModelSerializer):
         )
 
     def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.all()
-            .values("org")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        )
-
-        rank_dict = {
-            data["org"]: data["total_karma"] if data["total_karma"] is not None else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        if obj.org.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.id)
-            return position + 1
+        return aggregate.rank if (aggregate := self._get_aggregate(obj)) else None
 
 
 class CampusStudentDetailsSerializer(serializers.Serializer):
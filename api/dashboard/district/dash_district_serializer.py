@@ -5,9 +5,11 @@ from rest_framework import serializers
 from django.db.models import Sum, Count, Q, Case, When, IntegerField
 
 
+from api.leaderboard.karma_aggregate_helper import KarmaAggregates
 from db.organization import UserOrganizationLink, Organization
 from db.task import KarmaActivityLog, Level
 from db.user import User
+from utils.types import KarmaAggregateLevel
 from utils.utils import DateTimeUtils
 
 
@@ -32,28 +34,15 @@ class DistrictDetailsSerializer(serializers.ModelSerializer):
             "active_members",
         )
 
-    def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.all()
-            .values("org__district")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        )
-
-        rank_dict = {
-            data["org__district"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
+    def _get_aggregate(self, obj):
+        if not hasattr(self, "_aggregate"):
+            self._aggregate = KarmaAggregates.get(
+                KarmaAggregateLevel.DISTRICT.value, obj.org.district.id
+            )
+        return self._aggregate
 
-        if obj.org.district.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.district.id)
-            return position + 1
+    def get_rank(self, obj):
+        return aggregate.rank if (aggregate := self._get_aggregate(obj)) else None
 
     def get_district_lead(self, obj):
         user_org_link = UserOrganizationLink.objects.filter(
@@ -63,14 +52,10 @@ class DistrictDetailsSerializer(serializers.ModelSerializer):
         return user_org_link.user.fullname if user_org_link else None
 
     def get_karma(self, obj):
-        return UserOrganizationLink.objects.filter(
-            org__district=obj.org.district
-        ).aggregate(total_karma=Sum("user__wallet_user__karma"))["total_karma"]
+        return aggregate.karma if (aggregate := self._get_aggregate(obj)) else None
 
     def get_total_members(self, obj):
-        return UserOrganizationLink.objects.filter(
-            org__district=obj.org.district
-        ).count()
+        return aggregate.members if (aggregate := self._get_aggregate(obj)) else 0
 
     def get_active_members(self, obj):
         today = DateTimeUtils.get_current_utc_time()
@@ -7,8 +7,14 @@ from rest_framework.views import APIView
 from utils.permission import CustomizePermission, role_required
 from utils.response import CustomResponse
 from utils.types import RoleType
+from .log_helper import MAX_LINES, MAX_READ_BYTES, LogFile, get_int_param, parse_query_time
 
 log_path = config("LOGGER_DIR_PATH")
+DEFAULT_TAIL_LINES = 200
+DEFAULT_MATCHES = 100
+# Without any of these the end of the file is returned as a string, as the whole
+# file used to be
+READ_PARAMS = ("grep", "tail", "offset", "fromLine", "since", "until")
 
 
 class DownloadErrorLogAPI(APIView):
@@ -31,6 +37,22 @@ class DownloadErrorLogAPI(APIView):
 
 
 class ViewErrorLogAPI(APIView):
+    """
+    Reads part of a log file, chosen by the query parameters:
+
+    - `grep`: lines containing the text, at most `limit`, optionally
+      `ignoreCase`, within `since`/`until` and from `offset`
+    - `tail`: the last n lines
+    - `offset` and `length`: a byte range
+    - `fromLine` and `lines`: a line range, counted from 1
+    - `since` and/or `until`: the lines of a time window
+
+    These reads return a dict with the lines or content and the `next`
+    offset to continue from when they stopped early. Without any of them
+    the response is a string, as it was for existing clients, but holds only
+    the last lines of the file up to MAX_LINES and MAX_READ_BYTES.
+    """
+
     authentication_classes = [CustomizePermission]
 
     @role_required(
@@ -38,19 +60,45 @@ class ViewErrorLogAPI(APIView):
     )
     def get(self, request, log_name):
         error_log = f"{log_path}/{log_name}.log"
-        if os.path.exists(error_log):
-            try:
-                with open(error_log, "r") as log_file:
-                    log_content = log_file.read()
-                return CustomResponse(response=log_content).get_success_response()
-            except Exception as e:
-                return CustomResponse(
-                    general_message="Error reading log file"
-                ).get_failure_response()
+        if not os.path.exists(error_log):
+            return CustomResponse(
+                general_message=f"{log_name} Not Found"
+            ).get_failure_response()
 
-        return CustomResponse(
-            general_message=f"{log_name} Not Found"
-        ).get_failure_response()
+        params = request.query_params
+        log_file = LogFile(error_log)
+        if not any(param in params for param in READ_PARAMS):
+            log_content = "\n".join(log_file.tail(MAX_LINES)["lines"])
+            return CustomResponse(response=log_content).get_success_response()
+
+        since = parse_query_time(params.get("since"))
+        until = parse_query_time(params.get("until"))
+        offset = get_int_param(params, "offset", None)
+
+        if pattern := params.get("grep"):
+            result = log_file.grep(
+                pattern,
+                get_int_param(params, "limit", DEFAULT_MATCHES, minimum=1),
+                ignore_case=params.get("ignoreCase") == "true",
+                since=since,
+                until=until,
+                offset=offset,
+            )
+        elif "tail" in params:
+            result = log_file.tail(get_int_param(params, "tail", DEFAULT_TAIL_LINES, minimum=1))
+        elif offset is not None and "length" in params:
+            result = log_file.read_bytes(offset, get_int_param(params, "length", MAX_READ_BYTES, minimum=1))
+        elif "fromLine" in params:
+            result = log_file.read_lines(
+                get_int_param(params, "fromLine", 1, minimum=1),
+                get_int_param(params, "lines", DEFAULT_TAIL_LINES, minimum=1),
+            )
+        elif since or until:
+            result = log_file.read_window(since, until, offset)
+        else:
+            result = log_file.read_bytes(offset or 0, MAX_READ_BYTES)
+
+        return CustomResponse(response=result).get_success_response()
 
 
 class ClearErrorLogAPI(APIView):
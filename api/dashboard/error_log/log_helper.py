@@ -0,0 +1,317 @@
+import bisect
+import datetime
+import hashlib
+import json
+import os
+import re
+from contextlib import suppress
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.exception import CustomException
+
+# Caps of a single request, so a multi-gigabyte log is never loaded whole
+MAX_READ_BYTES = 1024 * 1024
+MAX_LINES = 5000
+MAX_LINE_BYTES = 64 * 1024
+MAX_MATCHES = 1000
+# A search stops after this many bytes and returns where to continue from
+MAX_SCAN_BYTES = 256 * 1024 * 1024
+TAIL_BLOCK_BYTES = 64 * 1024
+# The sidecar index keeps the line number and time of a line every this many bytes
+INDEX_INTERVAL = 1024 * 1024
+INDEX_SUFFIX = ".idx"
+# Both the JSON records and the older "{asctime} {levelname} {message}" lines
+TIMESTAMP_PATTERN = re.compile(rb"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})")
+TIMESTAMP_PREFIX_BYTES = 64
+
+
+def parse_line_time(line: bytes) -> Optional[str]:
+    """Timestamp a log line starts with, as a sortable `YYYY-MM-DDTHH:MM:SS`."""
+    if match := TIMESTAMP_PATTERN.search(line, 0, TIMESTAMP_PREFIX_BYTES):
+        return f"{match[1].decode()}T{match[2].decode()}"
+    return None
+
+
+def parse_query_time(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError as e:
+        raise CustomException(f"Invalid time {value}", status_code=400) from e
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(datetime.timezone.utc)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def get_int_param(params, name: str, default: Optional[int], minimum: int = 0) -> Optional[int]:
+    value = params.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError as e:
+        raise CustomException(f"{name} must be a number", status_code=400) from e
+    if value < minimum:
+        raise CustomException(f"{name} must be at least {minimum}", status_code=400)
+    return value
+
+
+def _decode(line: bytes) -> str:
+    return line.decode("utf-8", "replace").rstrip("\r\n")
+
+
+class LogIndex:
+    """
+    Sidecar of a log file with the byte offset, line number and time of
+    the first line after every INDEX_INTERVAL bytes.
+
+    It is extended with the lines appended since it was last read, and
+    rebuilt when the file was rotated or truncated. A digest of the first
+    line tells a file that was truncated and has grown past the indexed
+    size again from one that was only appended to. Line and time lookups
+    seek to the nearest entry instead of reading from the start.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.inode = None
+        self.head = None
+        self.size = 0
+        self.lines = 0
+        self.time = None
+        self.entries: List[Tuple[int, int, Optional[str]]] = []
+
+    @classmethod
+    def load(cls, path: str) -> "LogIndex":
+        index = cls(path)
+        stat = os.stat(path)
+        head = index.get_head()
+        with suppress(OSError, ValueError, KeyError, TypeError):
+            with open(index.index_path) as file:
+                data = json.load(file)
+            if (
+                data["inode"] == stat.st_ino
+                and data["size"] <= stat.st_size
+                and (data["size"] == 0 or data["head"] == head)
+            ):
+                index.inode = data["inode"]
+                index.size = data["size"]
+                index.lines = data["lines"]
+                index.time = data["time"]
+                index.entries = [tuple(entry) for entry in data["entries"]]
+
+        if index.inode is None:
+            index.inode = stat.st_ino
+        index.head = head
+        if index.size < stat.st_size:
+            index.extend()
+        return index
+
+    def get_head(self) -> str:
+        """Digest of the first line of the file."""
+        with open(self.path, "rb") as file:
+            return hashlib.sha1(file.readline(MAX_LINE_BYTES)).hexdigest()
+
+    def extend(self) -> None:
+        next_entry = self.entries[-1][0] + INDEX_INTERVAL if self.entries else 0
+        with open(self.path, "rb") as file:
+            file.seek(self.size)
+            offset = self.size
+            for line in iter(lambda: file.readline(MAX_LINE_BYTES), b""):
+                if not line.endswith(b"\n") and len(line) < MAX_LINE_BYTES:
+                    # Still being written, indexed once it is complete
+                    break
+                if line_time := parse_line_time(line):
+                    self.time = line_time
+                if offset >= next_entry:
+                    self.entries.append((offset, self.lines, self.time))
+                    next_entry = offset + INDEX_INTERVAL
+                offset += len(line)
+                self.lines += 1
+        self.size = offset
+        self.save()
+
+    def save(self) -> None:
+        data = {
+            "inode": self.inode,
+            "head": self.head,
+            "size": self.size,
+            "lines": self.lines,
+            "time": self.time,
+            "entries": self.entries,
+        }
+        # The viewer still works from the in-memory index when the log
+        # directory is read-only
+        with suppress(OSError):
+            temporary = f"{self.index_path}.{os.getpid()}"
+            with open(temporary, "w") as file:
+                json.dump(data, file)
+            os.replace(temporary, self.index_path)
+
+    def seek_line(self, line: int) -> Tuple[int, int]:
+        """Offset and number of an indexed line at or before `line`."""
+        position = bisect.bisect_right([entry[1] for entry in self.entries], line) - 1
+        if position < 0:
+            return 0, 0
+        offset, number, _ = self.entries[position]
+        return offset, number
+
+    def seek_time(self, time: str) -> Tuple[int, Optional[str]]:
+        """Offset of an indexed line written before `time`, with the time at that line."""
+        times = [entry[2] or "" for entry in self.entries]
+        position = bisect.bisect_left(times, time) - 1
+        if position < 0:
+            return 0, None
+        offset, _, line_time = self.entries[position]
+        return offset, line_time
+
+
+class LogFile:
+    """
+    Bounded reads of a log file: byte and line ranges, the last lines,
+    time windows and substring search.
+
+    Every read returns at most MAX_READ_BYTES or MAX_LINES, and a `next`
+    offset to continue from when it stopped early.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def read_bytes(self, offset: int, length: int) -> Dict:
+        offset = min(offset, self.size)
+        length = min(length, MAX_READ_BYTES)
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            content = file.read(length)
+        end = offset + len(content)
+        return {
+            "size": self.size,
+            "start": offset,
+            "end": end,
+            "next": end if end < self.size else None,
+            "content": content.decode("utf-8", "replace"),
+        }
+
+    def read_lines(self, first_line: int, count: int) -> Dict:
+        """`count` lines from line number `first_line`, counted from 1."""
+        start = first_line - 1
+        offset, number = LogIndex.load(self.path).seek_line(start)
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            while number < start and file.readline(MAX_LINE_BYTES):
+                number += 1
+            return self._collect(file, min(count, MAX_LINES), first_line=number + 1)
+
+    def tail(self, count: int) -> Dict:
+        """The last `count` lines, read backwards from the end of the file."""
+        count = min(count, MAX_LINES)
+        with open(self.path, "rb") as file:
+            end = position = self.size
+            # The file's last newline ends the last line instead of starting one
+            wanted = count + 1
+            found = 0
+            while position > 0 and found < wanted and end - position < MAX_READ_BYTES:
+                step = min(TAIL_BLOCK_BYTES, position)
+                position -= step
+                file.seek(position)
+                found += file.read(step).count(b"\n")
+
+            file.seek(position)
+            content = file.read(end - position)
+
+        ends_with_newline = content.endswith(b"\n")
+        lines = (content[:-1] if ends_with_newline else content).split(b"\n")
+        if position > 0:
+            # Reading started within a line
+            lines = lines[1:]
+        lines = lines[-count:]
+        start = end - len(b"\n".join(lines)) - ends_with_newline
+        return {
+            "size": self.size,
+            "start": start,
+            "end": end,
+            "next": None,
+            "lines": [_decode(line) for line in lines],
+        }
+
+    def read_window(self, since: Optional[str], until: Optional[str], offset: Optional[int] = None) -> Dict:
+        """Lines written between `since` and `until`, both inclusive."""
+        lines = []
+        size = 0
+        start = None
+        for line_offset, line in self._window(since, until, offset):
+            if len(lines) == MAX_LINES or size + len(line) > MAX_READ_BYTES:
+                return self._result(start, line_offset, line_offset, lines=lines)
+            if start is None:
+                start = line_offset
+            lines.append(_decode(line))
+            size += len(line)
+        return self._result(start, self.size, None, lines=lines)
+
+    def grep(
+            self, pattern: str, limit: int, ignore_case: bool = False, since: Optional[str] = None,
+            until: Optional[str] = None, offset: Optional[int] = None) -> Dict:
+        """Lines containing `pattern`, at most `limit` of them."""
+        limit = min(limit, MAX_MATCHES)
+        needle = pattern.encode()
+        if ignore_case:
+            needle = needle.lower()
+
+        matches = []
+        start = None
+        for line_offset, line in self._window(since, until, offset):
+            if start is None:
+                start = line_offset
+            if len(matches) == limit or line_offset - start >= MAX_SCAN_BYTES:
+                return self._result(start, line_offset, line_offset, matches=matches)
+            if needle in (line.lower() if ignore_case else line):
+                matches.append({"offset": line_offset, "line": _decode(line)})
+        return self._result(start, self.size, None, matches=matches)
+
+    def _window(
+            self, since: Optional[str], until: Optional[str], offset: Optional[int]
+    ) -> Iterator[Tuple[int, bytes]]:
+        current = None
+        if offset is None:
+            offset = 0
+            if since:
+                offset, current = LogIndex.load(self.path).seek_time(since)
+
+        with open(self.path, "rb") as file:
+            file.seek(min(offset, self.size))
+            for line in iter(lambda: file.readline(MAX_LINE_BYTES), b""):
+                # Lines without a time, such as tracebacks, belong to the record above
+                current = parse_line_time(line) or current
+                if until and current and current > until:
+                    return
+                if not since or (current and current >= since):
+                    yield offset, line
+                offset += len(line)
+
+    def _collect(self, file, count: int, first_line: int) -> Dict:
+        start = offset = file.tell()
+        lines = []
+        size = 0
+        while len(lines) < count:
+            line = file.readline(MAX_LINE_BYTES)
+            if not line or size + len(line) > MAX_READ_BYTES:
+                break
+            lines.append(_decode(line))
+            size += len(line)
+            offset += len(line)
+        result = self._result(start, offset, offset if offset < self.size else None, lines=lines)
+        result["firstLine"] = first_line
+        return result
+
+    def _result(self, start: Optional[int], end: int, next_offset: Optional[int], **data) -> Dict:
+        return {
+            "size": self.size,
+            "start": end if start is None else start,
+            "end": end,
+            "next": next_offset,
+            **data,
+        }
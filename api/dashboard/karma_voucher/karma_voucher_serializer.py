@@ -17,6 +17,9 @@ class VoucherLogCSVSerializer(serializers.ModelSerializer):
         model = VoucherLog
         fields = ['id', 'code', 'user_id', 'task_id', 'karma', 'month', 'week', 'claimed', 'created_by_id',
                   'updated_by_id', 'created_at', 'updated_at']
+        # Ids are fresh uuids and codes are generated against the codes already
+        # taken (see ImportVoucherLogAPI), so neither needs a query per row
+        extra_kwargs = {'id': {'validators': []}, 'code': {'validators': []}}
 
 
 class VoucherLogSerializer(serializers.ModelSerializer):
@@ -1,19 +1,17 @@
 import uuid
-from email.mime.image import MIMEImage
 
-import decouple
-from django.core.mail import EmailMessage
-from django.db import transaction
+from django.core.files.storage import default_storage
 from rest_framework.views import APIView
 
 from db.task import VoucherLog, TaskList
 from db.user import User
-from utils.karma_voucher import generate_karma_voucher, generate_ordered_id
+from utils.exception import CustomException
+from utils.karma_voucher import generate_ordered_id, get_voucher_path, render_karma_vouchers
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import RoleType
 from utils.utils import DateTimeUtils
-from utils.utils import ImportCSV, CommonUtils
+from utils.utils import ImportCSV, CommonUtils, MailOutbox
 from .karma_voucher_serializer import VoucherLogCSVSerializer, VoucherLogSerializer, VoucherLogCreateSerializer, VoucherLogUpdateSerializer
 
 
@@ -26,57 +24,50 @@ class ImportVoucherLogAPI(APIView):
             file_obj = request.FILES['voucher_log']
         except KeyError:
             return CustomResponse(general_message={'File not found.'}).get_failure_response()
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
-        if not excel_data:
-            return CustomResponse(general_message={'Empty csv file.'}).get_failure_response()
-
-        temp_headers = ['muid', 'karma', 'hashtag', 'month', 'week']
-        first_entry = excel_data[0]
-        for key in temp_headers:
-            if key not in first_entry:
-                return CustomResponse(general_message={f'{key} does not exist in the file.'}).get_failure_response()
         current_user = JWTUtils.fetch_user_id(request)
 
-        valid_rows = []
-        error_rows = []
-        success_rows = []
-        users_to_fetch = set()
-        tasks_to_fetch = set()
-        for row in excel_data[1:]:
-            task_hashtag = row.get('hashtag')
-            muid = row.get('muid')
-            users_to_fetch.add(muid)
-            tasks_to_fetch.add(task_hashtag)
-        # Fetching users and tasks in bulk
-        users = User.objects.filter(muid__in=users_to_fetch).values('id', 'email', 'first_name', 'last_name','muid')
-        tasks = TaskList.objects.filter(hashtag__in=tasks_to_fetch).values('id', 'hashtag')
-        user_dict = {
-            user['muid']: (
-                user['id'], user['email'], 
-                user['first_name'] if user['last_name'] is None else f"{user['first_name']} {user['last_name']}"
+        recipients = {}
+        summaries = {}
+        rendered_paths = []
+
+        def prepare_chunk(rows):
+            users = User.objects.filter(
+                muid__in={row.get('muid') for row in rows}
+            ).values('id', 'email', 'first_name', 'last_name', 'muid')
+            user_dict = {
+                user['muid']: (
+                    user['id'], user['email'], CommonUtils.get_fullname(user['first_name'], user['last_name'])
                 ) for user in users
-                }
+            }
+            task_dict = dict(
+                TaskList.objects.filter(
+                    hashtag__in={row.get('hashtag') for row in rows}
+                ).values_list('hashtag', 'id')
+            )
 
-        task_dict = {task['hashtag']: task['id'] for task in tasks}
-
-        count = 1
-        for row in excel_data[1:]:
-            task_hashtag = row.get('hashtag')
-            karma = row.get('karma')
-            month = row.get('month')
-            week = row.get('week')
-            muid = row.get('muid')
-            user_info = user_dict.get(muid)
-            if user_info is None:
-                row['error'] = f"Invalid muid: {muid}"
-                error_rows.append(row)
-            else:
-                user_id, email, full_name = user_info
-                task_id = task_dict.get(task_hashtag)
-                if task_id is None:
+            valid_rows = []
+            error_rows = []
+            for row in rows:
+                task_hashtag = row.get('hashtag')
+                karma = row.get('karma')
+                month = row.get('month')
+                week = row.get('week')
+                muid = row.get('muid')
+                user_info = user_dict.get(muid)
+                try:
+                    karma = int(float(karma))
+                except (TypeError, ValueError):
+                    karma = None
+
+                if user_info is None:
+                    row['error'] = f"Invalid muid: {muid}"
+                    error_rows.append(row)
+                elif task_dict.get(task_hashtag) is None:
                     row['error'] = f"Invalid task hashtag: {task_hashtag}"
                     error_rows.append(row)
+                elif karma is None:
+                    row['error'] = f"Invalid karma: {row.get('karma')}"
+                    error_rows.append(row)
                 elif karma == 0:
                     row['error'] = "Karma cannot be 0"
                     error_rows.append(row)
@@ -84,64 +75,93 @@ class ImportVoucherLogAPI(APIView):
                     row['error'] = "Month and week cannot be empty"
                     error_rows.append(row)
                 else:
-                    existing_codes = set(VoucherLog.objects.values_list('code', flat=True))
-                    while generate_ordered_id(count) in existing_codes:
-                        count += 1
-                    # Preparing valid row data
+                    user_id, email, full_name = user_info
                     row['user_id'] = user_id
-                    row['task_id'] = task_id
+                    row['task_id'] = task_dict[task_hashtag]
                     row['id'] = str(uuid.uuid4())
-                    row['code'] = generate_ordered_id(count)
+                    # Assigned by assign_codes right before the insert
+                    row['code'] = row['id']
                     row['claimed'] = False
                     row['created_by_id'] = current_user
                     row['updated_by_id'] = current_user
                     row['created_at'] = DateTimeUtils.get_current_utc_time()
                     row['updated_at'] = DateTimeUtils.get_current_utc_time()
-                    count += 1
                     valid_rows.append(row)
-                    success_rows.append({
+
+                    recipients[row['id']] = (email, full_name)
+                    summaries[row['id']] = {
                         'muid': muid,
-                        'code': row['code'], 
-                        'user': full_name, 
-                        'task': task_hashtag, 
-                        'karma': karma, 
-                        'month': month, 
+                        'user': full_name,
+                        'task': task_hashtag,
+                        'karma': row['karma'],
+                        'month': month,
                         'week': week
-                        })
-                    
-        # Serializing and saving valid voucher rows to the database
-        voucher_serializer = VoucherLogCSVSerializer(data=valid_rows, many=True)
-        if voucher_serializer.is_valid():
-            with transaction.atomic():
-                voucher_serializer.save()
-                vouchers_to_send = VoucherLog.objects.filter(code__in=[row['code'] for row in valid_rows]).values(
-                    'code',
-                    'user__muid', 
-                    'month', 
-                    'week', 
-                    'karma', 
-                    'task__hashtag'
-                )
-                if len(vouchers_to_send) != len(valid_rows):
-                    transaction.set_rollback(True)
-                    return CustomResponse(general_message='Something went wrong. Please try again.').get_failure_response()
-        else:
-            error_rows.append(voucher_serializer.errors)
-
-        for voucher in vouchers_to_send:
-            muid = voucher['user__muid']
-            code = voucher['code']
-            month = voucher['month']
-            week = voucher['week']
-            karma = voucher['karma']
-            task_hashtag = voucher['task__hashtag']
-            full_name = user_dict.get(muid)[2]
-            email = user_dict.get(muid)[1]
-
-            # Preparing email context and attachment
-            from_mail = decouple.config("FROM_MAIL")
-            subject = "Congratulations on earning Karma points!"
-            text = f"""Greetings from GTech µLearn!
+                    }
+
+            return valid_rows, error_rows
+
+        def assign_codes(vouchers):
+            # Codes are serials of the day. The locking read sees codes other
+            # imports committed and holds them off until this one commits.
+            code_prefix = generate_ordered_id(0)[:-4]
+            taken_codes = set(
+                VoucherLog.objects.select_for_update().filter(
+                    code__startswith=code_prefix
+                ).values_list('code', flat=True)
+            )
+            count = 1
+            for voucher in vouchers:
+                while generate_ordered_id(count) in taken_codes:
+                    count += 1
+                voucher.code = generate_ordered_id(count)
+                count += 1
+
+        def on_saved(vouchers):
+            # Rendered only for inserted rows, and removed again if the import fails
+            render_karma_vouchers([
+                {
+                    'name': str(recipients[voucher.id][1]),
+                    'hashtag': summaries[voucher.id]['task'],
+                    'karma': str(voucher.karma),
+                    'code': voucher.code,
+                    'month': f"{voucher.month}/{voucher.week}",
+                }
+                for voucher in vouchers
+            ], persist=True)
+            rendered_paths.extend(get_voucher_path(voucher.code) for voucher in vouchers)
+
+            # Queueing the mails with the vouchers so both commit together
+            MailOutbox.enqueue_many([
+                self.build_voucher_mail({'code': voucher.code}, *recipients[voucher.id])
+                for voucher in vouchers
+            ])
+
+        try:
+            success_rows, error_rows = ImportCSV.import_rows(
+                file_obj,
+                ['muid', 'karma', 'hashtag', 'month', 'week'],
+                VoucherLogCSVSerializer,
+                prepare_chunk,
+                before_save=assign_codes,
+                on_saved=on_saved,
+                represent=lambda voucher: {**summaries.pop(voucher.id), 'code': voucher.code},
+            )
+        except CustomException as e:
+            return CustomResponse(general_message={e.detail}).get_failure_response()
+        except Exception:
+            for path in rendered_paths:
+                default_storage.delete(path)
+            raise
+
+        return CustomResponse(
+            response={"Success": success_rows, "Failed": error_rows}
+        ).get_success_response()
+
+    @staticmethod
+    def build_voucher_mail(voucher, email, full_name):
+        code = voucher['code']
+        subject = "Congratulations on earning Karma points!"
+        text = f"""Greetings from GTech µLearn!
 
             Great news! You are just one step away from claiming your internship/contribution Karma points.
             
@@ -151,29 +171,17 @@ class ImportVoucherLogAPI(APIView):
             To claim your karma points copy this `voucher {code}` and paste it #task-dropbox channel along with your voucher image.
             """
 
-            month_week = f'{month}/{week}'
-            karma_voucher_image = generate_karma_voucher(
-                name=str(full_name), karma=str(int(karma)), code=code, hashtag=task_hashtag,
-                month=month_week)
-            karma_voucher_image.seek(0)
-            email_obj = EmailMessage(
-                subject=subject,
-                body=text,
-                from_email=from_mail,
-                to=[email],
-            )
-            attachment = MIMEImage(karma_voucher_image.read())
-            attachment.add_header(
-                'Content-Disposition',
-                'attachment',
-                filename=f'{str(full_name)}.jpg',
-            )
-            email_obj.attach(attachment)
-            email_obj.send(fail_silently=False)
-            
-        return CustomResponse(
-            response={"Success": success_rows, "Failed": error_rows}
-        ).get_success_response()
+        return MailOutbox.build(
+            subject=subject,
+            body=text,
+            recipients=[email],
+            attachments=[{
+                'path': get_voucher_path(code),
+                'filename': f'{str(full_name)}.jpg',
+                'mimetype': 'image/jpeg',
+            }],
+        )
+
 
 class VoucherLogAPI(APIView):
     authentication_classes = [CustomizePermission]
@@ -198,7 +206,9 @@ class VoucherLogAPI(APIView):
                          'updated_by': 'updated_by__first_name',
                          'updated_at': 'updated_at',
                          'created_at': 'created_at'
-                         }
+                         },
+            allow_cursor=True,
+            indexed_search=True
         )
         voucher_serializer = VoucherLogSerializer(paginated_queryset.get('queryset'), many=True).data
         return CustomResponse().paginated_response(data=voucher_serializer,
@@ -240,7 +250,29 @@ class ExportVoucherLogAPI(APIView):
 
     @role_required([RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.ASSOCIATE.value])
     def get(self, request):
-        voucher_serializer = VoucherLog.objects.all()
-        voucher_serializer_data = VoucherLogSerializer(voucher_serializer, many=True).data
-
-        return CommonUtils.generate_csv(voucher_serializer_data, 'Voucher Log')
+        return CommonUtils.generate_csv_stream(
+            VoucherLog.objects.all(),
+            {
+                'id': 'id',
+                'code': 'code',
+                'user': lambda row: CommonUtils.get_fullname(row['user__first_name'], row['user__last_name']),
+                'task': 'task__title',
+                'karma': 'karma',
+                'month': 'month',
+                'week': 'week',
+                'claimed': 'claimed',
+                'created_by': lambda row: CommonUtils.get_fullname(
+                    row['created_by__first_name'], row['created_by__last_name']),
+                'updated_by': lambda row: CommonUtils.get_fullname(
+                    row['updated_by__first_name'], row['updated_by__last_name']),
+                'created_at': 'created_at',
+                'updated_at': 'updated_at',
+                'muid': 'user__muid',
+            },
+            'Voucher Log',
+            fields=[
+                'user__first_name', 'user__last_name',
+                'created_by__first_name', 'created_by__last_name',
+                'updated_by__first_name', 'updated_by__last_name',
+            ],
+        )
@@ -1,11 +1,10 @@
 import uuid
 
-from django.db.models import Sum
 from rest_framework import serializers
 
+from api.leaderboard.leaderboard_helper import InterestGroupKarma, LearningCircleKarma
 from db.learning_circle import LearningCircle, UserCircleLink, InterestGroup
 from db.organization import UserOrganizationLink
-from db.task import KarmaActivityLog
 from utils.types import OrganizationType
 from utils.utils import DateTimeUtils
 
@@ -151,16 +150,15 @@ class LearningCircleHomeSerializer(serializers.ModelSerializer):
         except UserCircleLink.DoesNotExist:
             return False
 
+    def _get_circle_karma(self, obj):
+        if getattr(self, '_circle_karma_for', None) != obj.id:
+            self._circle_karma = LearningCircleKarma.get(obj)
+            self._circle_karma_for = obj.id
+        return self._circle_karma
+
     def get_total_karma(self, obj):
-        return (
-                KarmaActivityLog.objects.filter(
-                    user__usercirclelink__circle=obj,
-                    user__usercirclelink__accepted=True,
-                    task__ig=obj.ig,
-                    appraiser_approved=True,
-                ).aggregate(total_karma=Sum('karma'))['total_karma']
-                or 0
-        )
+        karma, _ = self._get_circle_karma(obj)
+        return karma
 
     def get_members(self, obj):
         return self._get_member_info(obj, accepted=1)
@@ -169,56 +167,24 @@ class LearningCircleHomeSerializer(serializers.ModelSerializer):
         return self._get_member_info(obj, accepted=None)
 
     def _get_member_info(self, obj, accepted):
-        members = UserCircleLink.objects.filter(circle=obj, accepted=accepted)
+        members = UserCircleLink.objects.filter(circle=obj, accepted=accepted).select_related('user')
+        ig_karma = InterestGroupKarma.get_karma([member.user_id for member in members], [obj.ig_id])
         member_info = []
 
         for member in members:
-            total_ig_karma = KarmaActivityLog.objects.filter(
-                task__ig=member.circle.ig,
-                user=member.user,
-                appraiser_approved=True
-            ).aggregate(total_karma=Sum('karma'))['total_karma'] or 0
-
             member_info.append({
                 'id': member.user.id,
                 'username': f'{member.user.first_name} {member.user.last_name}' if member.user.last_name else member.user.first_name,
                 'profile_pic': member.user.profile_pic or None,
-                'karma': total_ig_karma,
+                'karma': ig_karma.get((member.user_id, obj.ig_id), 0),
                 'is_lead': member.lead,
             })
 
         return member_info
 
     def get_rank(self, obj):
-        total_karma = KarmaActivityLog.objects.filter(
-            user__usercirclelink__circle=obj,
-            user__usercirclelink__accepted=True,
-            task__ig=obj.ig,
-            appraiser_approved=True
-        ).aggregate(total_karma=Sum('karma'))['total_karma'] or 0
-        circle_ranks = {obj.name: {'total_karma': total_karma}}
-        all_learning_circles = LearningCircle.objects.filter(ig=obj.ig).exclude(id=obj.id)
-
-        for lc in all_learning_circles:
-            total_karma_lc = KarmaActivityLog.objects.filter(
-                user__usercirclelink__circle=lc,
-                user__usercirclelink__accepted=True,
-                task__ig=lc.ig,
-                appraiser_approved=True
-            ).aggregate(total_karma=Sum('karma'))['total_karma'] or 0
-
-            circle_ranks[lc.name] = {'total_karma': total_karma_lc}
-
-        sorted_ranks = sorted(circle_ranks.items(), key=lambda x: x[1]['total_karma'], reverse=True)
-
-        return next(
-            (
-                i + 1
-                for i, (circle_name, data) in enumerate(sorted_ranks)
-                if circle_name == obj.name
-            ),
-            None,
-        )
+        _, rank = self._get_circle_karma(obj)
+        return rank
 
     class Meta:
         model = LearningCircle
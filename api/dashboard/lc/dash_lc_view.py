@@ -1,7 +1,6 @@
 import uuid
 
 from decouple import config
-from django.core.mail import send_mail
 from django.db.models import Q
 from django.shortcuts import redirect
 from rest_framework.views import APIView
@@ -12,7 +11,7 @@ from db.learning_circle import LearningCircle, UserCircleLink
 from db.user import User
 from utils.permission import JWTUtils
 from utils.response import CustomResponse
-from utils.utils import send_template_mail, DateTimeUtils
+from utils.utils import send_template_mail, DateTimeUtils, MailOutbox
 from .dash_lc_serializer import LearningCircleSerializer, LearningCircleCreateSerializer, LearningCircleHomeSerializer, \
     LearningCircleUpdateSerializer, LearningCircleJoinSerializer, LearningCircleMeetSerializer, \
     LearningCircleMainSerializer, LearningCircleNoteSerializer, LearningCircleDataSerializer, \
@@ -264,12 +263,11 @@ class LearningCircleInviteLeadAPI(APIView):
             #     subject="LC µFAM IS HERE!",
             #     address=["user_registration.html"],
             # )
-            send_mail(
-                "LC Invite",
-                "Join our lc",
-                from_mail,
-                [user.email],
-                fail_silently=False,
+            MailOutbox.enqueue(
+                subject="LC Invite",
+                body="Join our lc",
+                recipients=[user.email],
+                from_email=from_mail,
                 )
             return CustomResponse(general_message='User Invited').get_success_response()
 
@@ -1,17 +1,19 @@
 import uuid
 
 from django.db import transaction
-from django.db.models import F, Sum, Q
+from django.db.models import F, Sum
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
+from api.leaderboard.leaderboard_helper import InterestGroupKarma, organization_links_changed
 from db.organization import UserOrganizationLink
-from db.task import InterestGroup, KarmaActivityLog, Level, TaskList, Wallet, UserIgLink, UserLvlLink
+from db.task import InterestGroup, KarmaActivityLog, Level, TaskList, UserIgLink, UserLvlLink
 from db.user import User, UserSettings, Socials
 from utils.exception import CustomException
 from utils.permission import JWTUtils
-from utils.types import OrganizationType, RoleType, MainRoles
+from utils.types import OrganizationType, MainRoles
 from utils.utils import DateTimeUtils
+from .rank_helper import RankIndex
 
 
 class UserLogSerializer(ModelSerializer):
@@ -86,32 +88,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return None
 
     def get_rank(self, obj):
-        roles = self.get_roles(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).count()
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).count()
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(
-                        user__user_role_link_user__role__title__in=[
-                            RoleType.ENABLER.value,
-                            RoleType.MENTOR.value,
-                        ]
-                    )
-                )
-                .count()
-            )
-        return ranks if ranks > 0 else None
+        return RankIndex.get_rank(self.get_roles(obj), obj.wallet_user.karma)
 
     def get_karma_distribution(self, obj):
         return (
@@ -122,26 +99,18 @@ class UserProfileSerializer(serializers.ModelSerializer):
         )
 
     def get_interest_groups(self, obj):
-        interest_groups = []
-        for ig_link in UserIgLink.objects.filter(user=obj):
-            total_ig_karma = (
-                0
-                if KarmaActivityLog.objects.filter(
-                    task__ig=ig_link.ig, user=obj, appraiser_approved=True
-                )
-                   .aggregate(Sum("karma"))
-                   .get("karma__sum")
-                   is None
-                else KarmaActivityLog.objects.filter(
-                    task__ig=ig_link.ig, user=obj, appraiser_approved=True
-                )
-                   .aggregate(Sum("karma"))
-                   .get("karma__sum")
-            )
-            interest_groups.append(
-                {"id": ig_link.ig.id, "name": ig_link.ig.name, "karma": total_ig_karma}
-            )
-        return interest_groups
+        ig_links = UserIgLink.objects.filter(user=obj).select_related("ig")
+        ig_karma = InterestGroupKarma.get_karma(
+            [obj.id], [ig_link.ig_id for ig_link in ig_links]
+        )
+        return [
+            {
+                "id": ig_link.ig.id,
+                "name": ig_link.ig.name,
+                "karma": ig_karma.get((obj.id, ig_link.ig_id), 0),
+            }
+            for ig_link in ig_links
+        ]
 
 
 class UserLevelSerializer(serializers.ModelSerializer):
@@ -190,32 +159,7 @@ class UserRankSerializer(ModelSerializer):
         return ["Learner"] if len(roles) == 0 else roles
 
     def get_rank(self, obj):
-        roles = self.context.get("roles")
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).count()
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).count()
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(
-                        user__user_role_link_user__role__title__in=[
-                            RoleType.ENABLER.value,
-                            RoleType.MENTOR.value,
-                        ]
-                    )
-                )
-                .count()
-            )
-        return ranks if ranks > 0 else None
+        return RankIndex.get_rank(self.context.get("roles"), obj.wallet_user.karma)
 
     def get_karma(self, obj):
         return total_karma.karma if (total_karma := obj.wallet_user) else None
@@ -275,6 +219,7 @@ class UserProfileEditSerializer(serializers.ModelSerializer):
                 ]
 
                 UserOrganizationLink.objects.bulk_create(user_organization_links)
+                organization_links_changed(instance.id, linked_org_ids=community_data)
 
             return super().update(instance, validated_data)
 
@@ -12,6 +12,7 @@ from utils.types import WebHookActions, WebHookCategory
 from utils.utils import DiscordWebhooks
 from . import profile_serializer
 from .profile_serializer import LinkSocials
+from .rank_helper import RankIndex
 
 
 class UserProfileEditView(APIView):
@@ -309,6 +310,52 @@ class UserRankAPI(APIView):
         ).get_success_response()
 
 
+class UserRankWindowAPI(APIView):
+    def get(self, request, muid):
+        user = User.objects.filter(
+            muid=muid
+        ).select_related(
+            "wallet_user"
+        ).first()
+
+        if user is None:
+            return CustomResponse(
+                general_message="Invalid muid"
+            ).get_failure_response()
+
+        try:
+            radius = min(int(request.query_params.get("radius", 5)), 50)
+        except ValueError:
+            radius = -1
+        if radius < 0:
+            return CustomResponse(
+                general_message="radius must be a non-negative whole number"
+            ).get_failure_response()
+
+        if not hasattr(user, "wallet_user"):
+            # Users without a wallet have no rank to show a window around
+            return CustomResponse(
+                response=[]
+            ).get_success_response()
+
+        roles = UserRoleLink.objects.filter(
+            user=user
+        ).values_list(
+            "role__title",
+            flat=True
+        )
+
+        window = RankIndex.get_window(
+            list(roles),
+            user.wallet_user,
+            radius=radius
+        )
+
+        return CustomResponse(
+            response=window
+        ).get_success_response()
+
+
 class GetSocialsAPI(APIView):
     def get(self, request, muid=None):
 
@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from array import array
+
+from django.db.models import Q
+
+from db.task import Wallet
+from utils.types import MainRoles, RoleType
+
+# Upper bound on how old an index may get before it is rebuilt on read
+REBUILD_INTERVAL = 5 * 60
+# Wallet writes mark the index stale, but rebuilds are throttled to this
+MIN_REBUILD_INTERVAL = 30
+
+
+def _partition_queryset(partition):
+    if partition == MainRoles.MENTOR.value:
+        return Wallet.objects.filter(
+            user__user_role_link_user__role__title=RoleType.MENTOR.value
+        ).distinct()
+    if partition == MainRoles.ENABLER.value:
+        return Wallet.objects.filter(
+            user__user_role_link_user__role__title=RoleType.ENABLER.value
+        ).distinct()
+    return Wallet.objects.exclude(
+        Q(
+            user__user_role_link_user__role__title__in=[
+                RoleType.ENABLER.value,
+                RoleType.MENTOR.value,
+            ]
+        )
+    )
+
+
+class _KarmaIndex:
+    """A sorted (ascending) array of the karma of every wallet in a partition."""
+
+    def __init__(self, partition):
+        self.partition = partition
+        self.karma = array("q")
+        self.built_at = 0.0
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def needs_rebuild(self):
+        age = time.monotonic() - self.built_at
+        return age > REBUILD_INTERVAL or (self.stale and age > MIN_REBUILD_INTERVAL)
+
+    def rebuild(self):
+        karma = array(
+            "q",
+            _partition_queryset(self.partition)
+            .order_by("karma")
+            .values_list("karma", flat=True)
+            .iterator(chunk_size=10000),
+        )
+        self.karma, self.built_at, self.stale = karma, time.monotonic(), False
+
+    def ensure(self):
+        if self.needs_rebuild() and self.lock.acquire(blocking=not self.built_at):
+            try:
+                if self.needs_rebuild():
+                    self.rebuild()
+            finally:
+                self.lock.release()
+        return self.karma
+
+    def rank_of(self, karma):
+        """Number of wallets in the partition holding at least `karma`."""
+        index = self.ensure()
+        return len(index) - bisect.bisect_left(index, karma)
+
+
+class RankIndex:
+    """
+    In-process rank lookups for students, mentors and enablers.
+
+    Each partition keeps its karma values in a compact sorted array, so a rank
+    is a binary search instead of a COUNT over the wallet table. Indexes are
+    rebuilt on read once they are older than REBUILD_INTERVAL, or sooner when
+    a wallet write has marked them stale.
+    """
+
+    _indexes = {role.value: _KarmaIndex(role.value) for role in MainRoles}
+
+    @staticmethod
+    def get_partition(roles):
+        if RoleType.MENTOR.value in roles:
+            return MainRoles.MENTOR.value
+        if RoleType.ENABLER.value in roles:
+            return MainRoles.ENABLER.value
+        return MainRoles.STUDENT.value
+
+    @classmethod
+    def get_rank(cls, roles, karma):
+        rank = cls._indexes[cls.get_partition(roles)].rank_of(karma)
+        return rank if rank > 0 else None
+
+    @classmethod
+    def get_window(cls, roles, wallet, radius=5):
+        """
+        Returns the wallets ranked around `wallet` in the user's partition.
+
+        Wallets are ordered by karma and then by primary key, so users with
+        equal karma always appear in the same order and the user is placed
+        among them by that order too.
+
+        Args:
+            roles (list): Role titles of the user, used to pick the partition.
+            wallet (Wallet): Wallet of the user.
+            radius (int): Number of positions to include above and below.
+
+        Returns:
+            list: Dicts with rank, muid, first_name, last_name and karma.
+        """
+        partition = cls.get_partition(roles)
+        index = cls._indexes[partition]
+        values = index.ensure()
+        if not values:
+            return []
+
+        queryset = _partition_queryset(partition)
+        position = len(values) - bisect.bisect_right(values, wallet.karma)
+        position += queryset.filter(karma=wallet.karma, pk__lt=wallet.pk).count()
+        start = max(0, position - radius)
+        end = min(len(values), position + radius + 1)
+        if start >= end:
+            return []
+        highest, lowest = values[-1 - start], values[-end]
+        # Wallets with the highest karma that rank above the window
+        skipped = start - (len(values) - bisect.bisect_right(values, highest))
+
+        wallets = (
+            queryset
+            .filter(karma__gte=lowest, karma__lte=highest)
+            .order_by("-karma", "pk")
+            .values("karma", "user__muid", "user__first_name", "user__last_name")[
+                skipped: skipped + end - start
+            ]
+        )
+        return [
+            {
+                "rank": index.rank_of(wallet["karma"]),
+                "muid": wallet["user__muid"],
+                "first_name": wallet["user__first_name"],
+                "last_name": wallet["user__last_name"],
+                "karma": wallet["karma"],
+            }
+            for wallet in wallets
+        ]
+
+    @classmethod
+    def invalidate(cls):
+        for index in cls._indexes.values():
+            index.stale = True
+
+    @classmethod
+    def rebuild(cls):
+        for index in cls._indexes.values():
+            with index.lock:
+                index.rebuild()
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.task import Wallet
+from db.user import UserRoleLink
+from .rank_helper import RankIndex
+
+
+@receiver([post_save, post_delete], sender=Wallet)
+@receiver([post_save, post_delete], sender=UserRoleLink)
+def rank_source_changed(sender, instance, **kwargs):
+    RankIndex.invalidate()
@@ -13,6 +13,7 @@ urlpatterns = [
     path('user-log/<str:muid>/', profile_view.UserLogAPI.as_view()),
     path('share-user-profile/', profile_view.ShareUserProfileAPI.as_view()),
     path('rank/<str:muid>/', profile_view.UserRankAPI.as_view()),
+    path('rank/<str:muid>/around/', profile_view.UserRankWindowAPI.as_view()),
     path('get-user-levels/', profile_view.UserLevelsAPI.as_view()),
     path('get-user-levels/<str:muid>/', profile_view.UserLevelsAPI.as_view()),
     path('socials/edit/', profile_view.SocialsAPI.as_view()),
@@ -4,7 +4,9 @@ from rest_framework.views import APIView
 
 from db.organization import Organization
 from db.task import Channel, InterestGroup, Level, TaskList, TaskType
+from utils.exception import CustomException
 from utils.permission import CustomizePermission, JWTUtils, role_required
+from utils.reference_data import ReferenceData
 from utils.response import CustomResponse
 from utils.types import Events, RoleType
 from utils.utils import CommonUtils, DateTimeUtils, ImportCSV
@@ -78,6 +80,8 @@ class TaskListAPI(APIView):
                 "created_by": "created_by__first_name",
                 "created_at": "created_at",
             },
+            allow_cursor=True,
+            indexed_search=True,
         )
 
         task_serializer_data = TaskListSerializer(
@@ -188,24 +192,39 @@ class TaskListCSV(APIView):
         ]
     )
     def get(self, request):
-        task_queryset = TaskList.objects.select_related(
-            "created_by",
-            "updated_by",
-            "channel",
-            "type",
-            "level",
-            "ig",
-            "org"
-        ).all()
-
-        task_serializer_data = TaskListSerializer(
-            task_queryset,
-            many=True
-        ).data
-
-        return CommonUtils.generate_csv(
-            task_serializer_data,
-            "Task List"
+        return CommonUtils.generate_csv_stream(
+            TaskList.objects.all(),
+            {
+                "id": "id",
+                "hashtag": "hashtag",
+                "title": "title",
+                "description": "description",
+                "karma": "karma",
+                "channel": "channel__name",
+                "type": "type__title",
+                "active": "active",
+                "variable_karma": "variable_karma",
+                "usage_count": "usage_count",
+                "level": "level__name",
+                "org": "org__title",
+                "ig": "ig__name",
+                "event": "event",
+                "updated_at": "updated_at",
+                "updated_by": lambda row: CommonUtils.get_fullname(
+                    row["updated_by__first_name"], row["updated_by__last_name"]
+                ),
+                "created_by": lambda row: CommonUtils.get_fullname(
+                    row["created_by__first_name"], row["created_by__last_name"]
+                ),
+                "created_at": "created_at",
+            },
+            "Task List",
+            fields=[
+                "updated_by__first_name",
+                "updated_by__last_name",
+                "created_by__first_name",
+                "created_by__last_name",
+            ],
         )
 
 
@@ -227,156 +246,111 @@ class ImportTaskListCSV(APIView):
                 general_message="File not found."
             ).get_failure_response()
 
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
-
-        if not excel_data:
-            return CustomResponse(
-                general_message="Empty csv file."
-            ).get_failure_response()
-
-        temp_headers = [
-            "hashtag",
-            "title",
-            "description",
-            "karma",
-            "usage_count",
-            "variable_karma",
-            "level",
-            "channel",
-            "type",
-            "ig",
-            "org",
-            "event",
-        ]
-        first_entry = excel_data[0]
-        for key in temp_headers:
-            if key not in first_entry:
-                return CustomResponse(
-                    general_message=f"{key} does not exist in the file."
-                ).get_failure_response()
-
-        valid_rows = []
-        error_rows = []
-
-        channels_to_fetch = set()
-        task_types_to_fetch = set()
-        levels_to_fetch = set()
-        igs_to_fetch = set()
-        orgs_to_fetch = set()
-
-        for row in excel_data[1:]:
-            hashtag = row.get("hashtag")
-            level = row.get("level")
-            channel = row.get("channel")
-            task_type = row.get("type")
-            ig = row.get("ig")
-            org = row.get("org")
-
-            channels_to_fetch.add(channel)
-            task_types_to_fetch.add(task_type)
-            levels_to_fetch.add(level)
-            igs_to_fetch.add(ig)
-            orgs_to_fetch.add(org)
-
-        channels = Channel.objects.filter(
-            name__in=channels_to_fetch
-        ).values(
-            "id",
-            "name"
-        )
-
-        task_types = TaskType.objects.filter(
-            title__in=task_types_to_fetch
-        ).values(
-            "id",
-            "title"
-        )
-
-        levels = Level.objects.filter(
-            name__in=levels_to_fetch
-        ).values(
-            "id",
-            "name"
-        )
-
-        igs = InterestGroup.objects.filter(
-            name__in=igs_to_fetch
-        ).values(
-            "id",
-            "name"
-        )
-
-        orgs = Organization.objects.filter(
-            code__in=orgs_to_fetch
-        ).values(
-            "id",
-            "code"
-        )
+        user_id = JWTUtils.fetch_user_id(request)
+        # Hashtags already imported from this file, later duplicates are rejected
+        seen_hashtags = set()
+
+        def prepare_chunk(rows):
+            def names(key):
+                return {row[key] for row in rows if row.get(key) is not None}
+
+            channels_dict = dict(
+                Channel.objects.filter(name__in=names("channel")).values_list("name", "id")
+            )
+            task_types_dict = dict(
+                TaskType.objects.filter(title__in=names("type")).values_list("title", "id")
+            )
+            levels_dict = dict(
+                Level.objects.filter(name__in=names("level")).values_list("name", "id")
+            )
+            igs_dict = dict(
+                InterestGroup.objects.filter(name__in=names("ig")).values_list("name", "id")
+            )
+            orgs_dict = dict(
+                Organization.objects.filter(code__in=names("org")).values_list("code", "id")
+            )
+            existing_hashtags = set(
+                TaskList.objects.filter(hashtag__in=names("hashtag")).values_list(
+                    "hashtag", flat=True
+                )
+            )
+
+            valid_rows = []
+            error_rows = []
+            for row in rows:
+                hashtag = row.get("hashtag")
+                level = row.pop("level")
+                channel = row.pop("channel")
+                task_type = row.pop("type")
+                ig = row.pop("ig")
+                org = row.pop("org")
+
+                channel_id = channels_dict.get(channel)
+                task_type_id = task_types_dict.get(task_type)
+                level_id = levels_dict.get(level) if level is not None else None
+                ig_id = igs_dict.get(ig) if ig is not None else None
+                org_id = orgs_dict.get(org) if org is not None else None
+
+                if hashtag in existing_hashtags or hashtag in seen_hashtags:
+                    row["error"] = f"Hashtag already exists: {hashtag}"
+                    error_rows.append(row)
+                elif not channel_id:
+                    row["error"] = f"Invalid channel ID: {channel}"
+                    error_rows.append(row)
+                elif not task_type_id:
+                    row["error"] = f"Invalid task type ID: {task_type}"
+                    error_rows.append(row)
+                elif level and not level_id:
+                    row["error"] = f"Invalid level ID: {level}"
+                    error_rows.append(row)
+                elif ig and not ig_id:
+                    row["error"] = f"Invalid interest group ID: {ig}"
+                    error_rows.append(row)
+                elif org and not org_id:
+                    row["error"] = f"Invalid organization ID: {org}"
+                    error_rows.append(row)
+                else:
+                    seen_hashtags.add(hashtag)
+                    row["id"] = str(uuid.uuid4())
+                    row["updated_by_id"] = user_id
+                    row["updated_at"] = DateTimeUtils.get_current_utc_time()
+                    row["created_by_id"] = user_id
+                    row["created_at"] = DateTimeUtils.get_current_utc_time()
+                    row["active"] = True
+                    row["channel_id"] = channel_id
+                    row["type_id"] = task_type_id
+                    row["level_id"] = level_id or None
+                    row["ig_id"] = ig_id or None
+                    row["org_id"] = org_id or None
+                    valid_rows.append(row)
+
+            return valid_rows, error_rows
 
-        channels_dict = {channel["name"]: channel["id"] for channel in channels}
-        task_types_dict = {
-            task_type["title"]: task_type["id"] for task_type in task_types
-        }
-        levels_dict = {level["name"]: level["id"] for level in levels}
-        igs_dict = {ig["name"]: ig["id"] for ig in igs}
-        orgs_dict = {org["code"]: org["id"] for org in orgs}
-
-        for row in excel_data[1:]:
-            hashtag = row.get("hashtag")
-            level = row.pop("level")
-            channel = row.pop("channel")
-            task_type = row.pop("type")
-            ig = row.pop("ig")
-            org = row.pop("org")
-
-            channel_id = channels_dict.get(channel)
-            task_type_id = task_types_dict.get(task_type)
-            level_id = levels_dict.get(level) if level is not None else None
-            ig_id = igs_dict.get(ig) if ig is not None else None
-            org_id = orgs_dict.get(org) if org is not None else None
-
-            if TaskList.objects.filter(hashtag=hashtag).exists():
-                row["error"] = f"Hashtag already exists: {hashtag}"
-                error_rows.append(row)
-            elif not channel_id:
-                row["error"] = f"Invalid channel ID: {channel}"
-                error_rows.append(row)
-            elif not task_type_id:
-                row["error"] = f"Invalid task type ID: {task_type}"
-                error_rows.append(row)
-            elif level and not level_id:
-                row["error"] = f"Invalid level ID: {level}"
-                error_rows.append(row)
-            elif ig and not ig_id:
-                row["error"] = f"Invalid interest group ID: {ig}"
-                error_rows.append(row)
-            elif org and not org_id:
-                row["error"] = f"Invalid organization ID: {org}"
-                error_rows.append(row)
-            else:
-                user_id = JWTUtils.fetch_user_id(request)
-                row["id"] = str(uuid.uuid4())
-                row["updated_by_id"] = user_id
-                row["updated_at"] = DateTimeUtils.get_current_utc_time()
-                row["created_by_id"] = user_id
-                row["created_at"] = DateTimeUtils.get_current_utc_time()
-                row["active"] = True
-                row["channel_id"] = channel_id
-                row["type_id"] = task_type_id
-                row["level_id"] = level_id or None
-                row["ig_id"] = ig_id or None
-                row["org_id"] = org_id or None
-                valid_rows.append(row)
-
-        task_list_serializer = TaskImportSerializer(data=valid_rows, many=True)
-        if task_list_serializer.is_valid():
-            task_list_serializer.save()
-        else:
-            error_rows.append(task_list_serializer.errors)
+        try:
+            success_rows, error_rows = ImportCSV.import_rows(
+                file_obj,
+                [
+                    "hashtag",
+                    "title",
+                    "description",
+                    "karma",
+                    "usage_count",
+                    "variable_karma",
+                    "level",
+                    "channel",
+                    "type",
+                    "ig",
+                    "org",
+                    "event",
+                ],
+                TaskImportSerializer,
+                prepare_chunk,
+            )
+        except CustomException as e:
+            return CustomResponse(general_message=e.detail).get_failure_response()
 
         return CustomResponse(
-            response={"Success": task_list_serializer.data, "Failed": error_rows}
+            response={"Success": success_rows, "Failed": error_rows}
         ).get_success_response()
 
 
@@ -391,15 +365,13 @@ class ChannelDropdownAPI(APIView):
         ]
     )
     def get(self, request):
-        channels = Channel.objects.values(
-            "id",
-            "name"
+        return ReferenceData.get_response(
+            request,
+            "channels_dropdown",
+            [Channel],
+            lambda: list(Channel.objects.values("id", "name")),
         )
 
-        return CustomResponse(
-            response=channels
-        ).get_success_response()
-
 
 class IGDropdownAPI(APIView):
     authentication_classes = [CustomizePermission]
@@ -412,13 +384,12 @@ class IGDropdownAPI(APIView):
         ]
     )
     def get(self, request):
-        igs = InterestGroup.objects.values(
-            "id",
-            "name"
+        return ReferenceData.get_response(
+            request,
+            "igs_dropdown",
+            [InterestGroup],
+            lambda: list(InterestGroup.objects.values("id", "name")),
         )
-        return CustomResponse(
-            response=igs
-        ).get_success_response()
 
 
 class OrganizationDropdownAPI(APIView):
@@ -432,13 +403,12 @@ class OrganizationDropdownAPI(APIView):
         ]
     )
     def get(self, request):
-        organizations = Organization.objects.values(
-            "id",
-            "title"
+        return ReferenceData.get_response(
+            request,
+            "organizations_dropdown",
+            [Organization],
+            lambda: list(Organization.objects.values("id", "title")),
         )
-        return CustomResponse(
-            response=organizations
-        ).get_success_response()
 
 
 class LevelDropdownAPI(APIView):
@@ -452,13 +422,12 @@ class LevelDropdownAPI(APIView):
         ]
     )
     def get(self, request):
-        levels = Level.objects.values(
-            "id",
-            "name"
+        return ReferenceData.get_response(
+            request,
+            "levels_dropdown",
+            [Level],
+            lambda: list(Level.objects.values("id", "name")),
         )
-        return CustomResponse(
-            response=levels
-        ).get_success_response()
 
 
 class TaskTypesDropDownAPI(APIView):
@@ -3,6 +3,7 @@ import uuid
 from django.db import transaction
 from rest_framework import serializers
 
+from api.leaderboard.leaderboard_helper import organization_links_changed
 from db.organization import Organization, UserOrganizationLink
 from db.task import UserIgLink
 from db.user import User, UserRoleLink
@@ -157,6 +158,7 @@ class UserDetailsSerializer(serializers.ModelSerializer):
                 ]
                 existing_orgs.delete()
                 UserOrganizationLink.objects.bulk_create(new_orgs)
+                organization_links_changed(user.id, linked_org_ids=orgs)
 
             if interest_groups is not None:
                 existing_ig = UserIgLink.objects.filter(user=user)
@@ -322,6 +324,9 @@ class UserDetailsEditSerializer(serializers.ModelSerializer):
                         for org in organizations
                     ]
                 )
+                organization_links_changed(
+                    instance.id, linked_org_ids=[org.id for org in organizations]
+                )
 
             if isinstance(role_ids := validated_data.pop("roles", None), list):
                 instance.user_role_link_user.all().delete()
@@ -124,6 +124,8 @@ class UserAPI(APIView):
                 "karma": "wallet_user__karma",
                 "created_at": "created_at",
             },
+            allow_cursor=True,
+            indexed_search=True,
         )
         serializer = dash_user_serializer.UserDashboardSerializer(
             queryset.get("queryset"),
@@ -141,19 +143,20 @@ class UserManagementCSV(APIView):
 
     @role_required([RoleType.ADMIN.value])
     def get(self, request):
-        user_queryset = User.objects.select_related(
-            "wallet_user",
-            "user_lvl_link_user",
-            "user_lvl_link_user__level"
-        ).all()
-
-        serializer = dash_user_serializer.UserDashboardSerializer(
-            user_queryset,
-            many=True
-        )
-
-        return CommonUtils.generate_csv(
-            serializer.data,
+        return CommonUtils.generate_csv_stream(
+            User.objects.all(),
+            {
+                "id": "id",
+                "first_name": "first_name",
+                "last_name": "last_name",
+                "muid": "muid",
+                "discord_id": "discord_id",
+                "email": "email",
+                "mobile": "mobile",
+                "created_at": "created_at",
+                "karma": "wallet_user__karma",
+                "level": "user_lvl_link_user__level__name",
+            },
             "User"
         )
 
@@ -3,9 +3,11 @@ from datetime import timedelta
 from django.db.models import Sum
 from rest_framework import serializers
 
+from api.leaderboard.karma_aggregate_helper import KarmaAggregates
 from db.organization import UserOrganizationLink, District
 from db.task import KarmaActivityLog, Level
 from db.user import User
+from utils.types import KarmaAggregateLevel
 from utils.utils import DateTimeUtils
 
 
@@ -28,38 +30,21 @@ class ZonalDetailsSerializer(serializers.ModelSerializer):
             "active_members",
         ]
 
-    def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.all()
-            .values("org__district__zone")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        )
-
-        rank_dict = {
-            data["org__district__zone"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
+    def _get_aggregate(self, obj):
+        if not hasattr(self, "_aggregate"):
+            self._aggregate = KarmaAggregates.get(
+                KarmaAggregateLevel.ZONE.value, obj.org.district.zone.id
+            )
+        return self._aggregate
 
-        if obj.org.district.zone.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.district.zone.id)
-            return position + 1
+    def get_rank(self, obj):
+        return aggregate.rank if (aggregate := self._get_aggregate(obj)) else None
 
     def get_karma(self, obj):
-        return UserOrganizationLink.objects.filter(
-            org__district__zone=obj.org.district.zone,
-        ).aggregate(total_karma=Sum("user__wallet_user__karma"))["total_karma"]
+        return aggregate.karma if (aggregate := self._get_aggregate(obj)) else None
 
     def get_total_members(self, obj):
-        return UserOrganizationLink.objects.filter(
-            org__district__zone=obj.org.district.zone,
-        ).count()
+        return aggregate.members if (aggregate := self._get_aggregate(obj)) else 0
 
     def get_active_members(self, obj):
         today = DateTimeUtils.get_current_utc_time()
@@ -8,6 +8,7 @@ from rest_framework import serializers
 
 from db.hackathon import Hackathon, HackathonForm, HackathonOrganiserLink, HackathonUserSubmission
 from db.organization import Organization, District, UserOrganizationLink
+from db.user import User
 from utils.permission import JWTUtils
 from utils.types import DEFAULT_HACKATHON_FORM_FIELDS
 from utils.utils import DateTimeUtils
@@ -426,7 +427,8 @@ class ListApplicantsSerializer(serializers.ModelSerializer):
                     elif field == 'name':
                         data[field] = user.fullname
                     elif field == 'college':
-                        data[field] = UserOrganizationLink.objects.filter(user_id=user.id).first().org.title
+                        org_link = UserOrganizationLink.objects.filter(user_id=user.id).first()
+                        data[field] = org_link.org.title if org_link else None
             return data
         except json.JSONDecodeError:
             return {}
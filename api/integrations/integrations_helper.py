@@ -1,16 +1,95 @@
+import hashlib
+import hmac
+import threading
+import uuid
 from datetime import datetime, timedelta
 
 import decouple
 import jwt
 import pytz
 import requests
+from django.core.cache import cache
 
 from db.integrations import Integration
-from mulearnbackend.settings import SECRET_KEY
+from mulearnbackend.settings import CACHE_VERSION_TIMEOUT, SECRET_KEY
 from utils.exception import CustomException
 from utils.response import CustomResponse
 
 
+class IntegrationRegistry:
+    """
+    In-process copy of the integration table, indexed by name and by the
+    SHA-256 of each integration's token.
+
+    The table holds a handful of partner rows, so it is loaded whole and
+    reloaded only when the version token in the shared cache changes, which
+    happens on every Integration save or delete (see `api.integrations.signals`).
+    With a per-process cache the token also expires after CACHE_VERSION_TIMEOUT
+    seconds, so a rotated token reaches the other workers within that time.
+    """
+
+    version_key = "integrations:version"
+    _version = None
+    _by_name = {}
+    _by_token = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _hash(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def _load(cls) -> None:
+        version = cache.get(cls.version_key)
+        if version is None:
+            cache.add(cls.version_key, uuid.uuid4().hex, timeout=CACHE_VERSION_TIMEOUT)
+            version = cache.get(cls.version_key)
+
+        if version == cls._version:
+            return
+
+        with cls._lock:
+            if version == cls._version:
+                return
+
+            integrations = list(Integration.objects.all())
+            cls._by_name = {integration.name: integration for integration in integrations}
+            cls._by_token = {
+                cls._hash(integration.token): integration for integration in integrations
+            }
+            cls._version = version
+
+    @classmethod
+    def get(cls, name: str) -> Integration:
+        """
+        Returns the integration with the given name.
+
+        :raises Integration.DoesNotExist: If there is no such integration.
+        """
+        cls._load()
+        if integration := cls._by_name.get(name):
+            return integration
+        raise Integration.DoesNotExist(f"Integration {name} does not exist.")
+
+    @classmethod
+    def is_valid_token(cls, token: str, name: str) -> bool:
+        """
+        Checks that `token` belongs to the integration `name`, comparing the
+        token in constant time.
+        """
+        cls._load()
+        integration = cls._by_token.get(cls._hash(token))
+        return (
+            integration is not None
+            and integration.name == name
+            and hmac.compare_digest(integration.token.encode(), token.encode())
+        )
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.set(cls.version_key, uuid.uuid4().hex, timeout=CACHE_VERSION_TIMEOUT)
+
+
 def get_authorization_id(token: str) -> str | None:
     """
     The function `get_authorization_id` decodes a JWT token and returns the authorization ID if the
@@ -76,9 +155,7 @@ def token_required(integration_name: str):
 
                 token = auth_header.split(" ")[1]
 
-                if not Integration.objects.filter(
-                    token=token, name=integration_name
-                ).first():
+                if not IntegrationRegistry.is_valid_token(token, integration_name):
                     raise CustomException("Invalid Authorization header")
                 else:
                     result = func(self, request, *args, **kwargs)
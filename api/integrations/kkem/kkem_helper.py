@@ -1,5 +1,9 @@
+import hashlib
 import json
+import threading
+import time
 from base64 import urlsafe_b64decode
+from collections import OrderedDict
 from urllib.parse import parse_qs
 
 import requests
@@ -8,10 +12,10 @@ from Crypto.Hash import SHA256
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Util.Padding import unpad
 
-from db.integrations import Integration
 from utils.exception import CustomException
 from utils.types import IntegrationType
 from utils.utils import send_template_mail
+from ..integrations_helper import IntegrationRegistry
 
 
 def send_data_to_kkem(kkem_link):
@@ -38,21 +42,53 @@ def send_data_to_kkem(kkem_link):
     return response_data
 
 
-def decrypt_kkem_data(ciphertext):
-    try:
-        secret_key = Integration.objects.get(name=IntegrationType.KKEM.value).auth_token
+class _TTLCache:
+    """A thread safe LRU whose entries expire `ttl` seconds after insertion."""
 
-        SALT_SIZE = 16
-        ITERATIONS = 10000
-        KEY_SIZE = 256
+    def __init__(self, capacity, ttl=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
 
-        def ensure_padding(encoded_str):
-            return encoded_str + "=" * (-len(encoded_str) % 4)
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+
+SALT_SIZE = 16
+ITERATIONS = 10000
+KEY_SIZE = 256
+
+# PBKDF2 output per (secret, salt), so a repeated salt skips key derivation
+_derived_keys = _TTLCache(capacity=1024)
+# Decrypted params per (secret, ciphertext) for the length of a KKEM redirect flow
+_decrypted_params = _TTLCache(capacity=4096, ttl=10 * 60)
+
+
+def _digest(*parts):
+    return hashlib.sha256(b"\0".join(parts)).digest()
 
-        salt_and_encrypted = urlsafe_b64decode(ensure_padding(ciphertext))
-        salt = salt_and_encrypted[:SALT_SIZE]
-        encrypted = salt_and_encrypted[SALT_SIZE:]
 
+def _derive_key(secret_key, salt):
+    key = _digest(secret_key.encode(), salt)
+    if (secret := _derived_keys.get(key)) is None:
         secret = PBKDF2(
             secret_key,
             salt,
@@ -60,6 +96,26 @@ def decrypt_kkem_data(ciphertext):
             count=ITERATIONS,
             hmac_hash_module=SHA256,
         )
+        _derived_keys.set(key, secret)
+    return secret
+
+
+def decrypt_kkem_data(ciphertext):
+    try:
+        secret_key = IntegrationRegistry.get(IntegrationType.KKEM.value).auth_token
+
+        cache_key = _digest(secret_key.encode(), ciphertext.encode())
+        if (params := _decrypted_params.get(cache_key)) is not None:
+            return {name: list(values) for name, values in params.items()}
+
+        def ensure_padding(encoded_str):
+            return encoded_str + "=" * (-len(encoded_str) % 4)
+
+        salt_and_encrypted = urlsafe_b64decode(ensure_padding(ciphertext))
+        salt = salt_and_encrypted[:SALT_SIZE]
+        encrypted = salt_and_encrypted[SALT_SIZE:]
+
+        secret = _derive_key(secret_key, salt)
 
         cipher = AES.new(secret, AES.MODE_ECB)
         decrypted_data = cipher.decrypt(encrypted)
@@ -68,7 +124,9 @@ def decrypt_kkem_data(ciphertext):
         except:
             raise CustomException("Invalid padding or incorrect key")
 
-        return parse_qs(decrypted.decode("utf-8"))
+        params = parse_qs(decrypted.decode("utf-8"))
+        _decrypted_params.set(cache_key, params)
+        return {name: list(values) for name, values in params.items()}
     except Exception as e:
         raise CustomException(
             "The given token seems to be invalid do re-check and try again!"
@@ -1,13 +1,15 @@
 from django.db.models import Q
 from rest_framework import serializers
 
-from db.integrations import Integration, IntegrationAuthorization
+from api.leaderboard.leaderboard_helper import InterestGroupKarma
+from db.integrations import IntegrationAuthorization
 from db.user import User
 from utils.exception import CustomException
 from utils.types import IntegrationType
 from utils.utils import DateTimeUtils
 
 from . import kkem_helper
+from ..integrations_helper import IntegrationRegistry
 
 
 class KKEMUserSerializer(serializers.ModelSerializer):
@@ -35,32 +37,19 @@ class KKEMUserSerializer(serializers.ModelSerializer):
         return karma
 
     def get_interest_groups(self, obj):
-        user_ig_links = obj.user_ig_link_user.all()
-
-        # Extract ig_ids for filtering KarmaActivityLog in one go
-        interest_groups = [ig_link.ig for ig_link in user_ig_links]
-
-        # Aggregate karma for each interest group in one query
-        aggregated_karma = obj.karma_activity_log_user.all()
-
-        aggregated_karma = [
-            {
-                "task__ig__id": karma.task.ig.id,
-                "task__ig__name": karma.task.ig.name,
-                "karma": karma.karma,
-            }
-            for karma in aggregated_karma
-            if hasattr(karma.task, "ig") and karma.task.ig
-        ]
-
-        ig_details = {ig.name: 0 for ig in interest_groups}
+        ig_links = obj.user_ig_link_user.all()
 
-        for karma in aggregated_karma:
-            ig_name = karma["task__ig__name"]
-            if ig_name in ig_details:
-                ig_details[ig_name] += karma["karma"]
+        # Resolved for the whole page by the view, looked up here otherwise
+        ig_karma = self.context.get("ig_karma")
+        if ig_karma is None:
+            ig_karma = InterestGroupKarma.get_karma(
+                [obj.id], [ig_link.ig_id for ig_link in ig_links]
+            )
 
-        return [{"name": key, "karma": value} for key, value in ig_details.items()]
+        return [
+            {"name": ig_link.ig.name, "karma": ig_karma.get((obj.id, ig_link.ig_id), 0)}
+            for ig_link in ig_links
+        ]
 
     def get_jsid(self, obj):
         return int(obj.jsid) if obj.jsid else None
@@ -109,7 +98,7 @@ class KKEMAuthorization(serializers.Serializer):
         email_or_muid = validated_data["emailOrMuid"]
         user = self.verify_user(email_or_muid)
 
-        integration = Integration.objects.get(name=IntegrationType.KKEM.value)
+        integration = IntegrationRegistry.get(IntegrationType.KKEM.value)
         jsid = validated_data["jsid"]
         dwms_id = validated_data["dwms_id"]
 
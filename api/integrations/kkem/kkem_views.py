@@ -5,8 +5,9 @@ import requests
 from django.db.models import F, Prefetch
 from rest_framework.views import APIView
 
-from db.integrations import Integration, IntegrationAuthorization
-from db.task import InterestGroup, KarmaActivityLog, TaskList, UserIgLink
+from api.leaderboard.leaderboard_helper import InterestGroupKarma
+from db.integrations import IntegrationAuthorization
+from db.task import UserIgLink
 from db.user import User
 from utils.exception import CustomException
 from utils.response import CustomResponse
@@ -36,19 +37,6 @@ class KKEMBulkKarmaAPI(APIView):
                     "user_ig_link_user",
                     queryset=UserIgLink.objects.select_related("ig"),
                 ),
-                Prefetch(
-                    "karma_activity_log_user",
-                    queryset=KarmaActivityLog.objects.filter(
-                        appraiser_approved=True
-                    ).prefetch_related(
-                        Prefetch(
-                            "task",
-                            queryset=TaskList.objects.all().prefetch_related(
-                                Prefetch("ig", queryset=InterestGroup.objects.all())
-                            ),
-                        )
-                    ),
-                ),
             )
             .distinct()
         )
@@ -66,7 +54,14 @@ class KKEMBulkKarmaAPI(APIView):
                     general_message="Invalid datetime format",
                 ).get_failure_response()
 
-        serialized_users = KKEMUserSerializer(base_queryset, many=True)
+        users = list(base_queryset)
+        serialized_users = KKEMUserSerializer(
+            users,
+            many=True,
+            context={
+                "ig_karma": InterestGroupKarma.get_karma([user.id for user in users])
+            },
+        )
 
         return CustomResponse(response=serialized_users.data).get_success_response()
 
@@ -195,7 +190,7 @@ class KKEMdetailsFetchAPI(APIView):
             details = kkem_helper.decrypt_kkem_data(encrypted_data)
             jsid = details["jsid"][0]
 
-            integration = Integration.objects.get(name=IntegrationType.KKEM.value)
+            integration = integrations_helper.IntegrationRegistry.get(IntegrationType.KKEM.value)
             token, BASE_URL = integration.token, integration.base_url
 
             response = requests.post(
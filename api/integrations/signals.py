@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.integrations import Integration
+from .integrations_helper import IntegrationRegistry
+
+
+@receiver([post_save, post_delete], sender=Integration)
+def integration_changed(sender, instance, **kwargs):
+    transaction.on_commit(IntegrationRegistry.invalidate)
@@ -0,0 +1,243 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from db.organization import KarmaAggregate, Organization, UserOrganizationLink
+from utils.types import KarmaAggregateLevel
+from utils.utils import DateTimeUtils
+
+# Path from a user organization link to the entity of each level and its parent
+LEVEL_PATHS = {
+    KarmaAggregateLevel.ORGANIZATION.value: ("org_id", "org__district_id"),
+    KarmaAggregateLevel.DISTRICT.value: ("org__district_id", "org__district__zone_id"),
+    KarmaAggregateLevel.ZONE.value: (
+        "org__district__zone_id",
+        "org__district__zone__state_id",
+    ),
+    KarmaAggregateLevel.STATE.value: (
+        "org__district__zone__state_id",
+        "org__district__zone__state__country_id",
+    ),
+}
+
+
+def _totals(level, entity_ids=None):
+    path, parent_path = LEVEL_PATHS[level]
+    links = UserOrganizationLink.objects.all()
+    if entity_ids is not None:
+        links = links.filter(**{f"{path}__in": entity_ids})
+
+    return (
+        links.values(entity=F(path), parent=F(parent_path))
+        .annotate(
+            total_karma=Sum("user__wallet_user__karma"),
+            total_members=Count("id"),
+        )
+        .order_by()
+    )
+
+
+def shift_ranks(others, old_karma, new_karma):
+    """
+    Applies one entity's karma change to the competition ranks of its peers.
+
+    Only peers whose karma lies between the old and new totals move, by one
+    position. Either total may be None for an entity that is being added or
+    removed.
+
+    Args:
+        others (QuerySet): The peers of the entity, excluding the entity itself.
+        old_karma (int): Karma the entity was ranked with, None if unranked.
+        new_karma (int): Karma the entity is ranked with now, None if removed.
+
+    Returns:
+        int: The new rank of the entity, None if it was removed.
+    """
+    if old_karma is not None and (new_karma is None or new_karma < old_karma):
+        others.filter(
+            karma__lt=old_karma,
+            **({"karma__gte": new_karma} if new_karma is not None else {}),
+        ).update(rank=F("rank") - 1)
+    if new_karma is not None and (old_karma is None or new_karma > old_karma):
+        others.filter(
+            karma__lt=new_karma,
+            **({"karma__gte": old_karma} if old_karma is not None else {}),
+        ).update(rank=F("rank") + 1)
+
+    return None if new_karma is None else others.filter(karma__gt=new_karma).count() + 1
+
+
+def lock_ranks(ranking, old_karma, new_karma):
+    """
+    Locks the rows of a ranking whose rank a change from `old_karma` to
+    `new_karma` can move, the changing row itself among them, in one scan in
+    karma order. Either total may be None as in `shift_ranks`.
+
+    Every change of a ranking takes these locks first in its transaction, so
+    concurrent changes queue up on the rows they share, always in the same
+    order, and none shifts ranks from karma another has not committed yet.
+
+    Args:
+        ranking (QuerySet): All ranked entities, including the changing one.
+        old_karma (int): Karma the entity was ranked with, None if unranked.
+        new_karma (int): Karma the entity is ranked with now, None if removed.
+    """
+    bounds = [karma for karma in (old_karma, new_karma) if karma is not None]
+    rows = ranking.filter(karma__lte=max(bounds))
+    if len(bounds) == 2:
+        rows = rows.filter(karma__gte=min(bounds))
+    list(rows.select_for_update().order_by("karma", "pk").values_list("pk", flat=True))
+
+
+def competition_ranks(karma_values):
+    """Ranks a descending sequence of karma values, ties sharing a rank."""
+    rank, previous_karma = 0, None
+    for position, karma in enumerate(karma_values, start=1):
+        if karma != previous_karma:
+            rank, previous_karma = position, karma
+        yield rank
+
+
+class KarmaAggregates:
+    """
+    Total karma, member count and rank of every organization, district, zone
+    and state, stored in the karma_aggregate table.
+
+    Ranks are competition ranks within a level (1 + number of entities with
+    more karma), which lets a single entity's change be applied by shifting
+    only the entities whose karma lies between its old and new totals. Those
+    are locked first, see `lock_ranks`.
+    """
+
+    @staticmethod
+    def get(level, entity_id):
+        return KarmaAggregate.objects.filter(level=level, entity_id=entity_id).first()
+
+    @staticmethod
+    def rebuild():
+        now = DateTimeUtils.get_current_utc_time()
+        for level in LEVEL_PATHS:
+            totals = sorted(
+                (total for total in _totals(level) if total["entity"]),
+                key=lambda total: total["total_karma"] or 0,
+                reverse=True,
+            )
+            ranks = competition_ranks(total["total_karma"] or 0 for total in totals)
+            rows = [
+                KarmaAggregate(
+                    id=uuid.uuid4(),
+                    level=level,
+                    entity_id=total["entity"],
+                    parent_id=total["parent"],
+                    karma=total["total_karma"] or 0,
+                    members=total["total_members"],
+                    rank=rank,
+                    updated_at=now,
+                )
+                for total, rank in zip(totals, ranks)
+            ]
+
+            with transaction.atomic():
+                KarmaAggregate.objects.filter(level=level).delete()
+                KarmaAggregate.objects.bulk_create(rows, batch_size=1000)
+
+    @classmethod
+    def apply_deltas(cls, org_ids, karma, members=0):
+        """
+        Moves the aggregates of the given organizations, and of the district,
+        zone and state above each of them, by `karma` and `members`.
+
+        Only the changed rows and the peers ranked between their old and new
+        karma are written, nothing is summed again. An entity missing from
+        a level that was built is computed on its own; levels that were never
+        built are left to `rebuild`.
+
+        Args:
+            org_ids (Iterable): Organizations of the changed user links.
+            karma (int): Karma gained, negative when lost.
+            members (int): Links gained, negative when removed.
+        """
+        if not org_ids or not (karma or members):
+            return
+
+        hierarchy = Organization.objects.filter(id__in=org_ids).values_list(
+            "id",
+            "district_id",
+            "district__zone_id",
+            "district__zone__state_id",
+            "district__zone__state__country_id",
+        )
+        for chain in hierarchy:
+            for level, entity_id, parent_id in zip(LEVEL_PATHS, chain, chain[1:]):
+                if entity_id:
+                    cls._apply_delta(level, entity_id, parent_id, karma, members)
+
+    @classmethod
+    def _apply_delta(cls, level, entity_id, parent_id, karma, members):
+        aggregates = KarmaAggregate.objects.filter(level=level)
+
+        while True:
+            # Read before the transaction, whose first statement has to be the lock
+            saved = aggregates.filter(entity_id=entity_id).values("karma", "members").first()
+            if saved is None:
+                if aggregates.exists():
+                    cls._apply(level, entity_id, next(iter(_totals(level, [entity_id])), None))
+                return
+
+            removed = saved["members"] + members <= 0
+            with transaction.atomic():
+                lock_ranks(aggregates, saved["karma"], None if removed else saved["karma"] + karma)
+                row = aggregates.select_for_update().filter(entity_id=entity_id).first()
+                if row is None or (row.karma, row.members) != (saved["karma"], saved["members"]):
+                    # Changed after it was read, the locked range may not cover it
+                    continue
+
+                others = aggregates.exclude(entity_id=entity_id)
+                if removed:
+                    shift_ranks(others, row.karma, None)
+                    row.delete()
+                    return
+
+                row.members += members
+                if karma:
+                    row.rank = shift_ranks(others, row.karma, row.karma + karma)
+                    row.karma += karma
+                row.parent_id = parent_id
+                row.updated_at = DateTimeUtils.get_current_utc_time()
+                row.save()
+                return
+
+    @staticmethod
+    def _apply(level, entity_id, total):
+        aggregates = KarmaAggregate.objects.filter(level=level)
+        new_karma = (total["total_karma"] or 0) if total else None
+
+        while True:
+            old_karma = (
+                aggregates.filter(entity_id=entity_id).values_list("karma", flat=True).first()
+            )
+            if old_karma is None and new_karma is None:
+                return
+
+            with transaction.atomic():
+                lock_ranks(aggregates, old_karma, new_karma)
+                row = aggregates.select_for_update().filter(entity_id=entity_id).first()
+                if (row.karma if row else None) != old_karma:
+                    continue
+
+                others = aggregates.exclude(entity_id=entity_id)
+                rank = shift_ranks(others, old_karma, new_karma)
+
+                if new_karma is None:
+                    row.delete()
+                    return
+
+                row = row or KarmaAggregate(id=uuid.uuid4(), level=level, entity_id=entity_id)
+                row.parent_id = total["parent"]
+                row.karma = new_karma
+                row.members = total["total_members"]
+                row.rank = rank
+                row.updated_at = DateTimeUtils.get_current_utc_time()
+                row.save()
+                return
@@ -0,0 +1,769 @@
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Prefetch, Q, Sum
+
+from db.learning_circle import CircleKarma, LearningCircle, UserCircleLink
+from db.organization import Organization, UserOrganizationLink
+from db.task import (
+    EventKarma,
+    KarmaActivityLog,
+    OrgMonthlyKarma,
+    UserIgKarma,
+    UserMonthlyKarma,
+    Wallet,
+)
+from db.user import User
+from utils.types import Events, OrganizationType, RoleType
+from utils.utils import DateTimeUtils
+from .karma_aggregate_helper import KarmaAggregates, competition_ranks, shift_ranks
+
+LEADERBOARD_SIZE = 20
+# Extra rows kept beyond LEADERBOARD_SIZE so a few users dropping out of the
+# top rows can be absorbed without a full rebuild.
+LEADERBOARD_CAPACITY = LEADERBOARD_SIZE * 2
+# A per-process cache only sees the patches of its own process, so its boards
+# expire after CACHE_VERSION_TIMEOUT and are rebuilt from the database
+LEADERBOARD_TIMEOUT = 60 * 60 if settings.CACHE_IS_SHARED else settings.CACHE_VERSION_TIMEOUT
+
+STUDENTS_CACHE_KEY = "leaderboard:students"
+COLLEGES_CACHE_KEY = "leaderboard:colleges"
+# A board is written by one process at a time, the lock expires after
+# BOARD_LOCK_TIMEOUT in case its holder dies and is waited for up to BOARD_LOCK_WAIT
+BOARD_LOCK_TIMEOUT = 10
+BOARD_LOCK_WAIT = 2
+
+ROLLUP_CHUNK_SIZE = 5000
+# Users per query of InterestGroupKarma.get_karma
+KARMA_LOOKUP_CHUNK_SIZE = 1000
+
+
+def _students_queryset():
+    return (
+        User.objects.filter(
+            user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+            user_role_link_user__role__title=RoleType.STUDENT.value,
+            exist_in_guild=True,
+            active=True,
+        )
+        .distinct()
+        .select_related("wallet_user")
+        .prefetch_related(
+            Prefetch(
+                "user_organization_link_user",
+                queryset=UserOrganizationLink.objects.filter(
+                    org__org_type=OrganizationType.COLLEGE.value
+                ).select_related("org"),
+                to_attr="colleges",
+            )
+        )
+    )
+
+
+def _colleges_queryset():
+    return (
+        Organization.objects.filter(
+            org_type=OrganizationType.COLLEGE.value,
+            user_organization_link_org__user__user_role_link_user__role__title=RoleType.STUDENT.value,
+            user_organization_link_org__user__active=True,
+            user_organization_link_org__user__exist_in_guild=True,
+        )
+        .distinct()
+        .annotate(
+            total_students=Count("user_organization_link_org__user"),
+            total_karma=Sum("user_organization_link_org__user__wallet_user__karma"),
+        )
+        .values("id", "code", "title", "total_students", "total_karma")
+    )
+
+
+def _student_row(user):
+    try:
+        karma = user.wallet_user.karma
+    except User.wallet_user.RelatedObjectDoesNotExist:
+        karma = 0
+
+    return {
+        "id": user.id,
+        "full_name": user.fullname,
+        "total_karma": karma,
+        "institution": user.colleges[0].org.title if user.colleges else None,
+    }
+
+
+def _merge(board, key, rows, stale_keys):
+    """
+    Applies changed rows to a cached board while keeping it an exact top-N.
+
+    A row is kept only if it still ranks inside the known range, rows that fall
+    out of it are dropped since anyone outside the board may now outrank them.
+    Returns None when the board got too short and has to be rebuilt.
+    """
+    entries = [entry for entry in board["rows"] if entry[key] not in stale_keys]
+    floor = board["rows"][-1]["total_karma"] if board["rows"] else 0
+
+    for row in rows:
+        if board["exhaustive"] or row["total_karma"] >= floor:
+            entries.append(row)
+
+    entries.sort(key=lambda entry: entry["total_karma"], reverse=True)
+    if not board["exhaustive"] and len(entries) < LEADERBOARD_SIZE:
+        return None
+
+    return board | {"rows": entries[:LEADERBOARD_CAPACITY]}
+
+
+def _board_timeout(board):
+    """
+    Timeout to store a board with. A patched board keeps the expiry it was
+    built with when the cache is per process, so it is still rebuilt in time
+    to pick up the changes made by other processes.
+    """
+    if settings.CACHE_IS_SHARED:
+        return LEADERBOARD_TIMEOUT
+    return max(board["expires_at"] - time.time(), 0)
+
+
+@contextmanager
+def _board_lock(key):
+    """
+    Holds the cache lock of a board, yields False if it could not be taken
+    within BOARD_LOCK_WAIT.
+    """
+    lock_key, token = f"{key}:lock", uuid.uuid4().hex
+    deadline = time.monotonic() + BOARD_LOCK_WAIT
+    while not cache.add(lock_key, token, BOARD_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            yield False
+            return
+        time.sleep(0.01)
+    try:
+        yield True
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def user_karma_changed(user_id, karma_delta):
+    """
+    Applies a change of a user's wallet karma to the aggregates of the
+    organizations they are in and to the cached boards, once the current
+    transaction commits.
+    """
+    if not karma_delta:
+        return
+
+    org_ids = list(
+        UserOrganizationLink.objects.filter(user_id=user_id).values_list("org_id", flat=True)
+    )
+
+    def refresh():
+        KarmaAggregates.apply_deltas(org_ids, karma_delta)
+        LeaderboardStore.refresh_user(user_id, org_ids=org_ids)
+
+    transaction.on_commit(refresh)
+
+
+def organization_links_changed(user_id, linked_org_ids=(), unlinked_org_ids=()):
+    """
+    Adds a user's karma and membership to the aggregates of the organizations
+    they were linked to, removes them from the ones they were unlinked from,
+    and re-ranks the cached boards, once the current transaction commits.
+
+    Links saved one by one are handled by the signals, this is for links
+    created with bulk_create.
+    """
+    linked_org_ids, unlinked_org_ids = list(linked_org_ids), list(unlinked_org_ids)
+    karma = Wallet.objects.filter(user_id=user_id).values_list("karma", flat=True).first() or 0
+
+    def refresh():
+        KarmaAggregates.apply_deltas(linked_org_ids, karma, 1)
+        KarmaAggregates.apply_deltas(unlinked_org_ids, -karma, -1)
+        LeaderboardStore.refresh_user(user_id, org_ids=unlinked_org_ids)
+
+    transaction.on_commit(refresh)
+
+
+def user_standing_changed(user_id):
+    """
+    Re-ranks a user on the cached boards once the current transaction commits,
+    for changes that decide whether they are listed at all: their roles and
+    the active and exist_in_guild flags.
+    """
+    transaction.on_commit(lambda: LeaderboardStore.refresh_user(user_id))
+
+
+class LeaderboardStore:
+    """
+    Precomputed student and college leaderboards kept in the cache.
+
+    Boards are rebuilt on a cache miss or by the `rebuild_leaderboards`
+    management command and are patched in place whenever a wallet, an
+    organization link, a role or the listed flags of a user change. Both
+    only reach other processes through a shared cache; with a per-process
+    one each process rebuilds its boards every LEADERBOARD_TIMEOUT. Every
+    write happens under the board's cache lock, so concurrent patches do not
+    overwrite each other; a patch that cannot get the lock drops the board,
+    which is then rebuilt on the next read.
+    """
+
+    @staticmethod
+    def rebuild_students():
+        with _board_lock(STUDENTS_CACHE_KEY) as locked:
+            students = list(
+                _students_queryset().order_by("-wallet_user__karma")[:LEADERBOARD_CAPACITY]
+            )
+            board = {
+                "exhaustive": len(students) < LEADERBOARD_CAPACITY,
+                "expires_at": time.time() + LEADERBOARD_TIMEOUT,
+                "rows": [_student_row(user) for user in students],
+            }
+            if locked:
+                cache.set(STUDENTS_CACHE_KEY, board, LEADERBOARD_TIMEOUT)
+        return board
+
+    @staticmethod
+    def rebuild_colleges():
+        with _board_lock(COLLEGES_CACHE_KEY) as locked:
+            colleges = list(
+                _colleges_queryset().order_by("-total_karma")[:LEADERBOARD_CAPACITY]
+            )
+            board = {
+                "exhaustive": len(colleges) < LEADERBOARD_CAPACITY,
+                "expires_at": time.time() + LEADERBOARD_TIMEOUT,
+                "rows": [
+                    college | {"total_karma": college["total_karma"] or 0}
+                    for college in colleges
+                ],
+            }
+            if locked:
+                cache.set(COLLEGES_CACHE_KEY, board, LEADERBOARD_TIMEOUT)
+        return board
+
+    @staticmethod
+    def rebuild():
+        LeaderboardStore.rebuild_students()
+        LeaderboardStore.rebuild_colleges()
+
+    @staticmethod
+    def get_students(limit=LEADERBOARD_SIZE):
+        board = cache.get(STUDENTS_CACHE_KEY) or LeaderboardStore.rebuild_students()
+        return [
+            {key: value for key, value in row.items() if key != "id"}
+            for row in board["rows"][:limit]
+        ]
+
+    @staticmethod
+    def get_colleges(limit=LEADERBOARD_SIZE):
+        board = cache.get(COLLEGES_CACHE_KEY) or LeaderboardStore.rebuild_colleges()
+        return [
+            {key: value for key, value in row.items() if key != "id"}
+            for row in board["rows"][:limit]
+        ]
+
+    @staticmethod
+    def refresh_user(user_id, org_ids=None):
+        """
+        Re-ranks a single user and the colleges they belong to.
+
+        Args:
+            user_id (str): Id of the user whose karma or organizations changed.
+            org_ids (list, optional): Extra organizations to re-rank, e.g. the
+                ones the user was just unlinked from.
+        """
+        LeaderboardStore.refresh_students(user_id)
+
+        org_ids = set(org_ids or ()) | set(
+            UserOrganizationLink.objects.filter(
+                user_id=user_id, org__org_type=OrganizationType.COLLEGE.value
+            ).values_list("org_id", flat=True)
+        )
+        LeaderboardStore.refresh_colleges(org_ids)
+
+    @staticmethod
+    def refresh_students(user_id):
+        with _board_lock(STUDENTS_CACHE_KEY) as locked:
+            if not locked:
+                cache.delete(STUDENTS_CACHE_KEY)
+                return
+            if not (board := cache.get(STUDENTS_CACHE_KEY)):
+                return
+
+            rows = [_student_row(user) for user in _students_queryset().filter(id=user_id)]
+            board = _merge(board, "id", rows, {str(user_id)})
+            if board is not None:
+                cache.set(STUDENTS_CACHE_KEY, board, _board_timeout(board))
+                return
+        LeaderboardStore.rebuild_students()
+
+    @staticmethod
+    def refresh_colleges(org_ids):
+        if not org_ids:
+            return
+
+        with _board_lock(COLLEGES_CACHE_KEY) as locked:
+            if not locked:
+                cache.delete(COLLEGES_CACHE_KEY)
+                return
+            if not (board := cache.get(COLLEGES_CACHE_KEY)):
+                return
+
+            rows = [
+                college | {"total_karma": college["total_karma"] or 0}
+                for college in _colleges_queryset().filter(id__in=org_ids)
+            ]
+            board = _merge(board, "id", rows, set(org_ids))
+            if board is not None:
+                cache.set(COLLEGES_CACHE_KEY, board, _board_timeout(board))
+                return
+        LeaderboardStore.rebuild_colleges()
+
+
+def _next_month(month_start):
+    return month_start.replace(
+        year=month_start.year + month_start.month // 12,
+        month=month_start.month % 12 + 1,
+    )
+
+
+class MonthlyKarmaRollup:
+    """
+    Per-user and per-college monthly karma built from karma_activity_log.
+
+    Every run only recomputes the users whose logs changed since the newest
+    `updated_at` already rolled up (the watermark), in every month those
+    logs were created in. Late approvals and edits of a past month's logs
+    are rolled into that month.
+    """
+
+    @staticmethod
+    def year_month(date_time):
+        return date_time.strftime("%Y-%m")
+
+    @classmethod
+    def run(cls):
+        watermark = UserMonthlyKarma.objects.aggregate(Max("updated_at"))["updated_at__max"]
+        logs = KarmaActivityLog.objects.all()
+        if watermark is not None:
+            logs = logs.filter(updated_at__gte=watermark)
+
+        for month in logs.dates("created_at", "month"):
+            cls.rollup_month(
+                datetime(month.year, month.month, 1, tzinfo=pytz.UTC), since=watermark
+            )
+
+    @classmethod
+    def rebuild_month(cls, year_month):
+        cls.rollup_month(
+            datetime.strptime(year_month, "%Y-%m").replace(tzinfo=pytz.UTC)
+        )
+
+    @classmethod
+    def rollup_month(cls, month, since=None):
+        """
+        Recomputes the rollup rows of one month.
+
+        Args:
+            month (datetime): First instant of the month.
+            since (datetime, optional): Only users with logs updated at or after
+                this instant are recomputed. All users are when omitted.
+        """
+        logs = KarmaActivityLog.objects.filter(
+            created_at__gte=month, created_at__lt=_next_month(month)
+        )
+        changed = logs if since is None else logs.filter(updated_at__gte=since)
+        user_ids = list(changed.values_list("user_id", flat=True).distinct())
+
+        for start in range(0, len(user_ids), ROLLUP_CHUNK_SIZE):
+            cls._rollup_users(month, logs, user_ids[start: start + ROLLUP_CHUNK_SIZE])
+
+    @classmethod
+    def _rollup_users(cls, month, logs, user_ids):
+        year_month = cls.year_month(month)
+        totals = (
+            logs.filter(user_id__in=user_ids)
+            .values("user_id")
+            .annotate(
+                karma=Sum("karma", filter=Q(appraiser_approved=True)),
+                last_updated_at=Max("updated_at"),
+            )
+            .order_by()
+        )
+        colleges = dict(
+            UserOrganizationLink.objects.filter(
+                user_id__in=user_ids, org__org_type=OrganizationType.COLLEGE.value
+            ).values_list("user_id", "org_id")
+        )
+        existing = UserMonthlyKarma.objects.filter(year_month=year_month, user_id__in=user_ids)
+
+        with transaction.atomic():
+            org_ids = set(existing.exclude(org=None).values_list("org_id", flat=True))
+            existing.delete()
+            UserMonthlyKarma.objects.bulk_create(
+                [
+                    UserMonthlyKarma(
+                        id=uuid.uuid4(),
+                        year_month=year_month,
+                        user_id=total["user_id"],
+                        org_id=colleges.get(total["user_id"]),
+                        karma=total["karma"] or 0,
+                        updated_at=total["last_updated_at"],
+                    )
+                    for total in totals
+                ]
+            )
+            org_ids.update(colleges.values())
+            cls._rollup_orgs(year_month, org_ids)
+
+    @staticmethod
+    def _rollup_orgs(year_month, org_ids):
+        totals = (
+            UserMonthlyKarma.objects.filter(year_month=year_month, org_id__in=org_ids)
+            .values("org_id")
+            .annotate(
+                total_karma=Sum("karma"),
+                total_students=Count("user_id", filter=Q(karma__gt=0)),
+            )
+            .order_by()
+        )
+        now = DateTimeUtils.get_current_utc_time()
+
+        OrgMonthlyKarma.objects.filter(year_month=year_month, org_id__in=org_ids).delete()
+        OrgMonthlyKarma.objects.bulk_create(
+            [
+                OrgMonthlyKarma(
+                    id=uuid.uuid4(),
+                    year_month=year_month,
+                    org_id=total["org_id"],
+                    karma=total["total_karma"] or 0,
+                    students=total["total_students"],
+                    updated_at=now,
+                )
+                for total in totals
+            ]
+        )
+
+
+class EventLeaderboard:
+    """
+    Running karma totals per user for every event in `utils.types.Events`.
+
+    Totals live in the event_karma table and are recomputed per user whenever
+    their logs on an event task change, either from the `KarmaActivityLog`
+    signal or from the `refresh_event_leaderboards` command, which the worker
+    runs every minute to pick up logs updated since the newest `updated_at`
+    stored for the event, such as the ones the Discord bot writes directly.
+    Deleted logs leave no trace to pick up, so the worker also rebuilds every
+    event hourly.
+    """
+
+    @staticmethod
+    def _logs(event):
+        return KarmaActivityLog.objects.filter(task__event__iexact=event)
+
+    @classmethod
+    def run(cls, event=None, rebuild=False):
+        for event in [event] if event else Events.get_all_values():
+            logs = cls._logs(event)
+            if not rebuild and (
+                watermark := EventKarma.objects.filter(event=event).aggregate(
+                    Max("updated_at")
+                )["updated_at__max"]
+            ):
+                logs = logs.filter(updated_at__gte=watermark)
+
+            user_ids = set(logs.values_list("user_id", flat=True).distinct())
+            if rebuild:
+                # Users whose logs were all deleted only have stale rows left
+                user_ids.update(
+                    EventKarma.objects.filter(event=event)
+                    .values_list("user_id", flat=True)
+                    .distinct()
+                )
+            user_ids = list(user_ids)
+            for start in range(0, len(user_ids), ROLLUP_CHUNK_SIZE):
+                cls.refresh_users(event, user_ids[start: start + ROLLUP_CHUNK_SIZE])
+
+    @classmethod
+    def refresh_users(cls, event, user_ids):
+        approved = Q(appraiser_approved=True)
+        totals = (
+            cls._logs(event)
+            .filter(user_id__in=user_ids)
+            .values("user_id")
+            .annotate(
+                total_karma=Sum("karma", filter=approved),
+                last_activity_at=Max("created_at", filter=approved),
+                last_updated_at=Max("updated_at"),
+            )
+            .order_by()
+        )
+        orgs = dict(
+            UserOrganizationLink.objects.filter(user_id__in=user_ids).values_list(
+                "user_id", "org_id"
+            )
+        )
+
+        with transaction.atomic():
+            EventKarma.objects.filter(event=event, user_id__in=user_ids).delete()
+            EventKarma.objects.bulk_create(
+                [
+                    EventKarma(
+                        id=uuid.uuid4(),
+                        event=event,
+                        user_id=total["user_id"],
+                        org_id=orgs.get(total["user_id"]),
+                        karma=total["total_karma"] or 0,
+                        last_activity_at=total["last_activity_at"],
+                        updated_at=total["last_updated_at"],
+                    )
+                    for total in totals
+                ]
+            )
+
+    @staticmethod
+    def get_queryset(event):
+        """
+        Ranked rows of an event, highest karma first and earliest achiever
+        first on ties.
+        """
+        return EventKarma.objects.filter(event=event, karma__gt=0).order_by(
+            "-karma", "last_activity_at"
+        )
+
+
+class InterestGroupKarma:
+    """
+    Approved karma earned by each user in each interest group, stored in the
+    user_ig_karma table.
+
+    Pairs are recomputed whenever a `KarmaActivityLog` on an IG task is saved
+    and by the `refresh_ig_karma` command, which the worker runs every minute
+    to pick up logs updated since the newest `updated_at` already stored,
+    such as the ones the Discord bot writes directly. Deleted logs leave no
+    trace to pick up, so the worker also rebuilds every user hourly.
+    """
+
+    @staticmethod
+    def get_karma(user_ids, ig_ids=None):
+        """
+        Resolves IG karma for many users, KARMA_LOOKUP_CHUNK_SIZE users per
+        query. Users without any stored row, whose logs were not rolled up
+        yet, are summed from karma_activity_log instead.
+
+        Args:
+            user_ids (list): Users to look up.
+            ig_ids (list, optional): Restrict the lookup to these interest groups.
+
+        Returns:
+            dict: `(user_id, ig_id) -> karma`, pairs without karma are absent.
+        """
+        user_ids = list(user_ids)
+        ig_ids = None if ig_ids is None else set(ig_ids)
+        karma = {}
+        for start in range(0, len(user_ids), KARMA_LOOKUP_CHUNK_SIZE):
+            chunk = user_ids[start: start + KARMA_LOOKUP_CHUNK_SIZE]
+            stored_users = set()
+            for user_id, ig_id, total in UserIgKarma.objects.filter(
+                user_id__in=chunk
+            ).values_list("user_id", "ig_id", "karma"):
+                stored_users.add(user_id)
+                if ig_ids is None or ig_id in ig_ids:
+                    karma[(user_id, ig_id)] = total
+
+            if missing := [user_id for user_id in chunk if user_id not in stored_users]:
+                logs = KarmaActivityLog.objects.filter(
+                    user_id__in=missing, appraiser_approved=True
+                ).exclude(task__ig=None)
+                if ig_ids is not None:
+                    logs = logs.filter(task__ig_id__in=ig_ids)
+                for total in (
+                    logs.values("user_id", "task__ig_id").annotate(karma=Sum("karma")).order_by()
+                ):
+                    karma[(total["user_id"], total["task__ig_id"])] = total["karma"]
+
+        return karma
+
+    @classmethod
+    def run(cls, rebuild=False):
+        logs = KarmaActivityLog.objects.exclude(task__ig=None)
+        if not rebuild and (
+            watermark := UserIgKarma.objects.aggregate(Max("updated_at"))["updated_at__max"]
+        ):
+            logs = logs.filter(updated_at__gte=watermark)
+
+        user_ids = set(logs.values_list("user_id", flat=True).distinct())
+        if rebuild:
+            # Users whose logs were all deleted only have stale rows left
+            user_ids.update(UserIgKarma.objects.values_list("user_id", flat=True).distinct())
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), ROLLUP_CHUNK_SIZE):
+            cls.refresh_users(user_ids[start: start + ROLLUP_CHUNK_SIZE], cascade=False)
+
+        if user_ids:
+            LearningCircleKarma.rebuild()
+
+    @staticmethod
+    def refresh_users(user_ids, ig_ids=None, cascade=True):
+        """
+        Recomputes the IG karma of the given users.
+
+        Args:
+            user_ids (list): Users whose karma logs changed.
+            ig_ids (list, optional): Only recompute these interest groups.
+            cascade (bool): Also re-rank the learning circles of the users.
+        """
+        logs = KarmaActivityLog.objects.filter(user_id__in=user_ids).exclude(task__ig=None)
+        rows = UserIgKarma.objects.filter(user_id__in=user_ids)
+        if ig_ids is not None:
+            logs = logs.filter(task__ig_id__in=ig_ids)
+            rows = rows.filter(ig_id__in=ig_ids)
+
+        totals = (
+            logs.values("user_id", "task__ig_id")
+            .annotate(
+                total_karma=Sum("karma", filter=Q(appraiser_approved=True)),
+                last_updated_at=Max("updated_at"),
+            )
+            .order_by()
+        )
+
+        with transaction.atomic():
+            rows.delete()
+            UserIgKarma.objects.bulk_create(
+                [
+                    UserIgKarma(
+                        id=uuid.uuid4(),
+                        user_id=total["user_id"],
+                        ig_id=total["task__ig_id"],
+                        karma=total["total_karma"] or 0,
+                        updated_at=total["last_updated_at"],
+                    )
+                    for total in totals
+                ]
+            )
+
+        if cascade:
+            circles = UserCircleLink.objects.filter(user_id__in=user_ids, accepted=True)
+            if ig_ids is not None:
+                circles = circles.filter(circle__ig_id__in=ig_ids)
+            LearningCircleKarma.refresh_circles(circles.values_list("circle_id", flat=True))
+
+
+class LearningCircleKarma:
+    """
+    Total karma and per-IG rank of every learning circle, stored in the
+    circle_karma table.
+
+    A circle's karma is the IG karma of its accepted members, so it is derived
+    from `InterestGroupKarma` and refreshed whenever a member's IG karma or the
+    circle's membership changes.
+    """
+
+    @staticmethod
+    def get(circle):
+        """
+        Returns the karma and rank of a circle, ranking a circle that is not
+        in the table yet as one without karma.
+        """
+        if circle_karma := CircleKarma.objects.filter(circle=circle).first():
+            return circle_karma.karma, circle_karma.rank
+
+        rank = CircleKarma.objects.filter(ig_id=circle.ig_id, karma__gt=0).count() + 1
+        return 0, rank
+
+    @staticmethod
+    def _totals(circle_ids=None):
+        links = UserCircleLink.objects.filter(accepted=True).exclude(circle__ig=None)
+        if circle_ids is not None:
+            links = links.filter(circle_id__in=circle_ids)
+
+        members = list(links.values_list("circle_id", "circle__ig_id", "user_id"))
+        ig_karma = {}
+        for start in range(0, len(members), ROLLUP_CHUNK_SIZE):
+            chunk = members[start: start + ROLLUP_CHUNK_SIZE]
+            ig_karma |= InterestGroupKarma.get_karma([user_id for _, _, user_id in chunk])
+
+        totals = {}
+        for circle_id, ig_id, user_id in members:
+            total = totals.setdefault(circle_id, {"ig_id": ig_id, "karma": 0})
+            total["karma"] += ig_karma.get((user_id, ig_id), 0)
+        return totals
+
+    @classmethod
+    def rebuild(cls):
+        by_ig = {}
+        for circle_id, total in cls._totals().items():
+            by_ig.setdefault(total["ig_id"], []).append((total["karma"], circle_id))
+
+        now = DateTimeUtils.get_current_utc_time()
+        rows = []
+        for ig_id, circles in by_ig.items():
+            circles.sort(reverse=True)
+            ranks = competition_ranks(karma for karma, _ in circles)
+            rows.extend(
+                CircleKarma(
+                    id=uuid.uuid4(),
+                    circle_id=circle_id,
+                    ig_id=ig_id,
+                    karma=karma,
+                    rank=rank,
+                    updated_at=now,
+                )
+                for (karma, circle_id), rank in zip(circles, ranks)
+            )
+
+        with transaction.atomic():
+            CircleKarma.objects.all().delete()
+            CircleKarma.objects.bulk_create(rows, batch_size=1000)
+
+    @classmethod
+    def refresh_circles(cls, circle_ids):
+        circle_ids = set(circle_ids)
+        if not circle_ids:
+            return
+
+        totals = cls._totals(circle_ids)
+        igs = dict(
+            LearningCircle.objects.filter(id__in=circle_ids).values_list("id", "ig_id")
+        )
+        for circle_id in circle_ids:
+            total = totals.get(circle_id)
+            cls._apply(circle_id, igs.get(circle_id), total["karma"] if total else 0)
+
+    @staticmethod
+    def _apply(circle_id, ig_id, karma):
+        with transaction.atomic():
+            row = CircleKarma.objects.select_for_update().filter(circle_id=circle_id).first()
+            if row and row.ig_id != ig_id:
+                peers = CircleKarma.objects.filter(ig_id=row.ig_id).exclude(id=row.id)
+                shift_ranks(peers, row.karma, None)
+                row.delete()
+                row = None
+
+            if ig_id is None:
+                return
+
+            peers = CircleKarma.objects.filter(ig_id=ig_id).exclude(circle_id=circle_id)
+            rank = shift_ranks(peers, row.karma if row else None, karma)
+
+            row = row or CircleKarma(id=uuid.uuid4(), circle_id=circle_id, ig_id=ig_id)
+            row.karma = karma
+            row.rank = rank
+            row.updated_at = DateTimeUtils.get_current_utc_time()
+            row.save()
+
+    @staticmethod
+    def remove(circle_id):
+        with transaction.atomic():
+            row = CircleKarma.objects.select_for_update().filter(circle_id=circle_id).first()
+            if row:
+                peers = CircleKarma.objects.filter(ig_id=row.ig_id).exclude(id=row.id)
+                shift_ranks(peers, row.karma, None)
+                row.delete()
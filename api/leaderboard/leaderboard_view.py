@@ -1,43 +1,23 @@
-from django.db.models import Sum, F, Value, Count, Q, Prefetch
-from django.db.models.functions import Concat, Coalesce
+from django.db.models import F, Value
+from django.db.models.functions import Concat
 from rest_framework.views import APIView
-from . import serializers
 
-from db.organization import Organization, UserOrganizationLink
-from db.user import User
+from db.task import OrgMonthlyKarma, UserMonthlyKarma
 from utils.response import CustomResponse
-from utils.types import OrganizationType, RoleType
-from utils.utils import DateTimeUtils
+from utils.types import Events, OrganizationType, RoleType
+from utils.utils import CommonUtils, DateTimeUtils
+from .leaderboard_helper import (
+    LEADERBOARD_SIZE,
+    EventLeaderboard,
+    LeaderboardStore,
+    MonthlyKarmaRollup,
+)
 
 
 class StudentsLeaderboard(APIView):
     def get(self, request):
-        students_leaderboard = (
-            User.objects.filter(
-                user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                user_role_link_user__role__title=RoleType.STUDENT.value,
-                exist_in_guild=True,
-                active=True,
-            )
-            .distinct()
-            .select_related("wallet_user")
-            .prefetch_related(
-                Prefetch(
-                    "user_organization_link_user",
-                    queryset=UserOrganizationLink.objects.filter(
-                        org__org_type=OrganizationType.COLLEGE.value
-                    ).select_related("org"),
-                    to_attr="colleges"
-                )
-            )
-            .order_by("-wallet_user__karma")[:20]
-        )
-        serialized_students_leaderboard = serializers.StudentLeaderboardSerializer(
-            students_leaderboard, many=True
-        )
-
         return CustomResponse(
-            response=serialized_students_leaderboard.data
+            response=LeaderboardStore.get_students()
         ).get_success_response()
 
 
@@ -45,34 +25,20 @@ class StudentsMonthlyLeaderboard(APIView):
     def get(self, request):
         start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
         student_monthly_leaderboard = (
-            User.objects.filter(
-                user_role_link_user__role__title=RoleType.STUDENT.value,
-                user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                exist_in_guild=True,
-                active=True,
-            )
-            .annotate(
-                full_name=Concat(F("first_name"), Value(" "), F("last_name")),
-                institution=F("user_organization_link_user__org__title"),
-                total_karma=Coalesce(
-                    Sum(
-                        "karma_activity_log_user__karma",
-                        filter=Q(
-                            karma_activity_log_user__created_at__range=(
-                                start_date,
-                                end_date,
-                            )
-                        ),
-                    ),
-                    Value(0),
-                ),
+            UserMonthlyKarma.objects.filter(
+                year_month=MonthlyKarmaRollup.year_month(start_date),
+                user__user_role_link_user__role__title=RoleType.STUDENT.value,
+                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+                user__exist_in_guild=True,
+                user__active=True,
             )
             .values(
-                "full_name",
-                "total_karma",
-                "institution",
+                full_name=Concat(F("user__first_name"), Value(" "), F("user__last_name")),
+                total_karma=F("karma"),
+                institution=F("org__title"),
             )
-            .order_by("-total_karma")
+            .distinct()
+            .order_by("-karma")[:LEADERBOARD_SIZE]
         )
 
         return CustomResponse(
@@ -82,57 +48,60 @@ class StudentsMonthlyLeaderboard(APIView):
 
 class CollegeLeaderboard(APIView):
     def get(self, request):
-        college_leaderboard = (
-            Organization.objects.filter(
-                org_type=OrganizationType.COLLEGE.value,
-                user_organization_link_org__user__user_role_link_user__role__title=RoleType.STUDENT.value,
-                user_organization_link_org__user__active=True,
-                user_organization_link_org__user__exist_in_guild=True,
-            )
-            .distinct()
-            .annotate(
-                total_students=Count("user_organization_link_org__user"),
-                total_karma=Sum("user_organization_link_org__user__wallet_user__karma"),
-            )
-            .values("code", "title", "total_students", "total_karma")
-            .order_by("-total_karma")[:20]
-        )
-
-        return CustomResponse(response=college_leaderboard).get_success_response()
+        return CustomResponse(
+            response=LeaderboardStore.get_colleges()
+        ).get_success_response()
 
 
 class CollegeMonthlyLeaderboard(APIView):
     def get(self, request):
         start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
         college_monthly_leaderboard = (
-            Organization.objects.filter(
-                org_type=OrganizationType.COLLEGE.value,
-                user_organization_link_org__user__karma_activity_log_user__created_at__range=(
-                    start_date,
-                    end_date,
-                ),
-                user_organization_link_org__user__karma_activity_log_user__appraiser_approved=True,
+            OrgMonthlyKarma.objects.filter(
+                year_month=MonthlyKarmaRollup.year_month(start_date),
+                org__org_type=OrganizationType.COLLEGE.value,
             )
-            .annotate(
-                total_karma=Coalesce(
-                    Sum(
-                        "user_organization_link_org__user__karma_activity_log_user__karma",
-                        filter=Q(
-                            user_organization_link_org__user__karma_activity_log_user__created_at__range=(
-                                start_date,
-                                end_date,
-                            )
-                        ),
-                    ),
-                    Value(0),
-                ),
-                students=Count("user_organization_link_org__user", distinct=True),
-                institution=F("title"),
+            .values(
+                "students",
+                code=F("org__code"),
+                total_karma=F("karma"),
             )
-            .values("code", "total_karma", "students")
-            .order_by("-total_karma")[:20]
+            .order_by("-karma")[:LEADERBOARD_SIZE]
         )
 
         return CustomResponse(
             response=college_monthly_leaderboard
         ).get_success_response()
+
+
+class EventLeaderboardAPI(APIView):
+    def get(self, request, event):
+        if event not in Events.get_all_values():
+            return CustomResponse(
+                general_message="Invalid event"
+            ).get_failure_response()
+
+        paginated_queryset = CommonUtils.get_paginated_queryset(
+            EventLeaderboard.get_queryset(event).values(
+                "karma",
+                "last_activity_at",
+                first_name=F("user__first_name"),
+                last_name=F("user__last_name"),
+                muid=F("user__muid"),
+                profile_pic=F("user__profile_pic"),
+                org_title=F("org__title"),
+                district_name=F("org__district__name"),
+                state_name=F("org__district__zone__state__name"),
+            ),
+            request,
+            [],
+        )
+        page = paginated_queryset.get("queryset")
+        data = [
+            {"rank": rank, **row}
+            for rank, row in enumerate(page, start=page.start_index())
+        ]
+
+        return CustomResponse().paginated_response(
+            data=data, pagination=paginated_queryset.get("pagination")
+        )
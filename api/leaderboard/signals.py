@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from db.learning_circle import LearningCircle, UserCircleLink
+from db.organization import UserOrganizationLink
+from db.task import KarmaActivityLog, TaskList, Wallet
+from db.user import User, UserRoleLink
+from utils.types import Events
+from .leaderboard_helper import (
+    EventLeaderboard,
+    InterestGroupKarma,
+    LearningCircleKarma,
+    organization_links_changed,
+    user_karma_changed,
+    user_standing_changed,
+)
+
+
+@receiver(pre_save, sender=Wallet)
+def wallet_saving(sender, instance, **kwargs):
+    instance._saved_karma = 0
+    if not instance._state.adding:
+        instance._saved_karma = (
+            Wallet.objects.filter(pk=instance.pk).values_list("karma", flat=True).first() or 0
+        )
+
+
+@receiver(post_save, sender=Wallet)
+def wallet_saved(sender, instance, **kwargs):
+    user_karma_changed(instance.user_id, instance.karma - getattr(instance, "_saved_karma", 0))
+
+
+@receiver(post_delete, sender=Wallet)
+def wallet_deleted(sender, instance, **kwargs):
+    user_karma_changed(instance.user_id, -instance.karma)
+
+
+@receiver(pre_save, sender=UserOrganizationLink)
+def organization_link_saving(sender, instance, **kwargs):
+    instance._saved_org_id = None
+    if not instance._state.adding:
+        instance._saved_org_id = (
+            UserOrganizationLink.objects.filter(pk=instance.pk)
+            .values_list("org_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=UserOrganizationLink)
+def organization_link_saved(sender, instance, **kwargs):
+    saved_org_id = getattr(instance, "_saved_org_id", None)
+    if saved_org_id != instance.org_id:
+        organization_links_changed(
+            instance.user_id,
+            linked_org_ids=[instance.org_id],
+            unlinked_org_ids=[saved_org_id] if saved_org_id else [],
+        )
+
+
+@receiver(post_delete, sender=UserOrganizationLink)
+def organization_link_deleted(sender, instance, **kwargs):
+    organization_links_changed(instance.user_id, unlinked_org_ids=[instance.org_id])
+
+
+# Fields of a user that decide whether they are listed on the boards
+LISTED_FIELDS = ("active", "exist_in_guild")
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    instance._saved_listed = None
+    if instance._state.adding or (update_fields and not set(LISTED_FIELDS) & set(update_fields)):
+        return
+    instance._saved_listed = (
+        User.objects.filter(pk=instance.pk).values_list(*LISTED_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    saved_listed = getattr(instance, "_saved_listed", None)
+    listed = tuple(getattr(instance, field) for field in LISTED_FIELDS)
+    if saved_listed is not None and saved_listed != listed:
+        user_standing_changed(instance.id)
+
+
+@receiver([post_save, post_delete], sender=UserRoleLink)
+def role_link_changed(sender, instance, **kwargs):
+    user_standing_changed(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=UserCircleLink)
+def circle_link_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: LearningCircleKarma.refresh_circles([instance.circle_id]))
+
+
+@receiver(post_save, sender=LearningCircle)
+def learning_circle_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: LearningCircleKarma.refresh_circles([instance.id]))
+
+
+@receiver(pre_delete, sender=LearningCircle)
+def learning_circle_deleted(sender, instance, **kwargs):
+    LearningCircleKarma.remove(instance.id)
+
+
+# Fields of a karma log the IG and event leaderboards are computed from
+LEADERBOARD_FIELDS = {"karma", "task", "task_id", "user", "user_id", "appraiser_approved", "created_at"}
+
+
+@receiver([post_save, post_delete], sender=KarmaActivityLog)
+def karma_activity_log_changed(sender, instance, update_fields=None, **kwargs):
+    if not instance.user_id:
+        return
+    if update_fields and not LEADERBOARD_FIELDS.intersection(update_fields):
+        return
+
+    if KarmaActivityLog.task.is_cached(instance):
+        task = {"event": instance.task.event, "ig_id": instance.task.ig_id}
+    else:
+        task = TaskList.objects.filter(id=instance.task_id).values("event", "ig_id").first()
+    if not task:
+        return
+
+    if task["ig_id"]:
+        transaction.on_commit(
+            lambda: InterestGroupKarma.refresh_users([instance.user_id], [task["ig_id"]])
+        )
+
+    if task["event"]:
+        for event in Events.get_all_values():
+            if event.lower() == task["event"].lower():
+                transaction.on_commit(
+                    lambda event=event: EventLeaderboard.refresh_users(event, [instance.user_id])
+                )
+                break
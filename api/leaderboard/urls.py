@@ -6,5 +6,6 @@ urlpatterns = [
     path('students/', leaderboard_view.StudentsLeaderboard.as_view()),
     path('students-monthly/', leaderboard_view.StudentsMonthlyLeaderboard.as_view()),
     path('college/', leaderboard_view.CollegeLeaderboard.as_view()),
-    path('college-monthly/', leaderboard_view.CollegeMonthlyLeaderboard.as_view())
+    path('college-monthly/', leaderboard_view.CollegeMonthlyLeaderboard.as_view()),
+    path('event/<str:event>/', leaderboard_view.EventLeaderboardAPI.as_view()),
 ]
@@ -0,0 +1,100 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from db.user import User
+from utils.synthetic_data import (
+    BATCH_SIZE,
+    DERIVED_TABLE_COMMANDS,
+    REFERENCE_COUNTS,
+    USER_PROPORTIONS,
+    SyntheticDataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the tables of the unmanaged models and fills them with a "
+        "reproducible synthetic dataset for local benchmarks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--proportion",
+            action="append",
+            default=[],
+            metavar="MODEL=ROWS",
+            help=(
+                "Rows per user of a model, e.g. KarmaActivityLog=20. Can be "
+                "repeated. Reference tables given here also scale with users"
+            ),
+        )
+        parser.add_argument(
+            "--reference-scale",
+            type=float,
+            default=1,
+            help="Multiplier of the rows of reference tables such as organisations and tasks",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--skip-derived",
+            action="store_true",
+            help="Do not rebuild the leaderboards, rollups and search index afterwards",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        connection = connections[using]
+        if connection.vendor not in ("sqlite", "mysql"):
+            raise CommandError("The dataset can only be loaded into SQLite or MySQL")
+
+        proportions = {}
+        for item in options["proportion"]:
+            name, _, rows = item.partition("=")
+            if name not in USER_PROPORTIONS and name not in REFERENCE_COUNTS:
+                raise CommandError(f"Unknown model {name}")
+            try:
+                proportions[name] = float(rows)
+            except ValueError as e:
+                raise CommandError(f"Invalid proportion {item}") from e
+
+        # Checked before any table is created, so a used database is left untouched
+        has_user_table = User._meta.db_table in connection.introspection.table_names()
+        if has_user_table and User.objects.using(using).exists():
+            raise CommandError("The user table already has rows, load the dataset into an empty database")
+        created = SyntheticDataset.create_schema(using)
+        self.stdout.write(f"Created {len(created)} tables")
+
+        dataset = SyntheticDataset(
+            options["users"],
+            seed=options["seed"],
+            proportions=proportions,
+            reference_scale=options["reference_scale"],
+            batch_size=options["batch_size"],
+            using=using,
+        )
+
+        started = time.monotonic()
+
+        def progress(table, rows):
+            self.stdout.write(f"\r{table}: {rows}", ending="")
+            self.stdout.flush()
+
+        with SyntheticDataset.bulk_load(using):
+            counts = dataset.generate(progress)
+        self.stdout.write("")
+        for table, rows in counts.items():
+            self.stdout.write(f"{table:40} {rows:>12}")
+        self.stdout.write(f"Inserted {sum(counts.values())} rows in {time.monotonic() - started:.0f}s")
+
+        # The rebuild commands only read the default database
+        if not options["skip_derived"] and using == "default":
+            for command in DERIVED_TABLE_COMMANDS:
+                call_command(*command, stdout=self.stdout, stderr=self.stderr)
+
+        self.stdout.write(self.style.SUCCESS("Synthetic dataset generated"))
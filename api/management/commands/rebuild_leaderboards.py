@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.leaderboard.karma_aggregate_helper import KarmaAggregates
+from api.leaderboard.leaderboard_helper import LeaderboardStore
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the cached student and college leaderboards, when the cache is "
+        "shared, and the organization, district, zone and state karma aggregates"
+    )
+
+    def handle(self, *args, **options):
+        # A per-process cache would only keep the boards for this command
+        if settings.CACHE_IS_SHARED:
+            LeaderboardStore.rebuild()
+        KarmaAggregates.rebuild()
+        self.stdout.write(self.style.SUCCESS("Leaderboards rebuilt"))
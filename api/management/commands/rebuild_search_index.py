@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.search import SearchIndex
+
+
+class Command(BaseCommand):
+    help = "Re-indexes every row of the models searched through the search backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tables",
+            nargs="*",
+            help="Tables to rebuild, all indexed tables by default",
+        )
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Only re-index the documents whose related rows were queued as changed",
+        )
+
+    def handle(self, *args, **options):
+        if not SearchIndex.is_enabled():
+            raise CommandError("SEARCH_BACKEND is not set")
+
+        if options["pending"]:
+            while count := SearchIndex.reindex_queued():
+                self.stdout.write(f"Re-indexed the dependents of {count} changed rows")
+            return
+
+        for model in SearchIndex.get_models():
+            table = model._meta.db_table
+            if options["tables"] and table not in options["tables"]:
+                continue
+
+            count = SearchIndex.rebuild(model)
+            self.stdout.write(self.style.SUCCESS(f"Indexed {count} rows of {table}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.leaderboard.leaderboard_helper import EventLeaderboard
+from utils.types import Events
+
+
+class Command(BaseCommand):
+    help = "Brings the event leaderboards up to date with karma_activity_log"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", choices=Events.get_all_values())
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute every user of the event instead of only changed ones",
+        )
+
+    def handle(self, *args, **options):
+        EventLeaderboard.run(event=options["event"], rebuild=options["rebuild"])
+        self.stdout.write(self.style.SUCCESS("Event leaderboards refreshed"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.leaderboard.leaderboard_helper import InterestGroupKarma
+
+
+class Command(BaseCommand):
+    help = (
+        "Brings the per-user interest group karma and the learning circle ranks "
+        "up to date with karma_activity_log"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute every user instead of only users with changed logs",
+        )
+
+    def handle(self, *args, **options):
+        InterestGroupKarma.run(rebuild=options["rebuild"])
+        self.stdout.write(self.style.SUCCESS("Interest group and learning circle karma refreshed"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.leaderboard.leaderboard_helper import MonthlyKarmaRollup
+
+
+class Command(BaseCommand):
+    help = "Rolls karma_activity_log up into per-user and per-college monthly karma"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            help="Rebuild the snapshot of a single month (YYYY-MM) from scratch",
+        )
+
+    def handle(self, *args, **options):
+        if month := options["month"]:
+            MonthlyKarmaRollup.rebuild_month(month)
+        else:
+            MonthlyKarmaRollup.run()
+        self.stdout.write(self.style.SUCCESS("Monthly karma rolled up"))
@@ -0,0 +1,117 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from db.integrations import Integration
+from db.learning_circle import UserCircleLink
+from db.organization import Organization
+from db.user import Role, User
+from utils.benchmark import SCENARIOS, EndpointBenchmark, compare_runs, get_peak_rss, get_user_token
+from utils.types import IntegrationType, OrganizationType, RoleType
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the main endpoints on the current database, reporting latency "
+        "percentiles, throughput, queries and memory per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--muid",
+            default="user0@mulearn",
+            help="User the requests are made as, by default the subject of generate_synthetic_data",
+        )
+        parser.add_argument(
+            "--only", action="append", default=[], metavar="SCENARIO", help="Run only these scenarios"
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            metavar="PERCENT",
+            help="Fail when a p95 latency or query count is this much worse than the baseline",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options["only"] or scenario.name in options["only"]
+        ]
+        if unknown := set(options["only"]) - {scenario.name for scenario in SCENARIOS}:
+            raise CommandError(f"Unknown scenarios {', '.join(sorted(unknown))}")
+
+        benchmark = EndpointBenchmark(
+            self.get_context(options["muid"]),
+            requests=options["requests"],
+            concurrency=options["concurrency"],
+            warmup=options["warmup"],
+        )
+        results = {}
+        for scenario in scenarios:
+            result = results[scenario.name] = benchmark.run(scenario)
+            latency = result["latency"]
+            self.stdout.write(
+                f"{scenario.name:30} p50 {latency['p50'] * 1000:8.1f}ms  p95 {latency['p95'] * 1000:8.1f}ms  "
+                f"p99 {latency['p99'] * 1000:8.1f}ms  {result['throughput']:7.1f} req/s  "
+                f"{result['queries']['mean']:6.1f} queries  {result['allocations']['peak_bytes'] / 2 ** 20:7.1f} MiB  "
+                f"{json.dumps(result['statuses'])}"
+            )
+
+        run = {
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "peak_rss_bytes": get_peak_rss(),
+            "scenarios": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(run, file, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+            self.report_changes(compare_runs(baseline, run), options["max_regression"])
+
+    def report_changes(self, changes, max_regression) -> None:
+        regressions = []
+        self.stdout.write("\nChange from the baseline, positive is worse")
+        for name, figures in changes.items():
+            cells = "  ".join(
+                f"{figure} {'-' if change is None else f'{change * 100:+.1f}%':>8}"
+                for figure, change in figures.items()
+            )
+            worst = max(
+                (change for figure, change in figures.items() if figure in ("p95", "queries") and change is not None),
+                default=0,
+            )
+            if max_regression is not None and worst * 100 > max_regression:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{name:30} {cells}"))
+            else:
+                self.stdout.write(f"{name:30} {cells}")
+
+        if regressions:
+            raise CommandError(f"Regressed beyond {max_regression}%: {', '.join(regressions)}")
+
+    @staticmethod
+    def get_context(muid: str) -> dict:
+        user = User.objects.filter(muid=muid).first()
+        if user is None:
+            raise CommandError(f"No user {muid}, generate a dataset or pass --muid")
+
+        circle = UserCircleLink.objects.filter(user=user).values_list("circle_id", flat=True).first()
+        kkem = Integration.objects.filter(name=IntegrationType.KKEM.value).first()
+        return {
+            "user_token": get_user_token(user),
+            "kkem_token": kkem.token if kkem else "",
+            "circle": circle or "",
+            "student_role": Role.objects.filter(title=RoleType.STUDENT.value).values_list("id", flat=True).first(),
+            "college": Organization.objects.filter(
+                org_type=OrganizationType.COLLEGE.value
+            ).values_list("id", flat=True).first(),
+        }
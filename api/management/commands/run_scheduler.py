@@ -0,0 +1,47 @@
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the commands in SCHEDULED_COMMANDS periodically, each in its own thread, "
+        "for the worker service"
+    )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # Jobs of the same command take turns, they would write the same rows
+        locks = defaultdict(threading.Lock)
+        threads = [
+            threading.Thread(
+                target=self.run_periodically, args=(job, locks[job[0]], stop), name=job[0]
+            )
+            for job in settings.SCHEDULED_COMMANDS
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
+
+    def run_periodically(self, job, lock: threading.Lock, stop: threading.Event) -> None:
+        name, interval, command_options = job
+        while not stop.is_set():
+            with lock:
+                try:
+                    call_command(name, stdout=self.stdout, **command_options)
+                except Exception:
+                    logger.exception("Scheduled command %s failed", name)
+                finally:
+                    connection.close()
+            stop.wait(interval)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.utils import MailOutbox
+
+
+class Command(BaseCommand):
+    help = "Delivers the mail queued in email_outbox, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the due mail once and exit instead of polling",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls when the outbox is empty",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = MailOutbox.deliver_due(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            elif options["once"]:
+                break
+            else:
+                time.sleep(options["interval"])
@@ -0,0 +1,22 @@
+from decouple import config
+from django.http import HttpResponse
+from rest_framework.views import APIView
+
+from utils.metrics import RequestMetrics
+from utils.response import CustomResponse
+
+
+class RequestMetricsAPI(APIView):
+
+    def get(self, request):
+        protection_key = request.headers.get("protectionKey")
+        if not protection_key or not protection_key == config('PROTECTED_API_KEY'):
+            return CustomResponse(general_message="Invalid Key").get_failure_response()
+
+        if request.query_params.get("format") == "json":
+            return CustomResponse(response=RequestMetrics.as_dict()).get_success_response()
+
+        return HttpResponse(
+            RequestMetrics.as_prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from api.protected.metrics import metrics_views
+
+urlpatterns = [
+    path('', metrics_views.RequestMetricsAPI.as_view()),
+]
@@ -2,4 +2,5 @@ from django.urls import path, include
 
 urlpatterns = [
     path('organisation/', include('api.protected.organisation.urls')),
+    path('metrics/', include('api.protected.metrics.urls')),
 ]
@@ -7,6 +7,7 @@ from rest_framework.views import APIView
 from db.organization import Country, Department, District, Organization, State, Zone
 from db.task import InterestGroup
 from db.user import Role, User
+from utils.reference_data import ReferenceData
 from utils.response import CustomResponse
 from utils.types import OrganizationType
 from utils.utils import send_template_mail
@@ -27,35 +28,49 @@ class UserRegisterValidateAPI(APIView):
 
 
 class RoleAPI(APIView):
+    @staticmethod
+    def get_roles():
+        return {"roles": list(Role.objects.all().values("id", "title"))}
+
     def get(self, request):
-        roles = Role.objects.all().values("id", "title")
-        return CustomResponse(response={"roles": roles}).get_success_response()
+        return ReferenceData.get_response(request, "roles", [Role], self.get_roles)
 
 
 class CollegesAPI(APIView):
-    def get(self, request):
+    @staticmethod
+    def get_colleges():
         colleges = Organization.objects.filter(
             org_type=OrganizationType.COLLEGE.value
         ).values("id", "title")
 
-        return CustomResponse(response={"colleges": colleges}).get_success_response()
+        return {"colleges": list(colleges)}
+
+    def get(self, request):
+        return ReferenceData.get_response(
+            request, "colleges", [Organization], self.get_colleges
+        )
 
 
 class DepartmentAPI(APIView):
-    def get(self, request):
+    @staticmethod
+    def get_departments():
         department_serializer = Department.objects.all().values("id", "title")
 
         department_serializer_data = serializers.BaseSerializer(
             department_serializer, many=True
         ).data
 
-        return CustomResponse(
-            response={"departments": department_serializer_data}
-        ).get_success_response()
+        return {"departments": department_serializer_data}
+
+    def get(self, request):
+        return ReferenceData.get_response(
+            request, "departments", [Department], self.get_departments
+        )
 
 
 class CompanyAPI(APIView):
-    def get(self, request):
+    @staticmethod
+    def get_companies():
         company_queryset = Organization.objects.filter(
             org_type=OrganizationType.COMPANY.value
         ).values("id", "title")
@@ -64,9 +79,12 @@ class CompanyAPI(APIView):
             company_queryset, many=True
         ).data
 
-        return CustomResponse(
-            response={"companies": company_serializer_data}
-        ).get_success_response()
+        return {"companies": company_serializer_data}
+
+    def get(self, request):
+        return ReferenceData.get_response(
+            request, "companies", [Organization], self.get_companies
+        )
 
 
 class LearningCircleUserViewAPI(APIView):
@@ -125,48 +143,65 @@ class RegisterDataAPI(APIView):
 
 
 class CountryAPI(APIView):
-    def get(self, request):
+    @staticmethod
+    def get_countries():
         countries = Country.objects.all()
 
         serializer = serializers.CountrySerializer(countries, many=True)
 
-        return CustomResponse(
-            response={
-                "countries": serializer.data,
-            }
-        ).get_success_response()
+        return {
+            "countries": serializer.data,
+        }
+
+    def get(self, request):
+        return ReferenceData.get_response(
+            request, "countries", [Country], self.get_countries
+        )
 
 
 class StateAPI(APIView):
-    def post(self, request):
-        state = State.objects.filter(country_id=request.data.get("country"))
+    @staticmethod
+    def get_states(country_id):
+        state = State.objects.filter(country_id=country_id)
         serializer = serializers.StateSerializer(state, many=True)
 
-        return CustomResponse(
-            response={
-                "states": serializer.data,
-            }
-        ).get_success_response()
+        return {
+            "states": serializer.data,
+        }
+
+    def post(self, request):
+        return ReferenceData.get_response(
+            request, "states", [State], self.get_states, request.data.get("country")
+        )
 
 
 class DistrictAPI(APIView):
-    def post(self, request):
-        district = District.objects.filter(zone__state_id=request.data.get("state"))
+    @staticmethod
+    def get_districts(state_id):
+        district = District.objects.filter(zone__state_id=state_id)
 
         serializer = serializers.DistrictSerializer(district, many=True)
 
-        return CustomResponse(
-            response={
-                "districts": serializer.data,
-            }
-        ).get_success_response()
+        return {
+            "districts": serializer.data,
+        }
+
+    def post(self, request):
+        return ReferenceData.get_response(
+            request,
+            "districts",
+            [District, Zone],
+            self.get_districts,
+            request.data.get("state"),
+        )
 
 
 class CollegeAPI(APIView):
-    def post(self, request):
+    @staticmethod
+    def get_colleges(district_id):
         org_queryset = Organization.objects.filter(
             Q(org_type=OrganizationType.COLLEGE.value),
-            Q(district_id=request.data.get("district")),
+            Q(district_id=district_id),
         )
         department_queryset = Department.objects.all()
 
@@ -178,16 +213,24 @@ class CollegeAPI(APIView):
             department_queryset, many=True
         ).data
 
-        return CustomResponse(
-            response={
-                "colleges": college_serializer_data,
-                "departments": department_serializer_data,
-            }
-        ).get_success_response()
+        return {
+            "colleges": college_serializer_data,
+            "departments": department_serializer_data,
+        }
+
+    def post(self, request):
+        return ReferenceData.get_response(
+            request,
+            "district_colleges",
+            [Organization, Department],
+            self.get_colleges,
+            request.data.get("district"),
+        )
 
 
 class CommunityAPI(APIView):
-    def get(self, request):
+    @staticmethod
+    def get_communities():
         community_queryset = Organization.objects.filter(
             org_type=OrganizationType.COMMUNITY.value
         )
@@ -196,9 +239,12 @@ class CommunityAPI(APIView):
             community_queryset, many=True
         ).data
 
-        return CustomResponse(
-            response={"communities": community_serializer_data}
-        ).get_success_response()
+        return {"communities": community_serializer_data}
+
+    def get(self, request):
+        return ReferenceData.get_response(
+            request, "communities", [Organization], self.get_communities
+        )
 
 
 class AreaOfInterestAPI(APIView):
@@ -2,8 +2,10 @@ from django.contrib.auth.hashers import make_password
 from django.db import transaction
 from rest_framework import serializers
 
+from api.integrations.integrations_helper import IntegrationRegistry
 from api.integrations.kkem.kkem_helper import decrypt_kkem_data, send_data_to_kkem
-from db.integrations import Integration, IntegrationAuthorization
+from api.leaderboard.leaderboard_helper import organization_links_changed
+from db.integrations import IntegrationAuthorization
 from db.organization import (
     Country,
     Department,
@@ -125,6 +127,10 @@ class UserOrgLinkSerializer(serializers.ModelSerializer):
                 for org in validated_data["organizations"]
             }
         )
+        organization_links_changed(
+            validated_data["user"].id,
+            linked_org_ids=[org.id for org in validated_data["organizations"]],
+        )
 
     class Meta:
         model = UserOrganizationLink
@@ -207,7 +213,7 @@ class IntegrationSerializer(serializers.Serializer):
 
     def validate_title(self, integration):
         try:
-            return Integration.objects.get(name=integration)
+            return IntegrationRegistry.get(integration)
         except Exception as e:
             raise serializers.ValidationError(str(e)) from e
 
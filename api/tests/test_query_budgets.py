@@ -0,0 +1,130 @@
+import io
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from db.user import User
+from utils.benchmark import get_user_token
+from utils.synthetic_data import DERIVED_TABLE_COMMANDS, SyntheticDataset
+
+# Enough hackathons for their list to show per-row queries at small sizes
+DATASET_PROPORTIONS = {"Hackathon": 0.02}
+
+# path: (queries with the small dataset, queries with the large one)
+# A warm request must run exactly this many queries. Endpoints whose two
+# counts differ still run queries per row; lower their counts as they are
+# fixed, and never raise them to make a change pass.
+ENDPOINT_QUERIES = {
+    "leaderboard/students/": (0, 0),
+    "leaderboard/students-monthly/": (1, 1),
+    "leaderboard/college/": (0, 0),
+    "leaderboard/college-monthly/": (1, 1),
+    "leaderboard/event/Top100/": (2, 2),
+    "top100/leaderboard/": (1, 1),
+    "dashboard/user/": (2, 2),
+    "dashboard/user/verification/": (2, 2),
+    "dashboard/user/info/": (15, 26),
+    "dashboard/task/": (2, 2),
+    "dashboard/karma-voucher/": (42, 82),
+    "dashboard/roles/": (32, 62),
+    "dashboard/ig/": (3, 3),
+    "dashboard/ig/list/": (61, 121),
+    "dashboard/referral/": (33, 45),
+    "dashboard/zonal/zonal-details/": (7, 7),
+    "dashboard/zonal/top-districts/": (6, 6),
+    "dashboard/zonal/student-level/": (12, 19),
+    "dashboard/zonal/student-details/": (7, 7),
+    "dashboard/zonal/college-details/": (7, 7),
+    "dashboard/district/district-details/": (7, 8),
+    "dashboard/district/top-campus/": (5, 5),
+    "dashboard/district/student-level/": (11, 18),
+    "dashboard/district/student-details/": (6, 6),
+    "dashboard/district/college-details/": (6, 6),
+    "dashboard/campus/campus-details/": (8, 8),
+    "dashboard/campus/student-level/": (3, 3),
+    "dashboard/campus/student-details/": (5, 5),
+    "dashboard/campus/weekly-karma/": (9, 9),
+    "dashboard/lc/": (6, 21),
+    "dashboard/location/countries/": (2, 2),
+    "dashboard/organisation/institutes/College/": (3, 3),
+    "dashboard/organisation/departments/": (2, 2),
+    "dashboard/dynamic-management/dynamic-role/": (11, 20),
+    "dashboard/dynamic-management/dynamic-user/": (3, 3),
+    "dashboard/profile/user-profile/": (15, 15),
+    "dashboard/profile/user-log/": (456, 606),
+    "dashboard/profile/get-user-levels/": (522, 1043),
+    "dashboard/profile/socials/": (1, 1),
+    "dashboard/college/": (1, 1),
+    "hackathon/list-hackathons/": (9, 13),
+    "hackathon/list-applicants/": (41, 76),
+    "url-shortener/list/": (3, 3),
+    "notification/list/": (1, 1),
+    "get-log/lc-dashboard/": (4, 4),
+    "get-log/lc-report/": (2, 2),
+    "get-log/college-wise-lc-report/": (1, 1),
+    "get-log/global-count/": (5, 5),
+}
+
+
+class QueryBudgetMixin:
+    """
+    Requests every list endpoint on a synthetic dataset and checks the number
+    of queries of the warm request against ENDPOINT_QUERIES.
+
+    Subclasses set the size of the dataset and which column of
+    ENDPOINT_QUERIES applies to it.
+    """
+
+    users = None
+    reference_scale = 1
+    per_page = 10
+    budget_index = 0
+
+    @classmethod
+    def setUpClass(cls):
+        # The models are unmanaged, so the test database has none of their tables
+        SyntheticDataset.create_schema()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        dataset = SyntheticDataset(
+            cls.users, proportions=DATASET_PROPORTIONS, reference_scale=cls.reference_scale
+        )
+        dataset.generate()
+        for command in DERIVED_TABLE_COMMANDS:
+            call_command(*command, stdout=io.StringIO())
+        cache.clear()
+
+        user = User.objects.get(pk=dataset.pks[User][0])
+        cls.token = get_user_token(user)
+
+    def test_endpoint_queries(self):
+        params = {"perPage": self.per_page}
+        for path, budget in ENDPOINT_QUERIES.items():
+            with self.subTest(path=path):
+                url = f"/api/v1/{path}"
+                # Warms the per-process caches so only the steady state is counted
+                self.client.get(url, params, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+                with self.assertNumQueries(budget[self.budget_index]):
+                    response = self.client.get(
+                        url, params, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+                    )
+
+                self.assertEqual(response.status_code, 200)
+                if not response.streaming:
+                    self.assertFalse(json.loads(response.content).get("hasError", False))
+
+
+class SmallDatasetQueryTests(QueryBudgetMixin, TestCase):
+    users = 100
+
+
+class LargeDatasetQueryTests(QueryBudgetMixin, TestCase):
+    users = 200
+    reference_scale = 2
+    per_page = 20
+    budget_index = 1
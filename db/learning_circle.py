@@ -36,4 +36,17 @@ class UserCircleLink(models.Model):
 
     class Meta:
         managed = False
-        db_table = "user_circle_link"
\ No newline at end of file
+        db_table = "user_circle_link"
+
+
+class CircleKarma(models.Model):
+    id         = models.CharField(primary_key=True, max_length=36)
+    circle     = models.OneToOneField(LearningCircle, on_delete=models.CASCADE, related_name="circle_karma_circle")
+    ig         = models.ForeignKey(InterestGroup, on_delete=models.CASCADE, related_name="circle_karma_ig")
+    karma      = models.IntegerField(default=0)
+    rank       = models.IntegerField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "circle_karma"
@@ -18,4 +18,24 @@ class Notification(models.Model):
     class Meta:
         managed = False
         db_table = "notification"
-        ordering = ["created_at"]
\ No newline at end of file
+        ordering = ["created_at"]
+
+
+class EmailOutbox(models.Model):
+    id              = models.CharField(primary_key=True, max_length=36)
+    subject         = models.CharField(max_length=255)
+    body            = models.TextField()
+    html_body       = models.TextField(blank=True, null=True)
+    from_email      = models.CharField(max_length=255)
+    recipients      = models.JSONField()
+    attachments     = models.JSONField(blank=True, null=True)
+    status          = models.CharField(max_length=10)
+    attempts        = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error      = models.TextField(blank=True, null=True)
+    sent_at         = models.DateTimeField(blank=True, null=True)
+    created_at      = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "email_outbox"
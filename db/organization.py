@@ -173,3 +173,20 @@ class UserOrganizationLink(models.Model):
     @property
     def district(self):
         return self.org.district
+
+
+
+class KarmaAggregate(models.Model):
+    id             = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    level          = models.CharField(max_length=10)
+    entity_id      = models.CharField(max_length=36)
+    parent_id      = models.CharField(max_length=36, blank=True, null=True)
+    karma          = models.IntegerField(default=0)
+    members        = models.IntegerField(default=0)
+    rank           = models.IntegerField()
+    updated_at     = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'karma_aggregate'
+        unique_together = ('level', 'entity_id')
@@ -0,0 +1,26 @@
+from django.db import models
+
+# fmt: off
+
+class SearchToken(models.Model):
+    id         = models.BigAutoField(primary_key=True)
+    table      = models.CharField(max_length=64)
+    object_id  = models.CharField(max_length=36)
+    token      = models.CharField(max_length=64)
+    weight     = models.IntegerField()
+
+    class Meta:
+        managed = False
+        db_table = "search_token"
+        unique_together = ("table", "token", "object_id")
+
+
+class SearchReindex(models.Model):
+    id         = models.BigAutoField(primary_key=True)
+    table      = models.CharField(max_length=64)
+    object_id  = models.CharField(max_length=36)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "search_reindex_queue"
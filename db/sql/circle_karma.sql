@@ -0,0 +1,14 @@
+-- Karma and rank of every learning circle within its interest group, see LearningCircleKarma
+CREATE TABLE IF NOT EXISTS circle_karma
+(
+    id         VARCHAR(36) NOT NULL PRIMARY KEY,
+    circle_id  VARCHAR(36) NOT NULL,
+    ig_id      VARCHAR(36) NOT NULL,
+    karma      INT         NOT NULL DEFAULT 0,
+    `rank`     INT         NOT NULL,
+    updated_at DATETIME    NOT NULL,
+    UNIQUE INDEX circle_karma_circle (circle_id),
+    INDEX circle_karma_ig_karma (ig_id, karma),
+    CONSTRAINT circle_karma_circle FOREIGN KEY (circle_id) REFERENCES learning_circle (id) ON DELETE CASCADE,
+    CONSTRAINT circle_karma_ig FOREIGN KEY (ig_id) REFERENCES interest_group (id) ON DELETE CASCADE
+);
@@ -0,0 +1,18 @@
+-- Transactional mail outbox, written by MailOutbox and drained by send_queued_mail
+CREATE TABLE IF NOT EXISTS email_outbox
+(
+    id              CHAR(36)     NOT NULL PRIMARY KEY,
+    subject         VARCHAR(255) NOT NULL,
+    body            LONGTEXT     NOT NULL,
+    html_body       LONGTEXT     NULL,
+    from_email      VARCHAR(255) NOT NULL,
+    recipients      JSON         NOT NULL,
+    attachments     JSON         NULL,
+    status          VARCHAR(10)  NOT NULL,
+    attempts        INT          NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME     NOT NULL,
+    last_error      TEXT         NULL,
+    sent_at         DATETIME     NULL,
+    created_at      DATETIME     NOT NULL,
+    INDEX email_outbox_due (status, next_attempt_at)
+);
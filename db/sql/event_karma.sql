@@ -0,0 +1,16 @@
+-- Running karma of every user in every event, see EventLeaderboard
+CREATE TABLE IF NOT EXISTS event_karma
+(
+    id               VARCHAR(36) NOT NULL PRIMARY KEY,
+    event            VARCHAR(50) NOT NULL,
+    user_id          VARCHAR(36) NOT NULL,
+    org_id           VARCHAR(36) NULL,
+    karma            INT         NOT NULL DEFAULT 0,
+    last_activity_at DATETIME    NULL,
+    updated_at       DATETIME    NOT NULL,
+    UNIQUE INDEX event_karma_event_user (event, user_id),
+    INDEX event_karma_event_karma (event, karma, last_activity_at),
+    INDEX event_karma_event_updated_at (event, updated_at),
+    CONSTRAINT event_karma_user FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE CASCADE,
+    CONSTRAINT event_karma_org FOREIGN KEY (org_id) REFERENCES organization (id) ON DELETE CASCADE
+);
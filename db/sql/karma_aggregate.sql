@@ -0,0 +1,14 @@
+-- Karma, members and rank of every organization, district, zone and state, see KarmaAggregates
+CREATE TABLE IF NOT EXISTS karma_aggregate
+(
+    id         VARCHAR(36) NOT NULL PRIMARY KEY,
+    level      VARCHAR(10) NOT NULL,
+    entity_id  VARCHAR(36) NOT NULL,
+    parent_id  VARCHAR(36) NULL,
+    karma      INT         NOT NULL DEFAULT 0,
+    members    INT         NOT NULL DEFAULT 0,
+    `rank`     INT         NOT NULL,
+    updated_at DATETIME    NOT NULL,
+    UNIQUE INDEX karma_aggregate_level_entity (level, entity_id),
+    INDEX karma_aggregate_level_karma (level, karma)
+);
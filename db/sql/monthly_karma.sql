@@ -0,0 +1,28 @@
+-- Monthly karma rollups of the monthly leaderboards, see MonthlyKarmaRollup
+CREATE TABLE IF NOT EXISTS user_monthly_karma
+(
+    id           VARCHAR(36) NOT NULL PRIMARY KEY,
+    `year_month` VARCHAR(7)  NOT NULL,
+    user_id      VARCHAR(36) NOT NULL,
+    org_id       VARCHAR(36) NULL,
+    karma        INT         NOT NULL DEFAULT 0,
+    updated_at   DATETIME    NOT NULL,
+    UNIQUE INDEX user_monthly_karma_month_user (`year_month`, user_id),
+    INDEX user_monthly_karma_month_karma (`year_month`, karma),
+    INDEX user_monthly_karma_updated_at (updated_at),
+    CONSTRAINT user_monthly_karma_user FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE CASCADE,
+    CONSTRAINT user_monthly_karma_org FOREIGN KEY (org_id) REFERENCES organization (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS org_monthly_karma
+(
+    id           VARCHAR(36) NOT NULL PRIMARY KEY,
+    `year_month` VARCHAR(7)  NOT NULL,
+    org_id       VARCHAR(36) NOT NULL,
+    karma        INT         NOT NULL DEFAULT 0,
+    students     INT         NOT NULL DEFAULT 0,
+    updated_at   DATETIME    NOT NULL,
+    UNIQUE INDEX org_monthly_karma_month_org (`year_month`, org_id),
+    INDEX org_monthly_karma_month_karma (`year_month`, karma),
+    CONSTRAINT org_monthly_karma_org FOREIGN KEY (org_id) REFERENCES organization (id) ON DELETE CASCADE
+);
@@ -0,0 +1,20 @@
+-- Inverted index of the dashboard list searches, see utils.search.TokenIndexBackend
+CREATE TABLE IF NOT EXISTS search_token
+(
+    id        BIGINT      NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `table`   VARCHAR(64) NOT NULL,
+    object_id VARCHAR(36) NOT NULL,
+    token     VARCHAR(64) NOT NULL,
+    weight    INT         NOT NULL,
+    UNIQUE INDEX search_token_table_token_object (`table`, token, object_id),
+    INDEX search_token_table_object (`table`, object_id)
+);
+
+-- Rows whose dependent documents are re-indexed by rebuild_search_index --pending
+CREATE TABLE IF NOT EXISTS search_reindex_queue
+(
+    id         BIGINT      NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `table`    VARCHAR(64) NOT NULL,
+    object_id  VARCHAR(36) NOT NULL,
+    created_at DATETIME    NOT NULL
+);
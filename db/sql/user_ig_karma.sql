@@ -0,0 +1,14 @@
+-- Approved karma of every user in every interest group, see InterestGroupKarma
+CREATE TABLE IF NOT EXISTS user_ig_karma
+(
+    id         VARCHAR(36) NOT NULL PRIMARY KEY,
+    user_id    VARCHAR(36) NOT NULL,
+    ig_id      VARCHAR(36) NOT NULL,
+    karma      INT         NOT NULL DEFAULT 0,
+    updated_at DATETIME    NOT NULL,
+    UNIQUE INDEX user_ig_karma_user_ig (user_id, ig_id),
+    INDEX user_ig_karma_ig_karma (ig_id, karma),
+    INDEX user_ig_karma_updated_at (updated_at),
+    CONSTRAINT user_ig_karma_user FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE CASCADE,
+    CONSTRAINT user_ig_karma_ig FOREIGN KEY (ig_id) REFERENCES interest_group (id) ON DELETE CASCADE
+);
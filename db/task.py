@@ -149,6 +149,52 @@ class KarmaActivityLog(models.Model):
 
 
 
+class UserMonthlyKarma(models.Model):
+    id                   = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    year_month           = models.CharField(max_length=7)
+    user                 = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user_monthly_karma_user")
+    org                  = models.ForeignKey(Organization, on_delete=models.CASCADE, blank=True, null=True, related_name="user_monthly_karma_org")
+    karma                = models.IntegerField(default=0)
+    updated_at           = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "user_monthly_karma"
+        unique_together = ("year_month", "user")
+
+
+
+class OrgMonthlyKarma(models.Model):
+    id                   = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    year_month           = models.CharField(max_length=7)
+    org                  = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="org_monthly_karma_org")
+    karma                = models.IntegerField(default=0)
+    students             = models.IntegerField(default=0)
+    updated_at           = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "org_monthly_karma"
+        unique_together = ("year_month", "org")
+
+
+
+class EventKarma(models.Model):
+    id                   = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    event                = models.CharField(max_length=50)
+    user                 = models.ForeignKey(User, on_delete=models.CASCADE, related_name="event_karma_user")
+    org                  = models.ForeignKey(Organization, on_delete=models.CASCADE, blank=True, null=True, related_name="event_karma_org")
+    karma                = models.IntegerField(default=0)
+    last_activity_at     = models.DateTimeField(blank=True, null=True)
+    updated_at           = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "event_karma"
+        unique_together = ("event", "user")
+
+
+
 class MucoinActivityLog(models.Model):
     id                   = models.CharField(primary_key=True, max_length=36)
     user                 = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mucoin_activity_log_user")
@@ -193,6 +239,20 @@ class UserIgLink(models.Model):
 
 
 
+class UserIgKarma(models.Model):
+    id                   = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    user                 = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user_ig_karma_user")
+    ig                   = models.ForeignKey(InterestGroup, on_delete=models.CASCADE, related_name="user_ig_karma_ig")
+    karma                = models.IntegerField(default=0)
+    updated_at           = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "user_ig_karma"
+        unique_together = ("user", "ig")
+
+
+
 class VoucherLog(models.Model):
     id                   = models.CharField(primary_key=True, max_length=36)
     code                 = models.CharField(unique=True, max_length=255)
@@ -1,21 +1,23 @@
 from contextlib import suppress
 import hmac
 import json
-import json
 import logging
-import traceback
+import time
 
 import decouple
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, RawPostDataException
 from rest_framework import status
 from rest_framework.renderers import JSONRenderer
 
 from utils.exception import CustomException
+from utils.metrics import RequestMetrics, get_view_name, instrument_requests
 from utils.response import CustomResponse
 from utils.utils import _CustomHTTPHandler
 
 logger = logging.getLogger("django")
+# Request bodies beyond this are cut from exception logs, e.g. uploaded sheets
+LOGGED_BODY_BYTES = 10000
 
 
 class IpBindingMiddleware(object):
@@ -60,7 +62,6 @@ class ApiSignatureMiddleware(object):
                 msg=key.encode(),
                 digestmod="SHA256",
             ).hexdigest()
-            print(new_signature)
             if new_signature != signature:
                 return JsonResponse(
                     {
@@ -74,6 +75,40 @@ class ApiSignatureMiddleware(object):
         return self.get_response(request)
 
 
+class RequestMetricsMiddleware:
+    """
+    Records the latency, database queries, outbound HTTP calls and response
+    size of every request against the view it resolved to.
+
+    Placed first so the latency covers the rest of the middleware chain.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_requests()
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        sample, stack = RequestMetrics.start()
+        with stack:
+            response = self.get_response(request)
+
+        size = (
+            int(response.get("Content-Length", 0))
+            if response.streaming
+            else len(response.content)
+        )
+        RequestMetrics.record(
+            get_view_name(request),
+            request.method,
+            time.perf_counter() - start,
+            response.status_code,
+            sample,
+            size,
+        )
+        return response
+
+
 class UniversalErrorHandlerMiddleware:
     """
     Middleware for handling exceptions and generating error responses.
@@ -96,41 +131,35 @@ class UniversalErrorHandlerMiddleware:
 
     def log_exception(self, request, exception):
         """
-        Log the exception and prints the information in CLI.
+        Log the exception with the request information as one record.
 
         Args:
             request: The request object.
             exception: The exception object.
 
         """
-        error_message = (
-            f"Exception Type: {type(exception).__name__}; "
-            f"Exception Message: {str(exception)}; "
-            f"Traceback: {traceback.format_exc()}"
-        )
-        logger.error(error_message)
-
-        print(error_message)
-
-        body = request.body.decode("utf-8") if hasattr(request, "body") else "No body"
+        try:
+            body = request.body[:LOGGED_BODY_BYTES].decode("utf-8", "replace")
+        except RawPostDataException:
+            # The stream was already consumed by parsing a multipart upload
+            body = "Body already read"
         auth = request.auth if hasattr(request, "auth") else "No Auth data"
 
         with suppress(json.JSONDecodeError):
             body = json.loads(body)
-            body = json.dumps(body, indent=4)
-
-        with suppress(json.JSONDecodeError):
-            auth = json.dumps(auth, indent=4)
 
-        request_info = (
-            f"Request Info: METHOD: {request.method}; \n"
-            f"PATH: {request.path}; \n"
-            f"AUTH: \n{auth} \n"
-            f"BODY: \n{body}\n"
+        logger.error(
+            "Exception Type: %s; Exception Message: %s",
+            type(exception).__name__,
+            exception,
+            exc_info=exception,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "auth": auth,
+                "body": body,
+            },
         )
-        logger.error(request_info)
-
-        print(request_info)
 
     def process_exception(self, request, exception):
         """
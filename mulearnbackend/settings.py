@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "mulearnbackend.middlewares.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -98,6 +99,36 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="mulearnbackend"),
+    }
+}
+
+# Whether every process reads the same cache. A per-process cache cannot pass a
+# write on to the other workers.
+CACHE_IS_SHARED = not CACHES["default"]["BACKEND"].endswith((".LocMemCache", ".DummyCache"))
+
+# Lifetime of the version tokens that invalidate the in-process copies of dynamic
+# permissions, reference data and integrations, and of the cached leaderboards.
+# With a per-process cache they expire and every process reloads within this many
+# seconds; with a shared cache the tokens live until replaced.
+CACHE_VERSION_TIMEOUT = (
+    None if CACHE_IS_SHARED else config("CACHE_VERSION_TIMEOUT", default=30, cast=int)
+)
+
+# Backend of the dashboard list searches, see utils.search.SearchIndex. Lists
+# are searched with icontains while it is empty. To switch to
+# utils.search.TokenIndexBackend, apply db/sql/search_token.sql, set it here
+# and run rebuild_search_index; searches only find indexed rows until then.
+SEARCH_BACKEND = config("SEARCH_BACKEND", default="")
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -118,33 +149,36 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # logging
 
+LOGGER_DIR_PATH = decouple.config("LOGGER_DIR_PATH")
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+# SQL statements are only logged with DEBUG; a share of them and all slow ones are kept
+SQL_LOG_SAMPLE_RATE = config("SQL_LOG_SAMPLE_RATE", default=0.01, cast=float)
+SQL_LOG_SLOW_SECONDS = config("SQL_LOG_SLOW_SECONDS", default=0.5, cast=float)
+
+
+def log_file_handler(filename, level):
+    return {
+        'level': level,
+        'class': 'utils.log.AsyncFileHandler',
+        'filename': os.path.join(LOGGER_DIR_PATH, filename),
+        'formatter': 'json',
+    }
+
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
-        'request_log': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': decouple.config("LOGGER_DIR_PATH") + '/request.log',
-            'formatter': 'verbose',
-        },
-        'error_log': {
-            'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': decouple.config("LOGGER_DIR_PATH") + '/error.log',
-            'formatter': 'verbose',
-        },
-        'sql_log': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': decouple.config("LOGGER_DIR_PATH") + '/sql.log',
-            'formatter': 'verbose',
-        },
-        'root_log': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': decouple.config("LOGGER_DIR_PATH") + '/root.log',
-            'formatter': 'verbose',
+        'request_log': log_file_handler('request.log', 'INFO'),
+        'error_log': log_file_handler('error.log', 'ERROR'),
+        'sql_log': {**log_file_handler('sql.log', 'DEBUG'), 'filters': ['sql_sampling']},
+        'root_log': log_file_handler('root.log', LOG_LEVEL),
+    },
+    'filters': {
+        'sql_sampling': {
+            '()': 'utils.log.SamplingFilter',
+            'rate': SQL_LOG_SAMPLE_RATE,
+            'slow_threshold': SQL_LOG_SLOW_SECONDS,
         },
     },
     'loggers': {
@@ -161,18 +195,17 @@ LOGGING = {
         'django.db.backends': {
             'handlers': ['sql_log'],
             'level': 'DEBUG',
-            'propagate': True,
+            'propagate': False,
         },
         '': {
             'handlers': ['root_log'],
-            'level': 'DEBUG',
+            'level': LOG_LEVEL,
             'propagate': True,
         },
     },
     'formatters': {
-        'verbose': {
-            'format': '{asctime} {levelname} {message}',
-            'style': '{',
+        'json': {
+            '()': 'utils.log.JsonFormatter',
         },
     },
 }
@@ -214,6 +247,22 @@ EMAIL_PORT = config("EMAIL_PORT")
 EMAIL_USE_TLS = config("EMAIL_USE_TLS")
 from_mail = decouple.config('FROM_MAIL')
 
+# Commands the worker service runs periodically, as (command, seconds between runs,
+# options). Runs of the same command never overlap.
+SCHEDULED_COMMANDS = [
+    ("send_queued_mail", 5, {"once": True}),
+    ("rollup_monthly_karma", 5 * 60, {}),
+    # Also corrects the aggregates for karma the Discord bot writes directly, and
+    # the cached leaderboards when the cache is shared with the web workers
+    ("rebuild_leaderboards", 60 * 60, {}),
+    ("refresh_ig_karma", 60, {}),
+    ("refresh_ig_karma", 60 * 60, {"rebuild": True}),
+    ("refresh_event_leaderboards", 60, {}),
+    ("refresh_event_leaderboards", 60 * 60, {"rebuild": True}),
+]
+if SEARCH_BACKEND:
+    SCHEDULED_COMMANDS.append(("rebuild_search_index", 30, {"pending": True}))
+
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
 import socket
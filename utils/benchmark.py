@@ -0,0 +1,239 @@
+import datetime
+import itertools
+import math
+import resource
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import jwt
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+
+from .types import RoleType
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: str
+    # "user" sends a JWT of the benchmark user, "kkem" the KKEM integration token
+    auth: Optional[str] = "user"
+    body: Optional[Callable[[Dict, int], Dict]] = None
+
+
+def _registration(context: Dict, index: int) -> Dict:
+    return {
+        "user": {
+            "first_name": "Bench",
+            "last_name": f"User{index}",
+            "email": f"bench{index}@example.com",
+            "mobile": str(8000000000 + index),
+            "password": "benchmark-password",
+            "role": context["student_role"],
+        },
+        "organization": {"organizations": [context["college"]], "verified": True},
+    }
+
+
+SCENARIOS = (
+    # Registration is benchmarked up to validation, creating the account
+    # needs the external auth service
+    Scenario("register", "put", "register/validate/", None, _registration),
+    Scenario("profile", "get", "dashboard/profile/user-profile/"),
+    Scenario("profile-log", "get", "dashboard/profile/user-log/"),
+    Scenario("leaderboard-students", "get", "leaderboard/students/", None),
+    Scenario("leaderboard-students-monthly", "get", "leaderboard/students-monthly/", None),
+    Scenario("leaderboard-college", "get", "leaderboard/college/", None),
+    Scenario("leaderboard-college-monthly", "get", "leaderboard/college-monthly/", None),
+    Scenario("campus-details", "get", "dashboard/campus/campus-details/"),
+    Scenario("campus-students", "get", "dashboard/campus/student-details/"),
+    Scenario("district-details", "get", "dashboard/district/district-details/"),
+    Scenario("district-students", "get", "dashboard/district/student-details/"),
+    Scenario("zonal-details", "get", "dashboard/zonal/zonal-details/"),
+    Scenario("zonal-students", "get", "dashboard/zonal/student-details/"),
+    Scenario("lc-home", "get", "dashboard/lc/{circle}/"),
+    Scenario("kkem-bulk", "get", "integrations/kkem/users/", "kkem"),
+    Scenario("csv-users", "get", "dashboard/user/csv/"),
+    Scenario("csv-tasks", "get", "dashboard/task/csv/"),
+    Scenario("csv-campus-students", "get", "dashboard/campus/student-details/csv/"),
+    Scenario("csv-district-students", "get", "dashboard/district/student-details/csv/"),
+    Scenario("csv-zonal-students", "get", "dashboard/zonal/student-details/csv/"),
+)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, `q` between 0 and 1."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def get_peak_rss() -> int:
+    """Peak resident memory of the process in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class EndpointBenchmark:
+    """
+    Drives the whole Django stack through the test client, as a load of
+    `concurrency` clients sending `requests` requests to each scenario.
+
+    Every request runs in a transaction that is rolled back, so scenarios
+    that write leave the database as it was. Allocations are measured on a
+    separate request with tracemalloc, which would distort the latencies.
+    """
+
+    def __init__(
+            self, context: Dict, requests: int = 50, concurrency: int = 4, warmup: int = 2) -> None:
+        self.context = context
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.counter = itertools.count()
+        self.local = threading.local()
+
+    def get_clients(self) -> Dict[Optional[str], Client]:
+        if not hasattr(self.local, "clients"):
+            self.local.clients = {
+                None: Client(),
+                "user": Client(HTTP_AUTHORIZATION=f"Bearer {self.context['user_token']}"),
+                "kkem": Client(HTTP_AUTHORIZATION=f"Bearer {self.context['kkem_token']}"),
+            }
+        return self.local.clients
+
+    def request(self, scenario: Scenario) -> Dict:
+        client = self.get_clients()[scenario.auth]
+        path = "/api/v1/" + scenario.path.format(**self.context)
+        kwargs = {}
+        if scenario.body:
+            kwargs = {"data": scenario.body(self.context, next(self.counter)), "content_type": "application/json"}
+
+        queries = 0
+
+        def count(execute, sql, params, many, query_context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, query_context)
+
+        with connection.execute_wrapper(count), transaction.atomic():
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(path, **kwargs)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            latency = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        return {"latency": latency, "queries": queries, "status": response.status_code, "bytes": size}
+
+    def _worker(self, scenario: Scenario, requests: int) -> List[Dict]:
+        try:
+            return [self.request(scenario) for _ in range(requests)]
+        finally:
+            connection.close()
+
+    def run(self, scenario: Scenario) -> Dict:
+        for _ in range(self.warmup):
+            self.request(scenario)
+
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            self.request(scenario)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        shares = [
+            self.requests // self.concurrency + (worker < self.requests % self.concurrency)
+            for worker in range(self.concurrency)
+        ]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            samples = list(itertools.chain.from_iterable(
+                executor.map(lambda share: self._worker(scenario, share), shares)
+            ))
+        elapsed = time.perf_counter() - start
+
+        latencies = [sample["latency"] for sample in samples]
+        queries = [sample["queries"] for sample in samples]
+        statuses = {}
+        for sample in samples:
+            statuses[str(sample["status"])] = statuses.get(str(sample["status"]), 0) + 1
+
+        return {
+            "method": scenario.method.upper(),
+            "path": scenario.path,
+            "requests": len(samples),
+            "concurrency": self.concurrency,
+            "statuses": statuses,
+            "throughput": len(samples) / elapsed,
+            "latency": {
+                "mean": sum(latencies) / len(latencies),
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "max": max(latencies),
+            },
+            "queries": {"mean": sum(queries) / len(queries), "max": max(queries)},
+            "response_bytes": samples[-1]["bytes"],
+            "allocations": {"peak_bytes": peak - before, "retained_bytes": after - before},
+            "peak_rss_bytes": get_peak_rss(),
+        }
+
+
+# Figures compared between runs, higher is worse unless listed in HIGHER_IS_BETTER
+COMPARED = {
+    "p50": ("latency", "p50"),
+    "p95": ("latency", "p95"),
+    "p99": ("latency", "p99"),
+    "throughput": ("throughput",),
+    "queries": ("queries", "mean"),
+    "alloc": ("allocations", "peak_bytes"),
+}
+HIGHER_IS_BETTER = {"throughput"}
+
+
+def compare_runs(baseline: Dict, current: Dict) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Relative change of every compared figure of the scenarios in both runs,
+    positive when `current` is worse.
+    """
+    changes = {}
+    for name, result in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            continue
+        changes[name] = {}
+        for figure, keys in COMPARED.items():
+            before, after = old, result
+            for key in keys:
+                before, after = before[key], after[key]
+            if not before:
+                changes[name][figure] = None
+                continue
+            change = (after - before) / before
+            changes[name][figure] = -change if figure in HIGHER_IS_BETTER else change
+    return changes
+
+
+def get_user_token(user, expires_in: int = 3600) -> str:
+    """JWT of `user` with every role, as issued by the auth service."""
+    expiry = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=expires_in)
+    return jwt.encode(
+        {
+            "id": user.id,
+            "muid": user.muid,
+            "roles": [role.value for role in RoleType],
+            "expiry": expiry.strftime("%Y-%m-%d %H:%M:%S%z"),
+        },
+        settings.SECRET_KEY,
+        algorithm="HS256",
+    )
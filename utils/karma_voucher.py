@@ -1,6 +1,8 @@
+import threading
 from io import BytesIO
-from typing import Optional
 
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from PIL import Image, ImageDraw, ImageFont
 
 import time
@@ -8,6 +10,48 @@ import time
 image_location = './api/dashboard/karma_voucher/assets/karmacard.png'
 font_location =  './api/dashboard/karma_voucher/fonts/Roboto-Light.ttf'
 
+# (field, position, font size) of every text drawn on the card
+VOUCHER_LAYOUT = (
+    ('name', (135, 250), 60),
+    ('hashtag', (135, 450), 45),
+    ('karma', (920, 135), 45),
+    ('code', (135, 135), 20),
+    ('month', (135, 375), 30),
+)
+VOUCHER_STORAGE_DIR = 'karma_voucher'
+
+_template = None
+_fonts = None
+_assets_lock = threading.Lock()
+
+
+def _load_assets():
+    """Decodes the card template and opens the fonts once per process."""
+    global _template, _fonts
+    with _assets_lock:
+        if _template is None:
+            _fonts = {
+                size: ImageFont.truetype(font_location, size=size)
+                for size in {size for _, _, size in VOUCHER_LAYOUT}
+            }
+            with Image.open(image_location) as image:
+                _template = image.convert('RGB')
+    return _template, _fonts
+
+
+def _render(voucher):
+    template, fonts = _load_assets()
+    image = template.copy()
+
+    draw = ImageDraw.Draw(image)
+    for field, position, size in VOUCHER_LAYOUT:
+        draw.text(position, voucher[field], fill=(255, 255, 255), font=fonts[size])
+
+    image_data = BytesIO()
+    image.save(image_data, format='JPEG')
+    return image_data.getvalue()
+
+
 def generate_karma_voucher(name, hashtag, karma, code, month):
     """
     Generate a karma voucher for the given users
@@ -17,41 +61,34 @@ def generate_karma_voucher(name, hashtag, karma, code, month):
     :param code:
     :param month:
     :return:
-    """   
+    """
+    return BytesIO(
+        _render({'name': name, 'hashtag': hashtag, 'karma': karma, 'code': code, 'month': month})
+    )
+
+
+def render_karma_vouchers(vouchers, persist=False):
+    """
+    Render many karma vouchers at once, in the calling process so no pool is
+    forked from a worker that already runs threads
+    :param vouchers: dicts with name, hashtag, karma, code and month
+    :param persist: also save every voucher to storage as karma_voucher/<code>.jpg
+    :return: dict of voucher code to JPEG bytes
+    """
+    rendered = {voucher['code']: _render(voucher) for voucher in vouchers}
 
+    if persist:
+        for code, image in rendered.items():
+            path = get_voucher_path(code)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(path, ContentFile(image))
 
-    image = Image.open(image_location)
-    image = image.convert('RGB')
+    return rendered
 
-    draw = ImageDraw.Draw(image)
-    x = 135
-    y = 250
-    font1 = ImageFont.truetype(font_location, size=60)
-    draw.text((x, y), name, fill=(255, 255, 255), font=font1)
-
-    x1 = 135
-    y1 = 450
-    font2 = ImageFont.truetype(font_location, size=45)
-    draw.text((x1, y1), hashtag, fill=(255, 255, 255), font=font2)
-
-    x2 = 920
-    y2 = 135
-    font3 = ImageFont.truetype(font_location, size=45)
-    draw.text((x2, y2), karma, fill=(255, 255, 255), font=font3)
-
-    x3 = 135
-    y3 = 135
-    font3 = ImageFont.truetype(font_location, size=20)
-    draw.text((x3, y3), code, fill=(255, 255, 255), font=font3)
-
-    x3 = 135
-    y3 = 375
-    font3 = ImageFont.truetype(font_location, size=30)
-    draw.text((x3, y3), month, fill=(255, 255, 255), font=font3)
 
-    image_data = BytesIO()
-    image.save(image_data, format='JPEG')
-    return image_data
+def get_voucher_path(code):
+    return f'{VOUCHER_STORAGE_DIR}/{code}.jpg'
 
 
 def generate_ordered_id(count):
@@ -0,0 +1,143 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+
+# Attributes every LogRecord has, anything else was passed in `extra`
+RESERVED_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime"}
+QUEUE_SIZE = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, with the fields passed in `extra` kept as
+    fields, such as the `duration` and `sql` of database records.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith("_"):
+                data[key] = value
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes a random `rate` share of the records, and every record whose
+    `duration` is at least `slow_threshold` seconds.
+    """
+
+    def __init__(self, rate: float = 1.0, slow_threshold: float = None, name: str = "") -> None:
+        super().__init__(name)
+        self.rate = rate
+        self.slow_threshold = slow_threshold
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.slow_threshold is not None:
+            duration = getattr(record, "duration", None)
+            if duration is not None and duration >= self.slow_threshold:
+                return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class AsyncFileHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for a background thread that appends them to a file, so
+    the logging thread only pays for the filters and the enqueue.
+
+    Every gunicorn worker and the scheduler write the same files, so none of
+    them rotates: rotation is left to logrotate, and the file is reopened
+    once it has been moved, as in WatchedFileHandler. Records are dropped,
+    and counted, while the queue is full rather than blocking requests. The
+    listener is started again in processes forked after configuration, such
+    as preloaded gunicorn workers.
+    """
+
+    def __init__(self, filename: str, queueSize: int = QUEUE_SIZE, encoding: str = "utf-8") -> None:
+        super().__init__(queue.Queue(queueSize))
+        self.target = logging.handlers.WatchedFileHandler(filename, encoding=encoding, delay=True)
+        self.queue_size = queueSize
+        self.dropped = 0
+        self.listener = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt: logging.Formatter) -> None:
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def start(self) -> None:
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            if self.pid is not None:
+                # Forked: the parent's listener thread does not exist here
+                self.queue = queue.Queue(self.queue_size)
+            self.listener = logging.handlers.QueueListener(self.queue, self.target)
+            self.listener.start()
+            self.pid = os.getpid()
+
+    def stop(self) -> None:
+        """Writes the queued records and stops the listener."""
+        with self.start_lock:
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self.pid = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merges the arguments, renders the traceback and copies the `extra`
+        # fields as JSON values now, the objects they refer to (such as the
+        # request) may change or be gone before the listener gets to them
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            formatter = self.target.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in list(record.__dict__.items()):
+            if key in RESERVED_ATTRS or key.startswith("_"):
+                continue
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                setattr(record, key, json.loads(json.dumps(value, default=str)))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        self.stop()
+        self.target.close()
+        super().close()
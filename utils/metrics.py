@@ -0,0 +1,261 @@
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connections
+from requests.adapters import HTTPAdapter
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "mulearn"
+UNRESOLVED_VIEW = "unresolved"
+
+_current: ContextVar[Optional["RequestSample"]] = ContextVar("request_metrics", default=None)
+
+
+class RequestSample:
+    """Costs accumulated while one request is being handled."""
+
+    __slots__ = ("queries", "query_time", "http_calls", "http_time")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.query_time = 0.0
+        self.http_calls = 0
+        self.http_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as a database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+
+class ViewMetrics:
+    __slots__ = (
+        "buckets",
+        "count",
+        "latency",
+        "max_latency",
+        "statuses",
+        "queries",
+        "max_queries",
+        "query_time",
+        "http_calls",
+        "http_time",
+        "response_bytes",
+    )
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.statuses: Dict[str, int] = {}
+        self.queries = 0
+        self.max_queries = 0
+        self.query_time = 0.0
+        self.http_calls = 0
+        self.http_time = 0.0
+        self.response_bytes = 0
+
+    def add(self, latency: float, status: int, sample: RequestSample, size: int) -> None:
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[index] += 1
+                break
+        self.count += 1
+        self.latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        status_class = f"{status // 100}xx"
+        self.statuses[status_class] = self.statuses.get(status_class, 0) + 1
+        self.queries += sample.queries
+        self.max_queries = max(self.max_queries, sample.queries)
+        self.query_time += sample.query_time
+        self.http_calls += sample.http_calls
+        self.http_time += sample.http_time
+        self.response_bytes += size
+
+    def cumulative_buckets(self) -> List[int]:
+        total, cumulative = 0, []
+        for count in self.buckets:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a latency quantile from the histogram, interpolating within
+        the bucket it falls in.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, seen = 0.0, 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max_latency)
+            seen += count
+            lower = bound
+        return self.max_latency
+
+
+class RequestMetrics:
+    """
+    In-process latency, database and outbound HTTP metrics per resolved view.
+
+    Requests are measured by `RequestMetricsMiddleware`. Every worker
+    process keeps its own numbers, which are exposed by the protected
+    metrics endpoint in Prometheus text format and as JSON.
+    """
+
+    _views: Dict[Tuple[str, str], ViewMetrics] = {}
+    _lock = threading.Lock()
+    _started_at = time.time()
+
+    @staticmethod
+    def start() -> Tuple[RequestSample, ExitStack]:
+        """Starts measuring the current request."""
+        sample = RequestSample()
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(sample))
+        token = _current.set(sample)
+        stack.callback(_current.reset, token)
+        return sample, stack
+
+    @classmethod
+    def record(
+        cls, view: str, method: str, latency: float, status: int, sample: RequestSample, size: int
+    ) -> None:
+        with cls._lock:
+            metrics = cls._views.get((view, method))
+            if metrics is None:
+                metrics = cls._views[(view, method)] = ViewMetrics()
+            metrics.add(latency, status, sample, size)
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._views = {}
+            cls._started_at = time.time()
+
+    @classmethod
+    def _snapshot(cls) -> List[Tuple[str, str, ViewMetrics]]:
+        with cls._lock:
+            return sorted(
+                (view, method, metrics) for (view, method), metrics in cls._views.items()
+            )
+
+    @classmethod
+    def as_dict(cls) -> Dict:
+        views = []
+        for view, method, metrics in cls._snapshot():
+            views.append(
+                {
+                    "view": view,
+                    "method": method,
+                    "count": metrics.count,
+                    "statuses": dict(metrics.statuses),
+                    "latency": {
+                        "mean": metrics.latency / metrics.count,
+                        "p50": metrics.quantile(0.5),
+                        "p95": metrics.quantile(0.95),
+                        "p99": metrics.quantile(0.99),
+                        "max": metrics.max_latency,
+                    },
+                    "queries": {
+                        "mean": metrics.queries / metrics.count,
+                        "max": metrics.max_queries,
+                        "time": metrics.query_time,
+                    },
+                    "outbound_http": {"calls": metrics.http_calls, "time": metrics.http_time},
+                    "response_bytes": metrics.response_bytes,
+                }
+            )
+
+        views.sort(key=lambda row: row["latency"]["mean"] * row["count"], reverse=True)
+        return {"since": cls._started_at, "views": views}
+
+    @classmethod
+    def as_prometheus(cls) -> str:
+        prefix = METRIC_PREFIX
+        families = {
+            "http_request_duration_seconds": ("histogram", "Request latency by view", []),
+            "http_requests_total": ("counter", "Responses by view and status class", []),
+            "db_queries_total": ("counter", "Database queries run by view", []),
+            "db_query_duration_seconds_total": ("counter", "Time spent in database queries", []),
+            "outbound_http_requests_total": ("counter", "Outbound HTTP calls made by view", []),
+            "outbound_http_duration_seconds_total": ("counter", "Time spent in outbound HTTP calls", []),
+            "http_response_size_bytes_total": ("counter", "Bytes of response bodies", []),
+        }
+
+        for view, method, metrics in cls._snapshot():
+            labels = f'view="{_escape(view)}",method="{method}"'
+            histogram = families["http_request_duration_seconds"][2]
+            for bound, count in zip(LATENCY_BUCKETS, metrics.cumulative_buckets()):
+                histogram.append(f'{prefix}_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            histogram.append(f'{prefix}_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+            histogram.append(f"{prefix}_http_request_duration_seconds_sum{{{labels}}} {metrics.latency}")
+            histogram.append(f"{prefix}_http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+
+            for status, count in sorted(metrics.statuses.items()):
+                families["http_requests_total"][2].append(
+                    f'{prefix}_http_requests_total{{{labels},status="{status}"}} {count}'
+                )
+            for name, value in (
+                ("db_queries_total", metrics.queries),
+                ("db_query_duration_seconds_total", metrics.query_time),
+                ("outbound_http_requests_total", metrics.http_calls),
+                ("outbound_http_duration_seconds_total", metrics.http_time),
+                ("http_response_size_bytes_total", metrics.response_bytes),
+            ):
+                families[name][2].append(f"{prefix}_{name}{{{labels}}} {value}")
+
+        lines = []
+        for name, (kind, description, samples) in families.items():
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def get_view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    func = getattr(match.func, "view_class", match.func)
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+_send = HTTPAdapter.send
+
+
+def _timed_send(self, *args, **kwargs):
+    sample = _current.get()
+    if sample is None:
+        return _send(self, *args, **kwargs)
+
+    start = time.perf_counter()
+    try:
+        return _send(self, *args, **kwargs)
+    finally:
+        sample.http_calls += 1
+        sample.http_time += time.perf_counter() - start
+
+
+def instrument_requests() -> None:
+    """
+    Times the outbound calls made with `requests` while a request is being
+    measured. Calls from background threads are not attributed to a view.
+    """
+    HTTPAdapter.send = _timed_send
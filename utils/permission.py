@@ -1,21 +1,27 @@
 import datetime
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 
 import jwt
-from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpRequest
-from rest_framework import authentication
 from rest_framework.authentication import get_authorization_header
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import BasePermission
 
-from mulearnbackend.settings import SECRET_KEY
+from mulearnbackend.settings import CACHE_VERSION_TIMEOUT, SECRET_KEY
 from utils.utils import DateTimeUtils
 from .exception import UnauthorizedAccessException
 from .response import CustomResponse
 
 from db.user import DynamicRole, DynamicUser
 
+# Number of verified tokens kept so repeat requests skip the signature check
+VERIFIED_TOKEN_CAPACITY = 10000
+
 
 # def get_current_utc_time():
 #     return format_time(datetime.utcnow())
@@ -66,49 +72,95 @@ class CustomizePermission(BasePermission):
         return f'{self.token_prefix} realm="api"'
 
 
-class JWTUtils:
-    @staticmethod
-    def fetch_role(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        roles = payload.get("roles")
-        if roles is None:
-            raise Exception(
-                "The corresponding JWT token does not contain the 'roles' key"
-            )
-        return roles
+class TokenPayload:
+    """
+    Claims of a verified access token.
+
+    Attributes:
+        claims (dict): The decoded JWT payload.
+        user_id (str): The `id` claim.
+        muid (str): The `muid` claim.
+        roles (list): The `roles` claim.
+        expiry (datetime): The parsed `expiry` claim.
+    """
+
+    __slots__ = ("claims", "user_id", "muid", "roles", "expiry")
+
+    def __init__(self, claims):
+        self.claims = claims
+        self.user_id = claims.get("id")
+        self.muid = claims.get("muid")
+        self.roles = claims.get("roles")
+        self.expiry = datetime.strptime(claims.get("expiry"), "%Y-%m-%d %H:%M:%S%z")
+
+    def is_expired(self):
+        return self.expiry < DateTimeUtils.get_current_utc_time()
+
+
+class VerifiedTokenCache:
+    """
+    A bounded LRU of recently verified tokens, keyed by the SHA-256 of the
+    token so raw tokens are never held in memory. Expired entries are dropped
+    on lookup, so a cached token is never accepted past its expiry.
+    """
+
+    capacity = VERIFIED_TOKEN_CAPACITY
+    _tokens = OrderedDict()
+    _lock = threading.Lock()
 
     @staticmethod
-    def fetch_user_id(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        user_id = payload.get("id")
-        if user_id is None:
-            raise Exception(
-                "The corresponding JWT token does not contain the 'user_id' key"
-            )
-        return user_id
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def get(cls, token):
+        key = cls._key(token)
+        with cls._lock:
+            payload = cls._tokens.get(key)
+            if payload is None:
+                return None
+            if payload.is_expired():
+                del cls._tokens[key]
+                return None
+            cls._tokens.move_to_end(key)
+            return payload
+
+    @classmethod
+    def set(cls, token, payload):
+        with cls._lock:
+            cls._tokens[cls._key(token)] = payload
+            while len(cls._tokens) > cls.capacity:
+                cls._tokens.popitem(last=False)
+
+
+class JWTUtils:
+    token_prefix = "Bearer"
 
     @staticmethod
-    def fetch_muid(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        muid = payload.get("muid")
-        if muid is None:
-            raise Exception(
-                "The corresponding JWT token does not contain the 'muid' key"
-            )
-        return muid
+    def get_payload(request):
+        """
+        Returns the verified token payload of a request.
+
+        The token is decoded and validated once per request (and once per
+        VerifiedTokenCache lifetime across requests), then attached to the
+        underlying HttpRequest so the authentication class, the role
+        decorators, views and serializers all share it.
+
+        Raises:
+            UnauthorizedAccessException: If the token is missing, invalid or
+                expired.
+        """
+        http_request = getattr(request, "_request", request)
+        if (payload := getattr(http_request, "jwt_payload", None)) is not None:
+            return payload
+
+        payload = JWTUtils._verify(http_request)
+        http_request.jwt_payload = payload
+        return payload
 
     @staticmethod
-    def is_jwt_authenticated(request):
-        token_prefix = "Bearer"
+    def _verify(request):
+        token_prefix = JWTUtils.token_prefix
         secret_key = SECRET_KEY
         try:
             auth_header = get_authorization_header(request).decode("utf-8")
@@ -119,15 +171,18 @@ class JWTUtils:
             if not token:
                 raise UnauthorizedAccessException("Empty Token")
 
-            payload = jwt.decode(token, secret_key, algorithms=["HS256"], verify=True)
+            if payload := VerifiedTokenCache.get(token):
+                return payload
 
-            user_id = payload.get("id")
-            expiry = datetime.strptime(payload.get("expiry"), "%Y-%m-%d %H:%M:%S%z")
+            payload = TokenPayload(
+                jwt.decode(token, secret_key, algorithms=["HS256"], verify=True)
+            )
 
-            if not user_id or expiry < DateTimeUtils.get_current_utc_time():
+            if not payload.user_id or payload.is_expired():
                 raise UnauthorizedAccessException("Token Expired or Invalid")
 
-            return None, payload
+            VerifiedTokenCache.set(token, payload)
+            return payload
         except jwt.exceptions.InvalidSignatureError as e:
             raise UnauthorizedAccessException(
                 {
@@ -155,6 +210,37 @@ class JWTUtils:
                 }
             ) from e
 
+    @staticmethod
+    def fetch_role(request):
+        roles = JWTUtils.get_payload(request).roles
+        if roles is None:
+            raise Exception(
+                "The corresponding JWT token does not contain the 'roles' key"
+            )
+        return roles
+
+    @staticmethod
+    def fetch_user_id(request):
+        user_id = JWTUtils.get_payload(request).user_id
+        if user_id is None:
+            raise Exception(
+                "The corresponding JWT token does not contain the 'user_id' key"
+            )
+        return user_id
+
+    @staticmethod
+    def fetch_muid(request):
+        muid = JWTUtils.get_payload(request).muid
+        if muid is None:
+            raise Exception(
+                "The corresponding JWT token does not contain the 'muid' key"
+            )
+        return muid
+
+    @staticmethod
+    def is_jwt_authenticated(request):
+        return None, JWTUtils.get_payload(request).claims
+
 
 def role_required(roles):
     def decorator(view_func):
@@ -172,18 +258,73 @@ def role_required(roles):
 
     return decorator
 
+
+class DynamicPermissionCache:
+    """
+    Role titles and user ids granted each dynamic permission type, held as
+    hash sets in process memory.
+
+    Both tables are loaded in full whenever the version token in the shared
+    cache changes. Writes to DynamicRole, DynamicUser and Role replace the
+    token (see `utils.signals`), so a permission check is a cache read and a
+    set lookup. With a per-process cache the token also expires after
+    CACHE_VERSION_TIMEOUT seconds, which bounds how long other workers keep
+    a revoked permission.
+    """
+
+    version_key = "permission:dynamic:version"
+    _version = None
+    _roles = {}
+    _users = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _load(cls):
+        version = cache.get(cls.version_key)
+        if version is None:
+            cache.add(cls.version_key, uuid.uuid4().hex, timeout=CACHE_VERSION_TIMEOUT)
+            version = cache.get(cls.version_key)
+
+        if version == cls._version:
+            return
+
+        with cls._lock:
+            if version == cls._version:
+                return
+
+            roles, users = {}, {}
+            for type, role in DynamicRole.objects.values_list("type", "role__title"):
+                roles.setdefault(type, set()).add(role)
+            for type, user_id in DynamicUser.objects.values_list("type", "user_id"):
+                users.setdefault(type, set()).add(user_id)
+
+            cls._roles, cls._users, cls._version = roles, users, version
+
+    @classmethod
+    def get_roles(cls, type):
+        cls._load()
+        return cls._roles.get(type, frozenset())
+
+    @classmethod
+    def get_users(cls, type):
+        cls._load()
+        return cls._users.get(type, frozenset())
+
+    @classmethod
+    def invalidate(cls):
+        cache.set(cls.version_key, uuid.uuid4().hex, timeout=CACHE_VERSION_TIMEOUT)
+
+
 def dynamic_role_required(type):
     def decorator(view_func):
         def wrapped_view_func(obj, request, *args, **kwargs):
-            dynamic_roles = DynamicRole.objects.filter(type=type).values_list('role__title', flat=True)
-            roles = set(dynamic_roles)
+            roles = DynamicPermissionCache.get_roles(type)
             for role in JWTUtils.fetch_role(request):
                 if role in roles:
                     response = view_func(obj, request, *args, **kwargs)
                     return response
-            dynamic_users = DynamicUser.objects.filter(type=type).values_list('user__id', flat=True)
             user = JWTUtils.fetch_user_id(request)
-            if user in dynamic_users:
+            if user in DynamicPermissionCache.get_users(type):
                 response = view_func(obj, request, *args, **kwargs)
                 return response
             res = CustomResponse(
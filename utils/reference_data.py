@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from .response import CustomResponse
+
+# Upper bound on the number of snapshots a process keeps, parameterized
+# snapshots (states of a country, colleges of a district) share this budget
+SNAPSHOT_CAPACITY = 512
+VERSION_CACHE_KEY = "reference_data:version:{table}"
+
+
+class Snapshot:
+    """A pre-rendered success response for one reference data lookup."""
+
+    def __init__(self, etag: str, body: bytes) -> None:
+        self.etag = etag
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class ReferenceData:
+    """
+    Versioned snapshots of near-static tables (roles, colleges, locations,
+    dropdowns).
+
+    Every table has a version token in the shared cache that is replaced
+    whenever a row of it is saved or deleted (see `utils.signals`). A snapshot
+    is built from the database once per combination of table versions, kept in
+    process memory as rendered and gzipped JSON, and served with an ETag
+    derived from those versions. Serving a snapshot costs a single cache read.
+
+    With the default local memory cache, versions are per process, so they
+    expire after CACHE_VERSION_TIMEOUT seconds and other workers serve the old
+    snapshot until then; a shared CACHE_BACKEND makes writes visible at once.
+    """
+
+    _snapshots: "OrderedDict[Tuple, Snapshot]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(model) -> str:
+        return VERSION_CACHE_KEY.format(table=model._meta.db_table)
+
+    @classmethod
+    def get_versions(cls, models: Iterable) -> Tuple[str, ...]:
+        keys = [cls._version_key(model) for model in models]
+        versions = cache.get_many(keys)
+
+        for key in keys:
+            if key not in versions:
+                cache.add(
+                    key, uuid.uuid4().hex, timeout=settings.CACHE_VERSION_TIMEOUT
+                )
+                versions[key] = cache.get(key)
+
+        return tuple(versions[key] for key in keys)
+
+    @classmethod
+    def bump(cls, model) -> None:
+        """Invalidates every snapshot built from the table of `model`."""
+        cache.set(
+            cls._version_key(model),
+            uuid.uuid4().hex,
+            timeout=settings.CACHE_VERSION_TIMEOUT,
+        )
+
+    @classmethod
+    def get_snapshot(
+        cls,
+        name: str,
+        models: Iterable,
+        build: Callable[..., Any],
+        *args: Any,
+    ) -> Snapshot:
+        """
+        Returns the snapshot of a lookup, building it if a table changed.
+
+        Args:
+            name (str): Name of the lookup.
+            models (Iterable): Models the lookup reads from.
+            build (Callable): Returns the `response` payload of the lookup.
+            *args: Parameters of the lookup, passed on to `build`.
+        """
+        versions = cls.get_versions(models)
+        key = (name, *map(str, args))
+
+        with cls._lock:
+            snapshot = cls._snapshots.get(key)
+            if snapshot and snapshot.etag == cls._etag(key, versions):
+                cls._snapshots.move_to_end(key)
+                return snapshot
+
+        data = CustomResponse(response=build(*args)).get_success_response().data
+        snapshot = Snapshot(cls._etag(key, versions), JSONRenderer().render(data))
+
+        with cls._lock:
+            cls._snapshots[key] = snapshot
+            cls._snapshots.move_to_end(key)
+            while len(cls._snapshots) > SNAPSHOT_CAPACITY:
+                cls._snapshots.popitem(last=False)
+
+        return snapshot
+
+    @staticmethod
+    def _etag(key: Tuple, versions: Tuple[str, ...]) -> str:
+        digest = hashlib.sha1("\0".join((*key, *versions)).encode()).hexdigest()
+        return f'"{digest[:20]}"'
+
+    @classmethod
+    def get_response(
+        cls,
+        request,
+        name: str,
+        models: Iterable,
+        build: Callable[..., Dict[str, Any]],
+        *args: Any,
+    ) -> HttpResponse:
+        """
+        Serves a lookup from its snapshot, answering conditional requests
+        with 304 and gzip capable clients with the compressed body.
+        """
+        snapshot = cls.get_snapshot(name, models, build, *args)
+
+        if snapshot.etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        elif "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(snapshot.gzipped, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(snapshot.body, content_type="application/json")
+
+        response["ETag"] = snapshot.etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
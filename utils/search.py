@@ -0,0 +1,283 @@
+import abc
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, QuerySet, Subquery, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from db.organization import Organization
+from db.search import SearchReindex, SearchToken
+from db.task import Channel, InterestGroup, Level, TaskList, TaskType, UserLvlLink, VoucherLog
+from db.user import User
+
+TOKEN_PATTERN = re.compile(r"\w+")
+TOKEN_LENGTH = 64
+# Words of a search query beyond this are ignored
+MAX_QUERY_TERMS = 8
+# Rows indexed per query by SearchIndex.rebuild
+REBUILD_CHUNK_SIZE = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    return [token[:TOKEN_LENGTH] for token in TOKEN_PATTERN.findall(text.lower())]
+
+
+class SearchBackend(abc.ABC):
+    """
+    Stores the search documents of indexed models and finds rows matching a
+    query. Configured with the SEARCH_BACKEND setting.
+    """
+
+    @abc.abstractmethod
+    def index(self, model, documents: Dict[str, str]) -> None:
+        """Replaces the documents of the given primary keys."""
+
+    @abc.abstractmethod
+    def remove(self, model, pks: Iterable[str]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def clear(self, model) -> None:
+        pass
+
+    @abc.abstractmethod
+    def filter(self, queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Narrows `queryset` to the rows matching `query`, annotated with a
+        `search_rank` that is higher for better matches.
+        """
+
+
+class TokenIndexBackend(SearchBackend):
+    """
+    Inverted index in the search_token table, one row per distinct word of a
+    document with its number of occurrences.
+
+    Every word of a query has to start a word of the document, so a search
+    is one indexed range scan on (table, token) per word. Matches are ranked
+    by the occurrences of the query words.
+    """
+
+    def index(self, model, documents: Dict[str, str]) -> None:
+        table = model._meta.db_table
+        with transaction.atomic():
+            SearchToken.objects.filter(table=table, object_id__in=list(documents)).delete()
+            SearchToken.objects.bulk_create(
+                SearchToken(table=table, object_id=pk, token=token, weight=weight)
+                for pk, text in documents.items()
+                for token, weight in Counter(tokenize(text)).items()
+            )
+
+    def remove(self, model, pks: Iterable[str]) -> None:
+        SearchToken.objects.filter(table=model._meta.db_table, object_id__in=list(pks)).delete()
+
+    def clear(self, model) -> None:
+        SearchToken.objects.filter(table=model._meta.db_table).delete()
+
+    def filter(self, queryset: QuerySet, query: str) -> QuerySet:
+        terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        if not terms:
+            return queryset.none()
+
+        tokens = SearchToken.objects.filter(table=queryset.model._meta.db_table)
+        for term in terms:
+            queryset = queryset.filter(
+                pk__in=tokens.filter(token__startswith=term).values("object_id")
+            )
+
+        any_term = Q()
+        for term in terms:
+            any_term |= Q(token__startswith=term)
+
+        return queryset.annotate(
+            search_rank=Subquery(
+                tokens.filter(any_term, object_id=OuterRef("pk"))
+                .values("object_id")
+                .annotate(rank=Sum("weight"))
+                .values("rank")
+            )
+        )
+
+
+class SearchIndex:
+    """
+    Registry of the models whose list endpoints search through the search
+    backend instead of `icontains` over every column.
+
+    A model's document is the text of the fields it was registered with,
+    which may follow relations. Rows are re-indexed when they are saved
+    (see `utils.signals`). Saving a row of a related model listed in
+    `dependents` queues it in search_reindex_queue, and the worker
+    re-indexes the documents depending on it with
+    `rebuild_search_index --pending`, as there may be thousands. The
+    rebuild_search_index command indexes existing rows.
+
+    Nothing is indexed or searched through the index while SEARCH_BACKEND
+    is empty.
+    """
+
+    _documents: Dict = {}
+    _dependents: Dict = defaultdict(list)
+    _backend = None
+
+    @classmethod
+    def register(cls, model, fields: Iterable[str], dependents: Dict = None) -> None:
+        """
+        Args:
+            model: Model to index.
+            fields (Iterable): Field paths the document is made of.
+            dependents (Dict): Related models whose changes alter the
+                document, mapped to the lookup from `model` to them.
+        """
+        cls._documents[model] = tuple(fields)
+        for related, lookup in (dependents or {}).items():
+            cls._dependents[related].append((model, lookup))
+
+    @classmethod
+    def get_models(cls) -> Tuple:
+        return tuple(cls._documents)
+
+    @classmethod
+    def get_related_models(cls) -> Tuple:
+        return tuple(cls._dependents)
+
+    @classmethod
+    def get_dependents(cls, related) -> List[Tuple]:
+        return cls._dependents.get(related, [])
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return bool(settings.SEARCH_BACKEND)
+
+    @classmethod
+    def is_indexed(cls, model) -> bool:
+        return cls.is_enabled() and model in cls._documents
+
+    @classmethod
+    def get_backend(cls) -> SearchBackend:
+        if cls._backend is None:
+            cls._backend = import_string(settings.SEARCH_BACKEND)()
+        return cls._backend
+
+    @classmethod
+    def get_documents(cls, model, pks: Iterable[str]) -> Dict[str, str]:
+        fields = cls._documents[model]
+        documents = defaultdict(list)
+        for row in model.objects.filter(pk__in=list(pks)).values_list("pk", *fields):
+            documents[row[0]].extend(str(value) for value in row[1:] if value is not None)
+
+        return {pk: " ".join(values) for pk, values in documents.items()}
+
+    @classmethod
+    def reindex(cls, model, pks: Iterable[str]) -> None:
+        pks = list(pks)
+        documents = cls.get_documents(model, pks)
+        backend = cls.get_backend()
+        backend.remove(model, [pk for pk in pks if pk not in documents])
+        backend.index(model, documents)
+
+    @classmethod
+    def remove(cls, model, pks: Iterable[str]) -> None:
+        cls.get_backend().remove(model, pks)
+
+    @classmethod
+    def rebuild(cls, model, chunk_size: int = REBUILD_CHUNK_SIZE) -> int:
+        cls.get_backend().clear(model)
+        return cls._reindex_queryset(model.objects.all(), chunk_size)
+
+    @classmethod
+    def _reindex_queryset(cls, queryset: QuerySet, chunk_size: int = REBUILD_CHUNK_SIZE) -> int:
+        backend = cls.get_backend()
+        count = 0
+        last_pk = None
+        while True:
+            chunk = queryset.order_by("pk")
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list("pk", flat=True)[:chunk_size])
+            if not pks:
+                return count
+
+            backend.index(queryset.model, cls.get_documents(queryset.model, pks))
+            count += len(pks)
+            last_pk = pks[-1]
+
+    @classmethod
+    def queue_dependents(cls, related, pk) -> None:
+        """Queues the re-indexing of the documents depending on a related row."""
+        SearchReindex.objects.create(
+            table=related._meta.db_table,
+            object_id=pk,
+            created_at=timezone.now(),
+        )
+
+    @classmethod
+    def reindex_queued(cls, batch_size: int = 100) -> int:
+        """
+        Re-indexes the documents depending on a batch of queued rows.
+
+        :return: The number of queued rows handled.
+        """
+        related_models = {model._meta.db_table: model for model in cls._dependents}
+        queued = list(SearchReindex.objects.order_by("id")[:batch_size])
+        for table, pk in dict.fromkeys((row.table, row.object_id) for row in queued):
+            if related := related_models.get(table):
+                for model, lookup in cls._dependents[related]:
+                    cls._reindex_queryset(model.objects.filter(**{lookup: pk}))
+        SearchReindex.objects.filter(id__in=[row.id for row in queued]).delete()
+        return len(queued)
+
+    @classmethod
+    def filter(cls, queryset: QuerySet, query: str) -> QuerySet:
+        return cls.get_backend().filter(queryset, query)
+
+
+SearchIndex.register(
+    TaskList,
+    [
+        "hashtag",
+        "title",
+        "description",
+        "event",
+        "channel__name",
+        "type__title",
+        "level__name",
+        "org__title",
+        "ig__name",
+    ],
+    dependents={
+        Channel: "channel",
+        TaskType: "type",
+        Level: "level",
+        Organization: "org",
+        InterestGroup: "ig",
+    },
+)
+SearchIndex.register(
+    User,
+    [
+        "muid",
+        "first_name",
+        "last_name",
+        "email",
+        "mobile",
+        "user_lvl_link_user__level__name",
+    ],
+    dependents={UserLvlLink: "user_lvl_link_user"},
+)
+SearchIndex.register(
+    VoucherLog,
+    [
+        "code",
+        "month",
+        "week",
+        "user__first_name",
+        "user__last_name",
+        "task__title",
+    ],
+    dependents={User: "user", TaskList: "task"},
+)
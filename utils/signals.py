@@ -0,0 +1,81 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from db.organization import Country, Department, District, Organization, State, Zone
+from db.task import Channel, InterestGroup, Level
+from db.user import DynamicRole, DynamicUser, Role
+from .permission import DynamicPermissionCache
+from .reference_data import ReferenceData
+from .search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_MODELS = (
+    Channel,
+    Country,
+    Department,
+    District,
+    InterestGroup,
+    Level,
+    Organization,
+    Role,
+    State,
+    Zone,
+)
+
+
+def reference_data_changed(sender, **kwargs):
+    transaction.on_commit(lambda: ReferenceData.bump(sender))
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_data_changed, sender=model)
+    post_delete.connect(reference_data_changed, sender=model)
+
+
+def dynamic_permission_changed(sender, **kwargs):
+    transaction.on_commit(DynamicPermissionCache.invalidate)
+
+
+for model in (DynamicRole, DynamicUser, Role):
+    post_save.connect(dynamic_permission_changed, sender=model)
+    post_delete.connect(dynamic_permission_changed, sender=model)
+
+
+def reindex_after_commit(action):
+    """
+    Runs a search index update once the transaction commits. A failure is
+    logged instead of raised, the row itself is already saved and the
+    index is caught up by rebuild_search_index.
+    """
+
+    def run():
+        try:
+            action()
+        except Exception:
+            logger.exception("Search index update failed")
+
+    transaction.on_commit(run)
+
+
+def search_document_saved(sender, instance, **kwargs):
+    reindex_after_commit(lambda: SearchIndex.reindex(sender, [instance.pk]))
+
+
+def search_document_deleted(sender, instance, **kwargs):
+    reindex_after_commit(lambda: SearchIndex.remove(sender, [instance.pk]))
+
+
+def search_dependency_saved(sender, instance, **kwargs):
+    SearchIndex.queue_dependents(sender, instance.pk)
+
+
+if SearchIndex.is_enabled():
+    for model in SearchIndex.get_models():
+        post_save.connect(search_document_saved, sender=model)
+        post_delete.connect(search_document_deleted, sender=model)
+
+    for model in SearchIndex.get_related_models():
+        post_save.connect(search_dependency_saved, sender=model)
@@ -0,0 +1,399 @@
+import datetime
+import importlib
+import pkgutil
+import random
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models, transaction
+
+import db
+from .types import Events, IntegrationType, OrganizationType, RoleType
+
+# Rows of reference tables, independent of the number of users
+REFERENCE_COUNTS = {
+    "Country": 3,
+    "State": 12,
+    "Zone": 24,
+    "District": 60,
+    "OrgAffiliation": 8,
+    "Organization": 400,
+    "Department": 30,
+    "Role": len(RoleType),
+    "Level": 7,
+    "Channel": 12,
+    "InterestGroup": 20,
+    "TaskType": 8,
+    "TaskList": 500,
+    "Integration": len(IntegrationType),
+    "DynamicRole": 10,
+}
+# Rows per user of every other populated table
+USER_PROPORTIONS = {
+    "User": 1,
+    "Wallet": 1,
+    "UserLvlLink": 1,
+    "UserSettings": 1,
+    "UserOrganizationLink": 1,
+    "UserRoleLink": 1.2,
+    "UserIgLink": 2,
+    "Socials": 0.3,
+    "UserReferralLink": 0.3,
+    "KarmaActivityLog": 20,
+    "MucoinActivityLog": 0.2,
+    "LearningCircle": 0.02,
+    "UserCircleLink": 0.3,
+    "VoucherLog": 0.1,
+    "Hackathon": 0.002,
+    "HackathonForm": 0.005,
+    "HackathonOrganiserLink": 0.002,
+    "HackathonUserSubmission": 0.05,
+    "UrlShortener": 0.001,
+    "UrlShortenerTracker": 1,
+    "Notification": 1,
+    "IntegrationAuthorization": 0.05,
+    "DynamicUser": 0.001,
+}
+# Foreign keys pick parents with this skew, so a few users, circles and
+# organisations own most rows as in production
+PARENT_SKEW = 2.5
+# Share of NULLs in nullable columns, foreign keys and JSON are always set
+NULL_RATIO = 0.1
+# Columns the code expects to be unique together without a constraint
+NATURAL_KEYS = {
+    "UserCircleLink": [("user", "circle")],
+    "UserOrganizationLink": [("user", "org")],
+    "UserRoleLink": [("user", "role")],
+}
+# The subject user owns every tenth row of a per-user table, up to this many
+SUBJECT_ROWS = 200
+BATCH_SIZE = 5000
+# Settings relaxed while a dataset is loaded, and restored afterwards
+BULK_LOAD_SETTINGS = {
+    "sqlite": [("PRAGMA synchronous = OFF", "PRAGMA synchronous = FULL")],
+    "mysql": [
+        ("SET foreign_key_checks = 0", "SET foreign_key_checks = 1"),
+        ("SET unique_checks = 0", "SET unique_checks = 1"),
+    ],
+}
+# Management commands that fill the tables derived from the generated rows
+DERIVED_TABLE_COMMANDS = (
+    ("rebuild_leaderboards",),
+    ("rollup_monthly_karma",),
+    ("refresh_event_leaderboards", "--rebuild"),
+    ("refresh_ig_karma", "--rebuild"),
+)
+if settings.SEARCH_BACKEND:
+    DERIVED_TABLE_COMMANDS += (("rebuild_search_index",),)
+WORDS = (
+    "learn build open web data cloud design mobile python rust game ai robotics "
+    "security iot maker art karma circle campus music community network systems"
+).split()
+
+
+class SyntheticDataset:
+    """
+    Reproducible rows for the unmanaged models in `db`.
+
+    Every model is filled in foreign key order. Values are derived from the
+    field types, with a few overrides for columns the code filters on
+    (role titles, organisation types, events, levels), so the same seed
+    always produces the same data. Rows are made and inserted a batch at a
+    time, so only the primary keys of referenced tables stay in memory.
+
+    The first user is the subject of the dataset: it is linked to a college
+    and owns every tenth row of the per-user tables, up to SUBJECT_ROWS.
+    """
+
+    def __init__(
+            self, users: int, seed: int = 0, proportions: Optional[Dict[str, float]] = None,
+            reference_scale: float = 1, batch_size: int = BATCH_SIZE, using: str = "default") -> None:
+        self.users = users
+        self.reference_scale = reference_scale
+        self.rng = random.Random(seed)
+        self.proportions = {**USER_PROPORTIONS, **(proportions or {})}
+        self.batch_size = batch_size
+        self.using = using
+        self.now = datetime.datetime(2023, 7, 1, tzinfo=datetime.timezone.utc)
+        self.pks: Dict = {}
+        self.counts: Dict[str, int] = {}
+
+    @staticmethod
+    def get_models() -> List:
+        """Models of `db`, each after the models it references."""
+        for module in pkgutil.iter_modules(db.__path__):
+            importlib.import_module(f"db.{module.name}")
+
+        pending = list(apps.get_app_config("db").get_models())
+        ordered = []
+        while pending:
+            for model in pending:
+                parents = {
+                    field.related_model
+                    for field in model._meta.concrete_fields
+                    if field.is_relation and field.related_model is not model
+                }
+                if parents <= set(ordered):
+                    ordered.append(model)
+                    pending.remove(model)
+                    break
+            else:
+                raise ValueError(f"Circular references between {pending}")
+        return ordered
+
+    @staticmethod
+    def create_schema(using: str = "default") -> List[str]:
+        """Creates the missing tables of the unmanaged models."""
+        connection = connections[using]
+        existing = set(connection.introspection.table_names())
+        created = []
+        with connection.schema_editor() as editor:
+            for model in SyntheticDataset.get_models():
+                if model._meta.db_table not in existing:
+                    editor.create_model(model)
+                    created.append(model._meta.db_table)
+        return created
+
+    def get_count(self, model) -> int:
+        name = model.__name__
+        if name in REFERENCE_COUNTS and name not in self.proportions:
+            return int(REFERENCE_COUNTS[name] * self.reference_scale)
+        proportion = self.proportions.get(name, 0)
+        # Rare tables still get a row, so the rows referencing them can be made
+        return max(int(self.users * proportion), 1) if proportion and self.users else 0
+
+    @staticmethod
+    @contextmanager
+    def bulk_load(using: str = "default"):
+        """Turns off the durability and constraint checks that slow down loading."""
+        connection = connections[using]
+        statements = BULK_LOAD_SETTINGS.get(connection.vendor, [])
+        with connection.cursor() as cursor:
+            for relax, _ in statements:
+                cursor.execute(relax)
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                for _, restore in statements:
+                    cursor.execute(restore)
+
+    def generate(self, progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """
+        Inserts the dataset and returns the number of rows per table.
+
+        Args:
+            progress (Callable): Called with the table name and the rows
+                inserted so far after every batch.
+        """
+        referenced = {
+            field.related_model
+            for model in self.get_models()
+            for field in model._meta.concrete_fields
+            if field.is_relation
+        }
+        for model in self.get_models():
+            count = self.get_count(model)
+            if not count:
+                continue
+
+            columns = self._columns(model)
+            fields = [field for field, _ in columns]
+            pk_index = fields.index(model._meta.pk) if model._meta.pk in fields else None
+            keep = model in referenced and pk_index is not None
+            pks = []
+            inserted = 0
+            for batch in self._batches(model, columns, count):
+                self._insert(model, fields, batch)
+                inserted += len(batch)
+                if keep:
+                    pks.extend(row[pk_index] for row in batch)
+                if progress:
+                    progress(model._meta.db_table, inserted)
+            if keep:
+                self.pks[model] = pks
+            self.counts[model._meta.db_table] = inserted
+
+        return self.counts
+
+    def _insert(self, model, fields: List, rows: List[tuple]) -> None:
+        # Rows go straight to executemany, the ORM's per-value compilation
+        # costs more than generating them
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(field.column) for field in fields),
+            ", ".join(["%s"] * len(fields)),
+        )
+        adapters = [self._adapter(field, connection) for field in fields]
+        if any(adapters):
+            rows = [
+                tuple(adapt(value) if adapt else value for adapt, value in zip(adapters, row))
+                for row in rows
+            ]
+        with transaction.atomic(using=self.using), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    @staticmethod
+    def _adapter(field, connection) -> Optional[Callable]:
+        target = field.target_field if field.is_relation else field
+        if isinstance(target, (models.CharField, models.TextField, models.IntegerField, models.BooleanField)):
+            return None
+        return lambda value: target.get_db_prep_save(value, connection)
+
+    def _columns(self, model) -> List[tuple]:
+        """Inserted fields of `model`, each with a function making its value from the row index."""
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not isinstance(field, models.AutoField)
+        ]
+        return [(field, self._column(model, field)) for field in fields]
+
+    def _batches(self, model, columns: List[tuple], count: int) -> Iterator[List[tuple]]:
+        fields = [field for field, _ in columns]
+        one_to_one = [
+            len(self.pks.get(field.related_model, []))
+            for field in fields
+            if isinstance(field, models.OneToOneField)
+        ]
+        if one_to_one:
+            count = min([count, *one_to_one])
+
+        unique_together = [
+            tuple(fields.index(model._meta.get_field(name)) for name in names)
+            for names in [*model._meta.unique_together, *NATURAL_KEYS.get(model.__name__, ())]
+        ]
+        seen = defaultdict(set)
+
+        makers = [make for _, make in columns]
+        batch = []
+        for index in range(count):
+            row = tuple(make(index) for make in makers)
+
+            if any(
+                tuple(row[position] for position in positions) in seen[positions]
+                for positions in unique_together
+            ):
+                continue
+            for positions in unique_together:
+                seen[positions].add(tuple(row[position] for position in positions))
+
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _shuffled(self, model) -> List:
+        pks = list(self.pks.get(model, []))
+        self.rng.shuffle(pks)
+        return pks
+
+    def _parent(self, index: int, field):
+        if field.related_model is field.model:
+            return None
+        pks = self.pks.get(field.related_model)
+        if not pks:
+            return None
+        if field.related_model.__name__ == "User" and index % 10 == 0 and index < SUBJECT_ROWS * 10:
+            return pks[0]
+        return pks[int(len(pks) * self.rng.random() ** PARENT_SKEW)]
+
+    def _column(self, model, field) -> Callable[[int], object]:
+        rng = self.rng
+        override = OVERRIDES.get((model.__name__, field.name))
+        if override is not None:
+            return lambda index: override(self, index, field)
+
+        if field.primary_key:
+            if isinstance(field, models.UUIDField):
+                return lambda index: uuid.UUID(int=rng.getrandbits(128), version=4)
+            return lambda index: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        if isinstance(field, models.OneToOneField):
+            return self._shuffled(field.related_model).__getitem__
+        if field.is_relation:
+            return lambda index: self._parent(index, field)
+        if field.unique:
+            return lambda index: self._unique(field, index)
+        if isinstance(field, models.JSONField):
+            return lambda index: {}
+
+        make = self._typed_column(field)
+        if field.null:
+            return lambda index: None if rng.random() < NULL_RATIO else make(index)
+        return make
+
+    def _typed_column(self, field) -> Callable[[int], object]:
+        rng = self.rng
+        if field.choices:
+            choices = [value for value, _ in field.choices]
+            return lambda index: rng.choice(choices)
+        if isinstance(field, models.BooleanField):
+            return lambda index: rng.random() < 0.7
+        if isinstance(field, (models.IntegerField, models.FloatField)):
+            return lambda index: rng.randint(1, 200)
+        if isinstance(field, models.DateTimeField):
+            return lambda index: self.now - datetime.timedelta(seconds=rng.randint(0, 2 * 365 * 86400))
+        if isinstance(field, models.DateField):
+            start = datetime.date(2000, 1, 1)
+            return lambda index: start + datetime.timedelta(days=rng.randint(0, 3650))
+        if isinstance(field, (models.CharField, models.TextField)):
+            max_length = field.max_length or 200
+            return lambda index: self._text(max_length)
+        return lambda index: field.get_default()
+
+    def _unique(self, field, index: int) -> str:
+        if isinstance(field, models.EmailField):
+            return f"user{index}@example.com"
+        value = f"{field.name[:4]}{index}"
+        return value[-field.max_length:] if field.max_length else value
+
+    def _text(self, max_length: int) -> str:
+        words = self.rng.sample(WORDS, self.rng.randint(1, 4))
+        return " ".join(words)[:max_length]
+
+
+def _cycle(values):
+    return lambda dataset, index, field: values[index % len(values)]
+
+
+def _subject_college(dataset, index, field):
+    # The second organisation is always a college
+    if index == 0:
+        return dataset.pks[field.related_model][1]
+    return dataset._parent(index, field)
+
+
+OVERRIDES = {
+    ("User", "muid"): lambda dataset, index, field: f"user{index}@mulearn",
+    ("User", "first_name"): lambda dataset, index, field: f"User{index}",
+    ("User", "mobile"): lambda dataset, index, field: str(9000000000 + index),
+    ("Role", "title"): _cycle([role.value for role in RoleType]),
+    ("Level", "name"): lambda dataset, index, field: f"lvl{index + 1}",
+    ("Level", "level_order"): lambda dataset, index, field: index + 1,
+    ("Level", "karma"): lambda dataset, index, field: index * 1000,
+    ("Organization", "org_type"): lambda dataset, index, field: (
+        OrganizationType.COLLEGE.value if index % 4
+        else dataset.rng.choice([OrganizationType.COMPANY.value, OrganizationType.COMMUNITY.value])
+    ),
+    ("Organization", "code"): lambda dataset, index, field: f"ORG{index}",
+    ("InterestGroup", "name"): lambda dataset, index, field: f"Interest Group {index}",
+    ("InterestGroup", "code"): lambda dataset, index, field: f"IG{index}",
+    ("TaskList", "hashtag"): lambda dataset, index, field: f"#task{index}",
+    ("TaskList", "event"): lambda dataset, index, field: (
+        dataset.rng.choice(Events.get_all_values()) if index % 10 == 0 else None
+    ),
+    ("Hackathon", "status"): lambda dataset, index, field: "Draft" if index % 5 == 0 else "Published",
+    ("Integration", "token"): lambda dataset, index, field: uuid.UUID(int=dataset.rng.getrandbits(128)).hex,
+    ("IntegrationAuthorization", "integration_value"): lambda dataset, index, field: str(100000 + index),
+    ("Integration", "name"): _cycle([integration.value for integration in IntegrationType]),
+    ("KarmaActivityLog", "appraiser_approved"): lambda dataset, index, field: dataset.rng.random() < 0.9,
+    ("UserCircleLink", "accepted"): lambda dataset, index, field: dataset.rng.random() < 0.9,
+    ("UserOrganizationLink", "org"): _subject_college,
+}
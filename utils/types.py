@@ -51,6 +51,19 @@ class OrganizationType(Enum):
     COMMUNITY = 'Community'
 
 
+class EmailStatus(Enum):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+
+class KarmaAggregateLevel(Enum):
+    ORGANIZATION = 'org'
+    DISTRICT = 'district'
+    ZONE = 'zone'
+    STATE = 'state'
+
+
 class WebHookActions(Enum):
     SEPARATOR = '<|=|>'
     CREATE = 'create'
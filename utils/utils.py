@@ -1,28 +1,71 @@
+import atexit
+import base64
 import csv
 import datetime
 import gzip
 import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
 
 import decouple
 import openpyxl
 import pytz
 import requests
 from decouple import config
-from django.core.mail import send_mail
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q
 from django.db.models.query import QuerySet
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
-from django.core.mail import EmailMessage
+from rest_framework import serializers
 from datetime import timedelta
 
+from db.notification import EmailOutbox
+from .exception import CustomException
+from .search import SearchIndex
+from .types import EmailStatus
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per query by CommonUtils.generate_csv_stream
+CSV_CHUNK_SIZE = 2000
+# Rows validated and inserted together by ImportCSV.import_rows
+IMPORT_CHUNK_SIZE = 500
+# Inserts of a chunk retried by ImportCSV.import_rows after a unique conflict
+IMPORT_RETRIES = 3
+
 
 class CommonUtils:
     @staticmethod
     def get_paginated_queryset(
-            queryset: QuerySet, request, search_fields, sort_fields: dict = None
+            queryset: QuerySet, request, search_fields, sort_fields: dict = None,
+            allow_cursor: bool = False, indexed_search: bool = False
             ) -> QuerySet:
+        """
+        Filters, sorts and paginates a queryset from the query parameters.
+
+        Pages are numbered (`pageIndex`) by default. Views that pass
+        `allow_cursor` also accept a `cursor` parameter, empty for the first
+        page, which switches to keyset pagination: pages are fetched by
+        seeking past the sort key and primary key of the previous page, so
+        they cost the same at any depth. The total count is only computed in
+        that mode when `withCount=true` is sent. Querysets paginated by cursor
+        must yield their primary key (include it in `values()`).
+
+        With `indexed_search`, models registered in `SearchIndex` are searched
+        through the search backend instead of `search_fields`, and matches
+        are ranked unless another sort is requested.
+        """
         if sort_fields is None:
             sort_fields = { }
 
@@ -30,14 +73,19 @@ class CommonUtils:
         per_page = int(request.query_params.get("perPage", 10))
         search_query = request.query_params.get("search")
         sort_by = request.query_params.get("sortBy")
+        cursor = request.query_params.get("cursor")
 
-        if search_query:
+        ranked = indexed_search and bool(search_query) and SearchIndex.is_indexed(queryset.model)
+        if ranked:
+            queryset = SearchIndex.filter(queryset, search_query).order_by("-search_rank", "pk")
+        elif search_query:
             query = Q()
             for field in search_fields:
                 query |= Q(**{ f"{field}__icontains": search_query })
 
             queryset = queryset.filter(query)
 
+        sort_field_name = None
         if sort_by:
             sort = sort_by[1:] if sort_by.startswith("-") else sort_by
             if sort_field_name := sort_fields.get(sort):
@@ -46,6 +94,12 @@ class CommonUtils:
 
                 queryset = queryset.order_by(sort_field_name)
 
+        if allow_cursor and cursor is not None:
+            return CommonUtils._get_cursor_page(
+                queryset, cursor, per_page, sort_field_name,
+                request.query_params.get("withCount") == "true"
+                )
+
         paginator = Paginator(queryset, per_page)
         try:
             queryset = paginator.page(page)
@@ -67,6 +121,120 @@ class CommonUtils:
                 },
             }
 
+    @staticmethod
+    def _get_cursor_page(
+            queryset: QuerySet, cursor: str, per_page: int, sort_field_name: str = None,
+            with_count: bool = False) -> dict:
+        descending = bool(sort_field_name and sort_field_name.startswith("-"))
+        key = sort_field_name.lstrip("-") if sort_field_name else None
+        pk = queryset.model._meta.pk.attname
+        if key in (pk, "pk"):
+            key = None
+
+        ordering = [F(field) for field in (key, pk) if field]
+        if connections[queryset.db].features.nulls_order_largest:
+            # Keeps NULL keys first, as MySQL and SQLite sort them natively
+            ordering = [
+                field.desc(nulls_last=True) if descending else field.asc(nulls_first=True)
+                for field in ordering
+                ]
+        else:
+            ordering = [field.desc() if descending else field.asc() for field in ordering]
+
+        count = queryset.count() if with_count else None
+        signature = sort_field_name or pk
+        position = CommonUtils._decode_cursor(cursor, signature)
+
+        page_queryset = queryset.order_by(*ordering)
+        if position is not None:
+            page_queryset = page_queryset.filter(
+                CommonUtils._seek(key, pk, *position, descending)
+                )
+
+        rows = list(page_queryset[:per_page + 1])
+        is_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+        next_cursor = None
+        if is_next:
+            last = rows[-1]
+            next_cursor = CommonUtils._encode_cursor(
+                signature,
+                CommonUtils._get_row_value(last, key) if key else None,
+                CommonUtils._get_row_value(last, pk),
+                )
+
+        return {
+            "queryset": rows,
+            "pagination": {
+                "count": count,
+                "totalPages": -(-count // per_page) if count is not None else None,
+                "isNext": is_next,
+                "isPrev": position is not None,
+                "nextPage": None,
+                "nextCursor": next_cursor,
+                },
+            }
+
+    @staticmethod
+    def _seek(key, pk, value, last_pk, descending: bool) -> Q:
+        """
+        The rows after (value, last_pk) in the page order, NULL keys sorting
+        before every other key.
+        """
+        after = "lt" if descending else "gt"
+        pk_after = Q(**{ f"{pk}__{after}": last_pk })
+        if key is None:
+            return pk_after
+
+        if value is None:
+            if descending:
+                return Q(**{ f"{key}__isnull": True }) & pk_after
+            return Q(**{ f"{key}__isnull": False }) | (Q(**{ f"{key}__isnull": True }) & pk_after)
+
+        seek = Q(**{ f"{key}__{after}": value }) | (Q(**{ key: value }) & pk_after)
+        if descending:
+            seek |= Q(**{ f"{key}__isnull": True })
+        return seek
+
+    @staticmethod
+    def _encode_cursor(signature: str, value, last_pk) -> str:
+        # str() keeps the microseconds of datetimes, which the seek compares on
+        data = json.dumps([signature, value, last_pk], default=str)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, signature: str):
+        """
+        Returns the (key, primary key) a cursor points after, or None for the
+        first page. Cursors that are malformed or were issued for another
+        sort order restart from the first page.
+        """
+        if not cursor:
+            return None
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_signature, value, last_pk = json.loads(data)
+        except (ValueError, TypeError):
+            return None
+        if cursor_signature != signature or last_pk is None:
+            return None
+        return value, last_pk
+
+    @staticmethod
+    def _get_row_value(row, path: str):
+        if isinstance(row, dict):
+            return row.get(path)
+        value = row
+        for attr in path.split("__"):
+            try:
+                value = getattr(value, attr)
+            except ObjectDoesNotExist:
+                return None
+            if value is None:
+                return None
+        return value
+
     @staticmethod
     def generate_csv(queryset: QuerySet, csv_name: str) -> HttpResponse:
         response = HttpResponse(content_type="text/csv")
@@ -87,6 +255,93 @@ class CommonUtils:
 
         return compressed_response
 
+    @staticmethod
+    def generate_csv_stream(
+            queryset: QuerySet, columns: dict, csv_name: str, fields: list = None,
+            key: str = "pk", chunk_size: int = CSV_CHUNK_SIZE) -> StreamingHttpResponse:
+        """
+        Streams a queryset as a gzip compressed CSV without loading it whole.
+
+        Rows are read `chunk_size` at a time with keyset pagination on `key`,
+        written to CSV and compressed as they are produced, so memory use does
+        not grow with the size of the export. The key does not have to be
+        unique: joins over multi-valued relations repeat the primary key, so
+        the rows sharing the last key of a chunk are always read together
+        with the next chunk.
+
+        :param queryset: The rows to export, annotated with anything the
+        columns read
+        :param columns: CSV header -> a `values()` lookup, or a callable that
+        takes the row dict
+        :param csv_name: Name of the downloaded file, without extension
+        :param fields: Extra lookups that only the callables read
+        :param key: Non-null lookup the rows are paged on
+        :param chunk_size: Number of rows fetched per query
+        """
+        lookups = list(dict.fromkeys(
+            [source for source in columns.values() if isinstance(source, str)]
+            + list(fields or [])
+            ))
+        queryset = queryset.values(key, *lookups).order_by(key)
+        datetime_field = serializers.DateTimeField()
+
+        def to_csv_value(value):
+            if isinstance(value, datetime.datetime):
+                return datetime_field.to_representation(value)
+            return value
+
+        def rows():
+            last_key = None
+            while True:
+                chunk = queryset
+                if last_key is not None:
+                    chunk = chunk.filter(**{f"{key}__gt": last_key})
+                chunk = list(chunk[:chunk_size])
+                if not chunk:
+                    return
+                if len(chunk) == chunk_size:
+                    # The rows of the last key may go on past the chunk
+                    complete = [row for row in chunk if row[key] != chunk[-1][key]]
+                    chunk = complete or list(queryset.filter(**{key: chunk[-1][key]}))
+                yield from chunk
+                last_key = chunk[-1][key]
+
+        def content():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+            def drain():
+                data = compressor.compress(buffer.getvalue().encode())
+                buffer.seek(0)
+                buffer.truncate()
+                return data
+
+            writer.writerow(columns.keys())
+            for count, row in enumerate(rows(), start=1):
+                writer.writerow(
+                    to_csv_value(source(row) if callable(source) else row[source])
+                    for source in columns.values()
+                    )
+                if count % chunk_size == 0 and (data := drain()):
+                    yield data
+
+            yield drain() + compressor.flush()
+
+        response = StreamingHttpResponse(content(), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{csv_name}.csv"'
+        response["Content-Encoding"] = "gzip"
+
+        return response
+
+    @staticmethod
+    def get_fullname(first_name, last_name):
+        """Same as `User.fullname`, for rows read with `values()`."""
+        if last_name is None:
+            return first_name
+
+        return f"{first_name} {last_name}"
+
 
 class DateTimeUtils:
     """
@@ -139,11 +394,144 @@ class _CustomHTTPHandler:
         )
 
 
+class _WebhookDispatcher:
+    """
+    Delivers Discord webhook messages from a background thread.
+
+    Messages wait in a bounded queue. The sender collects everything that
+    arrives within COALESCE_WINDOW of the first message, drops repeats of the
+    message right before them and posts the rest in order over one HTTP
+    session. Only back to back repeats are dropped, so an event that recurs
+    after a different one (create, delete, create) is still posted. Each
+    message stays a separate post, because the bot reading the channel
+    parses one `category<|=|>action<|=|>values` event per message. 429
+    responses are retried after the delay Discord asks for, other failures
+    with exponential backoff. Messages still queued when the process exits
+    are posted for up to SHUTDOWN_TIMEOUT seconds.
+    """
+
+    QUEUE_SIZE = 1000
+    COALESCE_WINDOW = 2
+    REQUEST_TIMEOUT = 5
+    MAX_ATTEMPTS = 5
+    BASE_RETRY_DELAY = 1
+    SHUTDOWN_TIMEOUT = 10
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.closing = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        atexit.register(self.close)
+
+    def submit(self, content):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(content)
+        except queue.Full:
+            logger.error("Discord webhook queue is full, dropping: %s", content)
+
+    def _ensure_started(self):
+        # Worker processes forked after the first submit need their own thread
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid != os.getpid() or not self.thread.is_alive():
+                if self.pid != os.getpid():
+                    self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+                    self.closing = threading.Event()
+                self.thread = threading.Thread(
+                    target=self._run, name="discord-webhooks", daemon=True
+                    )
+                self.pid = os.getpid()
+                self.thread.start()
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.COALESCE_WINDOW
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                if self.closing.is_set():
+                    content = self.queue.get_nowait()
+                else:
+                    content = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if content == batch[-1]:
+                self.queue.task_done()
+            else:
+                batch.append(content)
+        return batch
+
+    def _run(self):
+        session = requests.Session()
+        while True:
+            for content in self._collect():
+                try:
+                    self._post(session, content)
+                except Exception as e:
+                    logger.error("Discord webhook failed: %s (%s)", content, e)
+                finally:
+                    self.queue.task_done()
+
+    def _post(self, session, content):
+        url = config("DISCORD_WEBHOOK_LINK")
+        for attempt in range(self.MAX_ATTEMPTS):
+            try:
+                response = session.post(
+                    url, json={ "content": content }, timeout=self.REQUEST_TIMEOUT
+                    )
+            except requests.RequestException:
+                if attempt + 1 == self.MAX_ATTEMPTS:
+                    raise
+                time.sleep(self.BASE_RETRY_DELAY * 2 ** attempt)
+                continue
+
+            if response.status_code == 429:
+                time.sleep(self._retry_after(response))
+            elif response.status_code >= 500:
+                time.sleep(self.BASE_RETRY_DELAY * 2 ** attempt)
+            else:
+                response.raise_for_status()
+                return
+        raise requests.HTTPError(f"Gave up after {self.MAX_ATTEMPTS} attempts")
+
+    def _retry_after(self, response):
+        try:
+            return float(response.json()["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return float(response.headers.get("Retry-After", self.BASE_RETRY_DELAY))
+
+    def flush(self, timeout=None):
+        """Waits until every queued message is posted, for tests and graceful shutdown."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self):
+        """Posts what is still queued without waiting out the coalesce window."""
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            return
+        self.closing.set()
+        if not self.flush(self.SHUTDOWN_TIMEOUT):
+            logger.error(
+                "Discord webhook queue not drained at exit, %d messages lost",
+                self.queue.unfinished_tasks,
+                )
+
+
 class DiscordWebhooks:
+    dispatcher = _WebhookDispatcher()
+
     @staticmethod
     def general_updates(category, action, *values) -> str:
         """
-        Modify channels and category in Discord
+        Modify channels and category in Discord, the message is posted in the
+        background by `_WebhookDispatcher`
                 Args:
         category(str): Category of webhook
         action(str): action of webhook
@@ -152,29 +540,292 @@ class DiscordWebhooks:
         content = f"{category}<|=|>{action}"
         for value in values:
             content = f"{content}<|=|>{value}"
-        url = config("DISCORD_WEBHOOK_LINK")
-        data = { "content": content }
-        requests.post(url, json=data)
+        DiscordWebhooks.dispatcher.submit(content)
 
 
 class ImportCSV:
+    """
+    Streams rows out of uploaded .xlsx and .csv files and imports them in
+    chunks.
+
+    Workbooks are opened in read-only mode, so neither reading nor importing
+    keeps more than one chunk of rows in memory.
+    """
+
+    @staticmethod
+    def read_rows(file_obj):
+        """
+        Opens an uploaded spreadsheet.
+
+        :param file_obj: An uploaded .xlsx or .csv file
+        :return: The header row, and an iterator of dicts mapping headers to
+        cell values. Empty CSV cells are returned as None, like empty cells
+        of a workbook, and fully empty rows are skipped.
+        """
+        if getattr(file_obj, "name", "").lower().endswith(".csv"):
+            text = io.TextIOWrapper(
+                getattr(file_obj, "file", file_obj), encoding="utf-8-sig", newline=""
+                )
+            reader = (
+                [value if value != "" else None for value in values]
+                for values in csv.reader(text)
+                )
+            close = text.detach
+        else:
+            workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+            reader = workbook.active.iter_rows(values_only=True)
+            close = workbook.close
+
+        headers = next(reader, None)
+        if headers is None:
+            close()
+            return [], iter(())
+
+        headers = list(headers)
+
+        def rows():
+            try:
+                for values in reader:
+                    if any(value is not None for value in values):
+                        yield dict(zip(headers, values))
+            finally:
+                close()
+
+        return headers, rows()
+
     def read_excel_file(self, file_obj):
-        workbook = openpyxl.load_workbook(filename=io.BytesIO(file_obj.read()))
-        sheet = workbook.active
+        headers, rows = self.read_rows(file_obj)
+        if not headers:
+            return []
 
-        rows = []
-        for row in sheet.iter_rows(values_only=True):
-            row_dict = {
-                header.value: cell_value for header, cell_value in zip(sheet[1], row)
-                }
-            rows.append(row_dict)
-        workbook.close()
+        return [dict(zip(headers, headers)), *rows]
 
-        return rows
+    @staticmethod
+    def import_rows(
+            file_obj, required_headers: list[str], serializer_class, prepare_chunk,
+            before_save=None, on_saved=None, represent=None,
+            chunk_size: int = IMPORT_CHUNK_SIZE) -> tuple[list, list]:
+        """
+        Imports a spreadsheet chunk by chunk, in a single transaction so an
+        import that fails part way leaves nothing behind.
+
+        Every chunk is passed to `prepare_chunk`, which resolves and checks
+        the rows against lookups preloaded for the chunk and returns the rows
+        to create together with the rows it rejected (each with an `error`
+        key). The remaining rows are validated with `serializer_class` one by
+        one, and the valid ones are inserted with a single bulk_create per
+        chunk.
+
+        :param file_obj: An uploaded .xlsx or .csv file
+        :param required_headers: Headers the file must have
+        :param serializer_class: ModelSerializer that validates a prepared row
+        :param prepare_chunk: `rows -> (rows to create, error rows)`
+        :param before_save: Called with the validated instances of a chunk
+        right before they are inserted, to fill in values such as unique
+        codes. When the insert hits a unique conflict, it is called again
+        and the insert retried, up to IMPORT_RETRIES times.
+        :param on_saved: Called with the created instances, inside the
+        transaction that inserted them
+        :param represent: `instance -> dict` reported for created rows,
+        defaults to the serializer representation
+        :param chunk_size: Number of rows per chunk
+        :return: The created rows and the error rows
+        :raises CustomException: If the file is empty or misses a header
+        """
+        headers, rows = ImportCSV.read_rows(file_obj)
+        if not headers:
+            raise CustomException("Empty csv file.")
+        for key in required_headers:
+            if key not in headers:
+                raise CustomException(f"{key} does not exist in the file.")
+
+        model = serializer_class.Meta.model
+        child = serializer_class()
+        represent = represent or (lambda instance: serializer_class(instance).data)
+        success_rows, error_rows = [], []
+
+        def chunks():
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        with transaction.atomic():
+            for chunk in chunks():
+                valid_rows, rejected_rows = prepare_chunk(chunk)
+                error_rows.extend(rejected_rows)
+
+                instances = []
+                for row in valid_rows:
+                    try:
+                        instances.append(model(**child.run_validation(row)))
+                    except serializers.ValidationError as e:
+                        row["error"] = e.detail
+                        error_rows.append(row)
+
+                ImportCSV._insert(model, instances, before_save)
+                if on_saved:
+                    on_saved(instances)
+                if SearchIndex.is_indexed(model):
+                    # bulk_create sends no post_save
+                    pks = [instance.pk for instance in instances]
+                    transaction.on_commit(lambda pks=pks: SearchIndex.reindex(model, pks))
+
+                success_rows.extend(represent(instance) for instance in instances)
+
+        return success_rows, error_rows
+
+    @staticmethod
+    def _insert(model, instances: list, before_save=None) -> None:
+        for attempt in range(1, IMPORT_RETRIES + 1):
+            if before_save:
+                before_save(instances)
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(instances)
+                return
+            except IntegrityError:
+                if before_save is None or attempt == IMPORT_RETRIES:
+                    raise
+
+
+class MailOutbox:
+    """
+    Transactional outbox for outgoing mail.
+
+    Request handlers only insert rendered messages into the email_outbox table,
+    inside whatever transaction they are running, so a rolled back request
+    never mails anyone. The `send_queued_mail` command delivers due messages
+    over a single SMTP connection per batch and retries failures with
+    exponential backoff.
+    """
+
+    MAX_ATTEMPTS = 6
+    # Seconds a claimed message is held for the worker sending it
+    CLAIM_TIMEOUT = 10 * 60
+    BASE_RETRY_DELAY = 60
+    MAX_RETRY_DELAY = 60 * 60
+
+    @staticmethod
+    def build(
+            subject: str, body: str, recipients: list[str], html_body: str = None,
+            from_email: str = None, attachments: list[dict] = None) -> EmailOutbox:
+        """
+        Builds an unsaved outbox row.
+
+        :param attachments: Dicts with the storage `path` of the file, and the
+        `filename` and `mimetype` to attach it with
+        """
+        now = DateTimeUtils.get_current_utc_time()
+        return EmailOutbox(
+            id=uuid.uuid4(),
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            from_email=from_email or decouple.config("FROM_MAIL"),
+            recipients=list(recipients),
+            attachments=attachments,
+            status=EmailStatus.PENDING.value,
+            next_attempt_at=now,
+            created_at=now,
+            )
+
+    @staticmethod
+    def enqueue(*args, **kwargs) -> EmailOutbox:
+        email = MailOutbox.build(*args, **kwargs)
+        email.save()
+        return email
+
+    @staticmethod
+    def enqueue_many(emails: list[EmailOutbox]) -> None:
+        EmailOutbox.objects.bulk_create(emails, batch_size=500)
+
+    @staticmethod
+    def _to_message(email: EmailOutbox, connection) -> EmailMultiAlternatives:
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.recipients,
+            connection=connection,
+            )
+        if email.html_body:
+            message.attach_alternative(email.html_body, "text/html")
+        for attachment in email.attachments or []:
+            with default_storage.open(attachment["path"], "rb") as file:
+                message.attach(attachment["filename"], file.read(), attachment["mimetype"])
+        return message
+
+    @staticmethod
+    def claim_due(batch_size: int = 100) -> list[EmailOutbox]:
+        """
+        Claims a batch of due messages for this worker by moving their next
+        attempt CLAIM_TIMEOUT ahead, so other workers skip them and a worker
+        that dies mid-batch only delays them.
+
+        The rows are locked only while they are claimed. SKIP LOCKED needs
+        MySQL 8, older servers wait for a concurrent claim to commit instead.
+        """
+        now = DateTimeUtils.get_current_utc_time()
+        with transaction.atomic():
+            database = connections[EmailOutbox.objects.db]
+            emails = EmailOutbox.objects.select_for_update(
+                skip_locked=database.features.has_select_for_update_skip_locked
+                )
+            emails = list(
+                emails.filter(status=EmailStatus.PENDING.value, next_attempt_at__lte=now)
+                .order_by("next_attempt_at")[:batch_size]
+                )
+            for email in emails:
+                email.next_attempt_at = now + timedelta(seconds=MailOutbox.CLAIM_TIMEOUT)
+            EmailOutbox.objects.bulk_update(emails, ["next_attempt_at"])
+        return emails
+
+    @staticmethod
+    def deliver_due(batch_size: int = 100) -> tuple[int, int]:
+        """
+        Sends one batch of due messages. The SMTP calls run after the claim
+        is committed, so no row stays locked during network I/O.
+
+        :return: The number of messages sent and the number that failed.
+        """
+        sent = failed = 0
+        emails = MailOutbox.claim_due(batch_size)
+        if not emails:
+            return sent, failed
+
+        with get_connection() as smtp:
+            for email in emails:
+                try:
+                    MailOutbox._to_message(email, smtp).send()
+                except Exception as e:
+                    MailOutbox._retry_later(email, e)
+                    failed += 1
+                else:
+                    email.status = EmailStatus.SENT.value
+                    email.sent_at = DateTimeUtils.get_current_utc_time()
+                    sent += 1
+                email.attempts += 1
+                email.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+        return sent, failed
+
+    @staticmethod
+    def _retry_later(email: EmailOutbox, error: Exception) -> None:
+        email.last_error = str(error)
+        if email.attempts + 1 >= MailOutbox.MAX_ATTEMPTS:
+            email.status = EmailStatus.FAILED.value
+            return
+
+        delay = min(MailOutbox.BASE_RETRY_DELAY * 2 ** email.attempts, MailOutbox.MAX_RETRY_DELAY)
+        email.next_attempt_at = DateTimeUtils.get_current_utc_time() + timedelta(seconds=delay)
 
 
 def send_template_mail(
-        context: dict, subject: str, address: list[str], attachment: str = None):
+        context: dict, subject: str, address: list[str], attachment: list[dict] = None):
     """
     The function `send_user_mail` sends an email to a user with the provided user data, subject, and
     address.
@@ -185,13 +836,13 @@ def send_template_mail(
     :param address: The `address` parameter is a list of strings that represents the path to the email
     template file. It is used to specify the location of the email template file that will be rendered
     and used as the content of the email
-    attachment: The Attachment That send to the user
+    :param attachment: Attachments of the mail, see `MailOutbox.build`
+    :return: 1 once the mail is queued for delivery
     """
 
     from_mail = decouple.config("FROM_MAIL")
 
     base_url = decouple.config("FR_DOMAIN_NAME")
-    status = None
 
     email_content = render_to_string(
         f"mails/{'/'.join(map(str, address))}", { "user": context, "base_url": base_url }
@@ -199,25 +850,13 @@ def send_template_mail(
     if not (mail := getattr(context, "email", None)):
         mail = context["email"]
 
-    if attachment is None:
-        status = send_mail(
-            subject=subject,
-            message=email_content,
-            from_email=from_mail,
-            recipient_list=[mail],
-            html_message=email_content,
-            fail_silently=False,
-            )
-
-    else:
-        email = EmailMessage(
-            subject=subject,
-            body=email_content,
-            from_email=from_mail,
-            to=[context["email"]],
-            )
-        email.attach(attachment)
-        email.content_subtype = "html"
-        status = email.send()
+    MailOutbox.enqueue(
+        subject=subject,
+        body=email_content,
+        recipients=[mail],
+        html_body=email_content,
+        from_email=from_mail,
+        attachments=attachment,
+        )
 
-    return status
\ No newline at end of file
+    return 1
\ No newline at end of file